@@ -0,0 +1,110 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from src.engine.cryptography_center.encryption_strategy import StreamContext
+
+ProgressCallback = Callable[[int, int], None]
+
+DEFAULT_ASYNC_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+_shared_executor: Optional[ThreadPoolExecutor] = None
+_shared_executor_lock = threading.Lock()
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """The worker budget every async cipher operation shares unless it is given its own executor."""
+    global _shared_executor
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            _shared_executor = ThreadPoolExecutor(DEFAULT_ASYNC_WORKERS, thread_name_prefix='cipher-async')
+        return _shared_executor
+
+
+class _FilePump:
+    """
+    Blocking half of ``pump_file_async``: each ``step`` moves one chunk from input to a temporary file, which
+    ``close`` moves onto the output path once the context has been finalized, as ``Cipher.decrypt_file`` does.
+    """
+
+    def __init__(self, context: StreamContext, file_path: str, output_path: str, chunk_size: int):
+        self._context = context
+        self._output_path = output_path
+        self._temporary_path = f'{output_path}.tmp'
+        self._chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._abandoned = False
+        self.total = os.path.getsize(file_path)
+        self._reader = open(file_path, 'rb')
+        try:
+            self._writer = open(self._temporary_path, 'wb')
+        except OSError:
+            self._reader.close()
+            raise
+
+    def step(self) -> int:
+        with self._lock:
+            if self._abandoned:
+                return 0
+            chunk = self._reader.read(self._chunk_size)
+            if chunk:
+                self._writer.write(self._context.update(chunk))
+            else:
+                self._writer.write(self._context.finalize())
+            return len(chunk)
+
+    def close(self):
+        with self._lock:
+            self._reader.close()
+            self._writer.close()
+            os.replace(self._temporary_path, self._output_path)
+
+    def abandon(self):
+        # Takes the same lock as step(), so a chunk that is mid-flight finishes before the files go away.
+        with self._lock:
+            self._abandoned = True
+            self._reader.close()
+            self._writer.close()
+            if os.path.exists(self._temporary_path):
+                os.remove(self._temporary_path)
+
+
+async def pump_file_async(
+        context: StreamContext,
+        file_path: str,
+        output_path: str,
+        chunk_size: int,
+        progress: Optional[ProgressCallback] = None,
+        executor: Optional[Executor] = None,
+) -> int:
+    """
+    Run ``context`` over ``file_path`` into ``output_path`` one chunk per executor job.
+
+    The event loop is free between chunks, which is also where cancellation lands. Output only appears at
+    ``output_path`` once the whole input went through, so an existing file there survives a cancelled or
+    failed run (a failed authentication included), and no partial output is left behind.
+    ``progress(done, total)`` is called on the event loop after each chunk.
+    """
+    if chunk_size <= 0:
+        raise ValueError('chunk_size must be a positive integer')
+
+    loop = asyncio.get_running_loop()
+    executor = executor or shared_executor()
+    pump = await loop.run_in_executor(executor, _FilePump, context, file_path, output_path, chunk_size)
+
+    done = 0
+    try:
+        while True:
+            read = await loop.run_in_executor(executor, pump.step)
+            if not read:
+                break
+            done += read
+            if progress is not None:
+                progress(done, pump.total)
+        await loop.run_in_executor(executor, pump.close)
+    except BaseException:
+        await asyncio.shield(loop.run_in_executor(executor, pump.abandon))
+        raise
+    return done
@@ -0,0 +1,484 @@
+"""
+Throughput and memory benchmarks for the cryptography center.
+
+``files`` cases run in a fresh process so the peak RSS they report belongs to that case alone. ``suite``
+runs every strategy over both the ``Cipher.encrypt`` and ``encrypt_file`` paths and writes JSON that can be
+diffed between runs. Everything runs offline on generated payloads.
+
+    python -m src.engine.cryptography_center.benchmarks files --size-mb 4096 --chunk-kb 4096
+    python -m src.engine.cryptography_center.benchmarks records --count 100000 --record-size 32
+    python -m src.engine.cryptography_center.benchmarks passwords --count 10000 --length 24
+    python -m src.engine.cryptography_center.benchmarks suite --sizes 64 1K 1M 64M 1G --output run.json
+    python -m src.engine.cryptography_center.benchmarks parallel --size-mb 1024 --max-threads 8
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence
+
+import Crypto
+from Crypto.Cipher import AES
+from Crypto.PublicKey import RSA
+from Crypto.Random import get_random_bytes
+
+from src.engine.cryptography_center.cipher import Cipher
+from src.engine.cryptography_center.compressed_encryption import CompressedEncryptionStrategy
+from src.engine.cryptography_center.encryption_strategy import (
+    DEFAULT_CHUNK_SIZE,
+    AESEncryptionStrategy,
+    EncryptionStrategy,
+    HybridEncryptionStrategy,
+    RSAEncryptionStrategy,
+    StreamContext,
+)
+from src.engine.cryptography_center.segmented_encryption import SegmentedAESEncryptionStrategy
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+def write_payload(path: str, size: int, chunk_size: int = MB):
+    with open(path, 'wb') as file:
+        remaining = size
+        while remaining > 0:
+            step = min(chunk_size, remaining)
+            file.write(os.urandom(step))
+            remaining -= step
+
+
+def _whole_file_encrypt(cipher: Cipher, source: str, target: str, chunk_size: int):
+    with open(source, 'rb') as file:
+        data = file.read()
+    encrypted = cipher.strategy.encrypt(data)
+    with open(target, 'wb') as file:
+        file.write(encrypted)
+
+
+def _streaming_encrypt(cipher: Cipher, source: str, target: str, chunk_size: int):
+    cipher.encrypt_file(source, target, chunk_size)
+
+
+def _mapped_encrypt(cipher: Cipher, source: str, target: str, chunk_size: int):
+    cipher.encrypt_file_mapped(source, target, chunk_size)
+
+
+FILE_CASES: Dict[str, Callable[[Cipher, str, str, int], None]] = {
+    'whole_file': _whole_file_encrypt,
+    'streaming': _streaming_encrypt,
+    'mapped': _mapped_encrypt,
+}
+
+
+def _run_file_case(name: str, source: str, chunk_size: int, results):
+    cipher = Cipher(AESEncryptionStrategy(Cipher.generate_key(32)))
+    target = source + f'.{name}.enc'
+    baseline_rss = peak_rss_bytes()
+
+    start = time.perf_counter()
+    FILE_CASES[name](cipher, source, target, chunk_size)
+    elapsed = time.perf_counter() - start
+    peak_rss = peak_rss_bytes()
+
+    # Second, untimed pass: the peak of heap allocations made along the way, which every user-space copy of
+    # the payload adds to. Pages of a memory mapping are not heap allocations and do not count.
+    tracemalloc.start()
+    FILE_CASES[name](cipher, source, target, chunk_size)
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    os.remove(target)
+    results.put({'baseline_rss': baseline_rss, 'peak_rss': peak_rss, 'peak_traced': peak_traced, 'seconds': elapsed})
+
+
+def run_file_case(name: str, source: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Optional[float]]:
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_run_file_case, args=(name, source, chunk_size, results))
+    process.start()
+    measurement = results.get()
+    process.join()
+
+    size = os.path.getsize(source)
+    peak, baseline = measurement['peak_rss'], measurement['baseline_rss']
+    return {
+        'case': name,
+        'bytes': size,
+        'chunk_size': chunk_size,
+        'seconds': measurement['seconds'],
+        'mb_per_s': size / MB / measurement['seconds'] if measurement['seconds'] else float('inf'),
+        'peak_rss_mb': peak / MB if peak is not None else None,
+        'rss_growth_mb': (peak - baseline) / MB if peak is not None else None,
+        # Peak heap bytes held per payload byte: ~0 for a bounded pipeline, >= 1 when the payload is held whole.
+        'allocated_per_byte': measurement['peak_traced'] / size if size else 0.0,
+    }
+
+
+def format_row(row: Dict[str, Optional[float]]) -> str:
+    def mb(value):
+        return f'{value:9.1f}' if value is not None else '      n/a'
+
+    return (f"{row['case']:<12} {row['bytes'] / MB:8.0f} MB  alloc/B {row['allocated_per_byte']:6.3f}  "
+            f"chunk {row['chunk_size'] // 1024:6d} KiB  {row['mb_per_s']:8.1f} MB/s  "
+            f"peak RSS {mb(row['peak_rss_mb'])} MB  growth {mb(row['rss_growth_mb'])} MB")
+
+
+def run_records_case(count: int, record_size: int) -> Dict[str, float]:
+    """Records per second of a ``Cipher.encrypt``/``decrypt`` loop against ``encrypt_many``/``decrypt_many``."""
+    cipher = Cipher(AESEncryptionStrategy(Cipher.generate_key(32)))
+    records = [os.urandom(record_size) for _ in range(count)]
+
+    def rate(callable_) -> float:
+        start = time.perf_counter()
+        callable_()
+        return count / (time.perf_counter() - start)
+
+    encrypted = list(cipher.encrypt_many(records))
+    return {
+        'encrypt_loop': rate(lambda: [cipher.encrypt(record) for record in records]),
+        'encrypt_many': rate(lambda: list(cipher.encrypt_many(records))),
+        'decrypt_loop': rate(lambda: [cipher.decrypt(record) for record in encrypted]),
+        'decrypt_many': rate(lambda: list(cipher.decrypt_many(encrypted))),
+    }
+
+
+def run_passwords_case(count: int, length: int) -> Dict[str, float]:
+    """Passwords per second of a ``Cipher.generate_password`` loop against ``Cipher.generate_passwords``."""
+    def rate(callable_) -> float:
+        start = time.perf_counter()
+        callable_()
+        return count / (time.perf_counter() - start)
+
+    return {
+        'generate_password_loop': rate(lambda: [Cipher.generate_password(length) for _ in range(count)]),
+        'generate_passwords': rate(lambda: list(Cipher.generate_passwords(count, length))),
+    }
+
+
+class _AESModeStrategy(EncryptionStrategy):
+    """Unauthenticated AES stream modes, only here to compare their raw speed with the shipped CFB-8 strategy."""
+
+    def __init__(self, key: bytes, mode: int, **mode_kwargs):
+        self.key = key
+        self.mode = mode
+        self.mode_kwargs = mode_kwargs
+        self.header_size = 8 if mode == AES.MODE_CTR else 16
+
+    def _new(self, header: bytes):
+        if self.mode == AES.MODE_CTR:
+            return AES.new(self.key, self.mode, nonce=header, **self.mode_kwargs)
+        return AES.new(self.key, self.mode, iv=header, **self.mode_kwargs)
+
+    def encrypt(self, data: bytes) -> bytes:
+        header = get_random_bytes(self.header_size)
+        return header + self._new(header).encrypt(data)
+
+    def decrypt(self, data: bytes) -> bytes:
+        return self._new(data[:self.header_size]).decrypt(data[self.header_size:])
+
+    def encryptor(self) -> StreamContext:
+        return _AESModeEncryptor(self)
+
+    def decryptor(self) -> StreamContext:
+        return _AESModeDecryptor(self)
+
+
+class _AESModeEncryptor(StreamContext):
+    def __init__(self, strategy: _AESModeStrategy):
+        self._header = get_random_bytes(strategy.header_size)
+        self._cipher = strategy._new(self._header)
+
+    def update(self, data: bytes) -> bytes:
+        encrypted = self._cipher.encrypt(data)
+        if self._header:
+            encrypted, self._header = self._header + encrypted, b''
+        return encrypted
+
+    def finalize(self) -> bytes:
+        header, self._header = self._header, b''
+        return header
+
+
+class _AESModeDecryptor(StreamContext):
+    def __init__(self, strategy: _AESModeStrategy):
+        self._strategy = strategy
+        self._cipher = None
+        self._pending = bytearray()
+
+    def update(self, data: bytes) -> bytes:
+        if self._cipher is not None:
+            return self._cipher.decrypt(data)
+        self._pending += data
+        if len(self._pending) < self._strategy.header_size:
+            return b''
+        self._cipher = self._strategy._new(bytes(self._pending[:self._strategy.header_size]))
+        return self._cipher.decrypt(bytes(self._pending[self._strategy.header_size:]))
+
+    def finalize(self) -> bytes:
+        return b''
+
+
+SUITE_STRATEGIES: Dict[str, Callable[[bytes, RSA.RsaKey], EncryptionStrategy]] = {
+    'aes-cfb8': lambda key, rsa_key: AESEncryptionStrategy(key),
+    'aes-cfb128': lambda key, rsa_key: _AESModeStrategy(key, AES.MODE_CFB, segment_size=128),
+    'aes-ctr': lambda key, rsa_key: _AESModeStrategy(key, AES.MODE_CTR),
+    'aes-ofb': lambda key, rsa_key: _AESModeStrategy(key, AES.MODE_OFB),
+    'aes-gcm-segmented': lambda key, rsa_key: SegmentedAESEncryptionStrategy(key),
+    'aes-cfb8-zlib': lambda key, rsa_key: CompressedEncryptionStrategy(AESEncryptionStrategy(key)),
+    'rsa-oaep': lambda key, rsa_key: RSAEncryptionStrategy(rsa_key.publickey(), rsa_key),
+    'rsa-hybrid': lambda key, rsa_key: HybridEncryptionStrategy(rsa_key.publickey(), rsa_key),
+}
+
+
+def run_parallel_case(size: int, max_threads: int, segment_size: int) -> List[Dict[str, float]]:
+    """Segmented decryption of one file with 1 to ``max_threads`` threads, against the sequential stream."""
+    cipher = Cipher(SegmentedAESEncryptionStrategy(Cipher.generate_key(32), segment_size))
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        source, encrypted, restored = (os.path.join(workdir, name) for name in ('plain', 'encrypted', 'restored'))
+        write_payload(source, size)
+        cipher.encrypt_file(source, encrypted)
+
+        start = time.perf_counter()
+        cipher.decrypt_file(encrypted, restored)
+        sequential = time.perf_counter() - start
+
+        for threads in range(1, max_threads + 1):
+            start = time.perf_counter()
+            cipher.decrypt_file_parallel(encrypted, restored, threads)
+            elapsed = time.perf_counter() - start
+            rows.append({
+                'threads': threads,
+                'seconds': elapsed,
+                'mb_per_s': size / MB / elapsed,
+                'speedup': sequential / elapsed,
+            })
+    return rows
+
+
+def max_payload_size(strategy: EncryptionStrategy) -> Optional[int]:
+    if isinstance(strategy, RSAEncryptionStrategy):
+        # PKCS#1 OAEP with SHA-1: modulus bytes - 2 * digest size - 2.
+        return strategy.public_key.size_in_bytes() - 2 * 20 - 2
+    return None
+
+
+def parse_size(text: str) -> int:
+    units = {'K': 1024, 'M': MB, 'G': 1024 * MB}
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def make_payload(size: int, kind: str) -> bytes:
+    if kind == 'text':
+        line = b'2024-01-01T00:00:00 INFO worker-01 request served in 12ms\n'
+        return (line * (size // len(line) + 1))[:size]
+    return os.urandom(size)
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(operation: Callable[[], None], size: int, min_seconds: float, min_repetitions: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    started = time.perf_counter()
+    while len(latencies) < min_repetitions or time.perf_counter() - started < min_seconds:
+        start = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - start)
+        if len(latencies) >= 100_000:
+            break
+
+    # Separate pass so tracing overhead does not leak into the timings.
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        'repetitions': len(latencies),
+        'mb_per_s': size * len(latencies) / MB / total if total else float('inf'),
+        'ops_per_s': len(latencies) / total if total else float('inf'),
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_traced_mb': peak / MB,
+    }
+
+
+def run_suite(
+        sizes: Sequence[int],
+        chunk_sizes: Sequence[int],
+        payload_kind: str = 'random',
+        min_seconds: float = 0.2,
+        min_repetitions: int = 3,
+        strategies: Optional[Sequence[str]] = None,
+) -> List[Dict]:
+    results: List[Dict] = []
+    key, rsa_key = Cipher.generate_key(32), RSA.generate(2048)
+    available = {
+        name: factory(key, rsa_key)
+        for name, factory in SUITE_STRATEGIES.items()
+        if not strategies or name in strategies
+    }
+
+    def record(name: str, path: str, operation: str, size: int, chunk_size: Optional[int], metrics: Dict):
+        row = {'strategy': name, 'path': path, 'operation': operation, 'bytes': size, 'chunk_size': chunk_size}
+        row.update(metrics)
+        results.append(row)
+        print(f"{name:<18} {path:<6} {operation:<7} {size:>12} B  chunk {chunk_size or '-':>8}  "
+              f"{row['mb_per_s']:9.1f} MB/s  {row['ops_per_s']:11.1f} op/s  "
+              f"p50 {row['p50_ms']:9.3f} ms  p99 {row['p99_ms']:9.3f} ms  peak {row['peak_traced_mb']:8.1f} MB")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source, encrypted, restored = (os.path.join(workdir, name) for name in ('plain', 'encrypted', 'restored'))
+
+        for size in sizes:
+            payload = make_payload(size, payload_kind)
+            with open(source, 'wb') as file:
+                file.write(payload)
+
+            for name, strategy in available.items():
+                limit = max_payload_size(strategy)
+                if limit is not None and size > limit:
+                    continue
+                cipher = Cipher(strategy)
+
+                ciphertext = cipher.encrypt(payload)
+                record(name, 'string', 'encrypt', size, None,
+                       measure(lambda: cipher.encrypt(payload), size, min_seconds, min_repetitions))
+                record(name, 'string', 'decrypt', size, None,
+                       measure(lambda: cipher.decrypt(ciphertext), size, min_seconds, min_repetitions))
+
+                for chunk_size in chunk_sizes:
+                    cipher.encrypt_file(source, encrypted, chunk_size)
+                    record(name, 'file', 'encrypt', size, chunk_size, measure(
+                        lambda: cipher.encrypt_file(source, encrypted, chunk_size), size, min_seconds, min_repetitions
+                    ))
+                    record(name, 'file', 'decrypt', size, chunk_size, measure(
+                        lambda: cipher.decrypt_file(encrypted, restored, chunk_size), size, min_seconds, min_repetitions
+                    ))
+            del payload
+
+    return results
+
+
+def environment() -> Dict[str, str]:
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': str(os.cpu_count()),
+        'pycryptodome': Crypto.__version__,
+    }
+
+
+def suite_document(results: List[Dict]) -> Dict:
+    """The JSON written by ``suite --output``: the environment the run happened in and one row per case."""
+    return {'environment': environment(), 'results': results}
+
+
+def _passwords_command(args):
+    for name, passwords_per_s in run_passwords_case(args.count, args.length).items():
+        print(f'{name:<24} {passwords_per_s:12,.0f} passwords/s')
+
+
+def _suite_command(args):
+    results = run_suite(
+        [parse_size(size) for size in args.sizes],
+        [parse_size(size) for size in args.chunk_sizes],
+        args.payload,
+        args.min_seconds,
+        args.min_repetitions,
+        args.strategies,
+    )
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(suite_document(results), file, indent=4)
+        print(f'Wrote {len(results)} results to {args.output}')
+
+
+def _files_command(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, 'payload.bin')
+        write_payload(source, args.size_mb * MB)
+        for name in FILE_CASES:
+            print(format_row(run_file_case(name, source, args.chunk_kb * 1024)))
+
+
+def _parallel_command(args):
+    for row in run_parallel_case(args.size_mb * MB, args.max_threads, args.segment_kb * 1024):
+        print(f"{row['threads']:3d} threads  {row['seconds']:8.3f} s  {row['mb_per_s']:9.1f} MB/s  "
+              f"x{row['speedup']:.2f} vs decrypt_file")
+
+
+def _records_command(args):
+    for name, records_per_s in run_records_case(args.count, args.record_size).items():
+        print(f'{name:<14} {records_per_s:12,.0f} records/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cryptography center benchmarks.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    files = commands.add_parser('files', help='Compare whole-file, streaming and memory-mapped AES file encryption.')
+    files.add_argument('--size-mb', type=int, default=128, help='Size of the generated payload.')
+    files.add_argument('--chunk-kb', type=int, default=DEFAULT_CHUNK_SIZE // 1024, help='Streaming chunk size.')
+    files.set_defaults(handler=_files_command)
+
+    records = commands.add_parser('records', help='Compare per-call and batch encryption of small records.')
+    records.add_argument('--count', type=int, default=100_000, help='Number of records.')
+    records.add_argument('--record-size', type=int, default=32, help='Size of each record in bytes.')
+    records.set_defaults(handler=_records_command)
+
+    passwords = commands.add_parser('passwords', help='Compare per-call and bulk password generation.')
+    passwords.add_argument('--count', type=int, default=10_000, help='Number of passwords.')
+    passwords.add_argument('--length', type=int, default=16, help='Length of each password.')
+    passwords.set_defaults(handler=_passwords_command)
+
+    parallel = commands.add_parser('parallel', help='Speedup of segmented decryption from 1 to N threads.')
+    parallel.add_argument('--size-mb', type=int, default=256, help='Size of the generated payload.')
+    parallel.add_argument('--max-threads', type=int, default=os.cpu_count() or 1, help='Largest thread count.')
+    parallel.add_argument('--segment-kb', type=int, default=64, help='Segment size of the container.')
+    parallel.set_defaults(handler=_parallel_command)
+
+    suite = commands.add_parser('suite', help='Every strategy over string and file paths, written to JSON.')
+    suite.add_argument('--sizes', nargs='+', default=['64', '1K', '64K', '1M', '16M'],
+                       help='Payload sizes, e.g. 64 1K 1M 1G.')
+    suite.add_argument('--chunk-sizes', nargs='+', default=['16K', '64K', '1M'], help='File path read sizes.')
+    suite.add_argument('--payload', choices=('random', 'text'), default='random', help='Payload content.')
+    suite.add_argument('--strategies', nargs='+', choices=list(SUITE_STRATEGIES), help='Subset to run.')
+    suite.add_argument('--min-seconds', type=float, default=0.2, help='Minimum time spent on each case.')
+    suite.add_argument('--min-repetitions', type=int, default=3, help='Minimum repetitions of each case.')
+    suite.add_argument('--output', help='Write results as JSON to this path.')
+    suite.set_defaults(handler=_suite_command)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
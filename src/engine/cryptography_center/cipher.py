@@ -1,19 +1,41 @@
 
 
-from typing import Union
+from concurrent.futures import Executor
+from itertools import islice
+from typing import TYPE_CHECKING, AsyncIterator, BinaryIO, Iterable, Iterator, Optional, Union
 import base64
+import binascii
+import hashlib
+import mmap
+import os
 
-from Crypto.PublicKey import RSA
-from Crypto.Random import get_random_bytes
-from Crypto.Hash import SHA256
+from src.engine.cryptography_center.encryption_strategy import (
+    DEFAULT_CHUNK_SIZE,
+    EncryptionStrategy,
+    MappableEncryptionStrategy,
+    ParallelEncryptionStrategy,
+    SeekableEncryptionStrategy,
+    StreamContext,
+)
+from src.engine.cryptography_center import entropy_pool, strategy_registry
+from src.engine.cryptography_center.tree_operations import TreeReport, process_tree
 
-from src.engine.cryptography_center.encryption_strategy import EncryptionStrategy
+# asyncio (via async_operations) is only imported by the async methods, keeping it out of the GUI's startup.
+if TYPE_CHECKING:
+    from src.engine.cryptography_center.async_operations import ProgressCallback
+
+MAPPED_CHUNK_SIZE = 4 * 1024 * 1024
 
 
 class Cipher:
     def __init__(self, strategy: EncryptionStrategy):
         self.strategy = strategy
 
+    @classmethod
+    def from_name(cls, name: str, *args, **kwargs) -> 'Cipher':
+        """Build a Cipher around a strategy looked up in the registry, e.g. ``Cipher.from_name('aes', key)``."""
+        return cls(strategy_registry.create_strategy(name, *args, **kwargs))
+
     def encrypt(self, data: Union[str, bytes]) -> str:
         if isinstance(data, str):
             data = data.encode()
@@ -28,23 +50,197 @@ class Cipher:
         except UnicodeDecodeError:
             return decrypted_data
 
-    def encrypt_file(self, file_path: str, output_path: str):
-        with open(file_path, 'rb') as file:
-            data = file.read()
-        encrypted_data = self.strategy.encrypt(data)
-        with open(output_path, 'wb') as file:
-            file.write(encrypted_data)
+    def encrypt_many(self, items: Iterable[Union[str, bytes]]) -> Iterator[str]:
+        """Lazily encrypt many records; equivalent to ``map(self.encrypt, items)`` but cheaper per record."""
+        encoded = (item.encode() if isinstance(item, str) else item for item in items)
+        to_base64 = binascii.b2a_base64
+        for encrypted_data in self.strategy.encrypt_many(encoded):
+            yield to_base64(encrypted_data, newline=False).decode('ascii')
 
-    def decrypt_file(self, file_path: str, output_path: str):
-        with open(file_path, 'rb') as file:
-            encrypted_data = file.read()
-        decrypted_data = self.strategy.decrypt(encrypted_data)
-        with open(output_path, 'wb') as file:
-            file.write(decrypted_data)
+    def decrypt_many(self, items: Iterable[str]) -> Iterator[Union[str, bytes]]:
+        """Lazily decrypt many records; equivalent to ``map(self.decrypt, items)`` but cheaper per record."""
+        from_base64 = binascii.a2b_base64
+        for decrypted_data in self.strategy.decrypt_many(from_base64(item) for item in items):
+            try:
+                yield decrypted_data.decode()
+            except UnicodeDecodeError:
+                yield decrypted_data
+
+    def encrypt_file(self, file_path: str, output_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        with open(file_path, 'rb') as reader, open(output_path, 'wb') as writer:
+            return self.encrypt_stream(reader, writer, chunk_size)
+
+    def decrypt_file(self, file_path: str, output_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Decrypt into a temporary file that replaces ``output_path`` only once ``finalize`` succeeded, so an
+        authenticated strategy never leaves plaintext of a tampered or truncated input behind.
+        """
+        temporary_path = f'{output_path}.tmp'
+        try:
+            with open(file_path, 'rb') as reader, open(temporary_path, 'wb') as writer:
+                read = self.decrypt_stream(reader, writer, chunk_size)
+            os.replace(temporary_path, output_path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        return read
+
+    def encrypt_file_mapped(self, file_path: str, output_path: str, chunk_size: int = MAPPED_CHUNK_SIZE) -> int:
+        """
+        Encrypt by memory-mapping both files: AES reads from the input mapping and writes straight into a
+        preallocated output mapping, so no intermediate bytes objects are built.
+        """
+        strategy = self._mappable_strategy()
+        size = os.path.getsize(file_path)
+        self._transform_mapped(strategy.encrypt_into, file_path, output_path, strategy.ciphertext_size(size),
+                               chunk_size)
+        return size
+
+    def decrypt_file_mapped(self, file_path: str, output_path: str, chunk_size: int = MAPPED_CHUNK_SIZE) -> int:
+        strategy = self._mappable_strategy()
+        size = os.path.getsize(file_path)
+        self._transform_mapped(strategy.decrypt_into, file_path, output_path, strategy.decrypted_size(size), chunk_size)
+        return size
+
+    def decrypt_file_parallel(self, file_path: str, output_path: str, max_workers: Optional[int] = None) -> int:
+        """Decrypt independent segments of ``file_path`` on ``max_workers`` threads. Returns the plaintext size."""
+        if not isinstance(self.strategy, ParallelEncryptionStrategy):
+            raise TypeError(f'{type(self.strategy).__name__} does not support parallel decryption')
+        return self.strategy.decrypt_file_parallel(file_path, output_path, max_workers)
+
+    def _mappable_strategy(self) -> MappableEncryptionStrategy:
+        if not isinstance(self.strategy, MappableEncryptionStrategy):
+            raise TypeError(f'{type(self.strategy).__name__} does not support memory-mapped encryption')
+        return self.strategy
+
+    @staticmethod
+    def _transform_mapped(transform, file_path: str, output_path: str, output_size: int, chunk_size: int):
+        with open(file_path, 'rb') as reader, open(output_path, 'w+b') as writer:
+            writer.truncate(output_size)
+            # Zero-length files cannot be mapped, an empty view stands in for them.
+            source = b''
+            if os.fstat(reader.fileno()).st_size:
+                source = mmap.mmap(reader.fileno(), 0, access=mmap.ACCESS_READ)
+            target = mmap.mmap(writer.fileno(), output_size) if output_size else bytearray()
+            try:
+                with memoryview(source) as source_view, memoryview(target) as target_view:
+                    transform(source_view, target_view, chunk_size)
+                if isinstance(target, mmap.mmap):
+                    target.flush()
+            finally:
+                for mapping in (source, target):
+                    if isinstance(mapping, mmap.mmap):
+                        mapping.close()
+
+    def encrypt_stream(self, reader: BinaryIO, writer: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Encrypt ``reader`` into ``writer`` holding at most one chunk in memory. Returns bytes read."""
+        return self._pump(self.strategy.encryptor(), reader, writer, chunk_size)
+
+    def decrypt_stream(self, reader: BinaryIO, writer: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Decrypt ``reader`` into ``writer`` holding at most one chunk in memory. Returns bytes read."""
+        return self._pump(self.strategy.decryptor(), reader, writer, chunk_size)
+
+    def encrypt_tree(
+            self,
+            source_dir: str,
+            output_dir: str,
+            suffix: str = '.enc',
+            max_workers: Optional[int] = None,
+            use_processes: bool = False,
+    ) -> TreeReport:
+        """Encrypt every file below ``source_dir`` into the same layout under ``output_dir``."""
+        return process_tree(
+            self.encrypt_file, source_dir, output_dir, lambda name: name + suffix, max_workers, use_processes
+        )
+
+    def decrypt_tree(
+            self,
+            source_dir: str,
+            output_dir: str,
+            suffix: str = '.enc',
+            max_workers: Optional[int] = None,
+            use_processes: bool = False,
+    ) -> TreeReport:
+        """Decrypt every ``*suffix`` file below ``source_dir``, dropping the suffix in ``output_dir``."""
+        def rename(name: str) -> Optional[str]:
+            return name[:-len(suffix)] if suffix and name.endswith(suffix) else None
+
+        return process_tree(self.decrypt_file, source_dir, output_dir, rename, max_workers, use_processes)
+
+    async def encrypt_file_async(
+            self,
+            file_path: str,
+            output_path: str,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            progress: Optional['ProgressCallback'] = None,
+            executor: Optional[Executor] = None,
+    ) -> int:
+        """Like ``encrypt_file``, but file I/O and AES run on ``executor`` one chunk at a time."""
+        from src.engine.cryptography_center.async_operations import pump_file_async
+
+        return await pump_file_async(self.strategy.encryptor(), file_path, output_path, chunk_size, progress, executor)
+
+    async def decrypt_file_async(
+            self,
+            file_path: str,
+            output_path: str,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            progress: Optional['ProgressCallback'] = None,
+            executor: Optional[Executor] = None,
+    ) -> int:
+        """Like ``decrypt_file``, but file I/O and AES run on ``executor`` one chunk at a time."""
+        from src.engine.cryptography_center.async_operations import pump_file_async
+
+        return await pump_file_async(self.strategy.decryptor(), file_path, output_path, chunk_size, progress, executor)
+
+    async def encrypt_many_async(
+            self,
+            items: Iterable[Union[str, bytes]],
+            batch_size: int = 256,
+            executor: Optional[Executor] = None,
+    ) -> AsyncIterator[str]:
+        """Async generator over ``encrypt_many``, encrypting ``batch_size`` records per executor job."""
+        import asyncio
+        from src.engine.cryptography_center.async_operations import shared_executor
+
+        loop = asyncio.get_running_loop()
+        executor = executor or shared_executor()
+        iterator = iter(items)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return
+            for encrypted in await loop.run_in_executor(executor, lambda: list(self.encrypt_many(batch))):
+                yield encrypted
+
+    def read_range(self, file_path: str, offset: int, length: int) -> bytes:
+        """Decrypt a slice of an encrypted file without decrypting what comes before it."""
+        if not isinstance(self.strategy, SeekableEncryptionStrategy):
+            raise TypeError(f'{type(self.strategy).__name__} does not support random access')
+        with open(file_path, 'rb') as reader:
+            return self.strategy.read_range(reader, offset, length)
+
+    @staticmethod
+    def _pump(context: StreamContext, reader: BinaryIO, writer: BinaryIO, chunk_size: int) -> int:
+        if chunk_size <= 0:
+            raise ValueError('chunk_size must be a positive integer')
+
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        total = 0
+        while True:
+            read = reader.readinto(buffer)
+            if not read:
+                break
+            total += read
+            writer.write(context.update(view[:read]))
+        writer.write(context.finalize())
+        return total
 
     @staticmethod
     def create_hash(data: str) -> str:
-        hash_obj = SHA256.new(data.encode())
+        hash_obj = hashlib.sha256(data.encode())
         return base64.b64encode(hash_obj.digest()).decode()
 
     @staticmethod
@@ -53,12 +249,24 @@ class Cipher:
 
     @staticmethod
     def generate_key(key_size: int = 32) -> bytes:
+        from Crypto.Random import get_random_bytes
+
         return get_random_bytes(key_size)
 
     @staticmethod
     def generate_password(length: int = 16) -> str:
+        from Crypto.Random import get_random_bytes
+
         return base64.b64encode(get_random_bytes(length)).decode()[:length]
 
+    @staticmethod
+    def generate_passwords(
+            count: int,
+            length: int = 16,
+            alphabet: str = entropy_pool.DEFAULT_ALPHABET,
+    ) -> Iterator[str]:
+        return entropy_pool.generate_passwords(count, length, alphabet)
+
     @staticmethod
     def base64_encode(data: bytes) -> str:
         return base64.b64encode(data).decode()
@@ -79,6 +287,8 @@ class Cipher:
 
     @staticmethod
     def generate_rsa_keypair(key_size: int = 2048):
+        from Crypto.PublicKey import RSA
+
         key = RSA.generate(key_size)
         private_key = key.export_key()
         public_key = key.publickey().export_key()
@@ -87,6 +297,8 @@ class Cipher:
 
 # Example usage
 if __name__ == '__main__':
+    from Crypto.PublicKey import RSA
+
     from src.engine.cryptography_center.encryption_strategy import AESEncryptionStrategy, RSAEncryptionStrategy
 
     # AES Example
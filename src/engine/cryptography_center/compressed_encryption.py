@@ -0,0 +1,148 @@
+import bz2
+import lzma
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.engine.cryptography_center.encryption_strategy import EncryptionStrategy, StreamContext
+
+NO_COMPRESSION = 'none'
+DEFAULT_SAMPLE_SIZE = 64 * 1024
+DEFAULT_MIN_SAVINGS = 0.1
+# Most plaintext one decrypting update() may expand to; more than that is treated as a decompression bomb.
+DEFAULT_MAX_OUTPUT_SIZE = 256 * 1024 * 1024
+
+# name -> (id written to the stream, compressor factory, decompressor factory)
+CODECS: Dict[str, Tuple[int, Optional[Callable[[], Any]], Optional[Callable[[], Any]]]] = {
+    NO_COMPRESSION: (0, None, None),
+    'zlib': (1, lambda: zlib.compressobj(6), zlib.decompressobj),
+    'lzma': (2, lzma.LZMACompressor, lzma.LZMADecompressor),
+    'bz2': (3, bz2.BZ2Compressor, bz2.BZ2Decompressor),
+}
+_CODECS_BY_ID = {codec_id: name for name, (codec_id, _, _) in CODECS.items()}
+
+
+def is_compressible(sample: bytes, min_savings: float = DEFAULT_MIN_SAVINGS) -> bool:
+    """Cheap zlib level-1 probe: already-compressed or encrypted data will not shrink by ``min_savings``."""
+    if not sample:
+        return False
+    return len(zlib.compress(sample, 1)) <= len(sample) * (1 - min_savings)
+
+
+class CompressedEncryptionStrategy(EncryptionStrategy):
+    """
+    Compresses the payload before handing it to ``strategy``.
+
+    The first byte of the plaintext given to ``strategy`` names the codec, so decryption needs no
+    configuration. The first ``sample_size`` bytes are probed and data that does not compress is
+    stored as-is under the ``none`` codec. Decryption refuses to expand one call's input to more than
+    ``max_output_size`` bytes, since an unauthenticated inner strategy lets anyone craft the compressed stream.
+    """
+
+    def __init__(
+            self,
+            strategy: EncryptionStrategy,
+            codec: str = 'zlib',
+            sample_size: int = DEFAULT_SAMPLE_SIZE,
+            min_savings: float = DEFAULT_MIN_SAVINGS,
+            max_output_size: int = DEFAULT_MAX_OUTPUT_SIZE,
+    ):
+        if codec not in CODECS:
+            raise ValueError(f'Unknown codec: {codec}')
+        self.strategy = strategy
+        self.codec = codec
+        self.sample_size = sample_size
+        self.min_savings = min_savings
+        self.max_output_size = max_output_size
+
+    @property
+    def authenticated(self) -> bool:
+        return self.strategy.authenticated
+
+    def encrypt(self, data: bytes) -> bytes:
+        context = self.encryptor()
+        return context.update(data) + context.finalize()
+
+    def decrypt(self, data: bytes) -> bytes:
+        context = self.decryptor()
+        return context.update(data) + context.finalize()
+
+    def encryptor(self) -> StreamContext:
+        return _CompressingEncryptor(self.strategy.encryptor(), self.codec, self.sample_size, self.min_savings)
+
+    def decryptor(self) -> StreamContext:
+        return _DecompressingDecryptor(self.strategy.decryptor(), self.max_output_size)
+
+
+class _CompressingEncryptor(StreamContext):
+    def __init__(self, inner: StreamContext, codec: str, sample_size: int, min_savings: float):
+        self._inner = inner
+        self._codec = codec
+        self._sample_size = sample_size
+        self._min_savings = min_savings
+        self._sample = bytearray()
+        self._compressor = None
+        self._started = False
+
+    def update(self, data: bytes) -> bytes:
+        if self._started:
+            return self._feed(data)
+        self._sample += data
+        return self._start() if len(self._sample) >= self._sample_size else b''
+
+    def finalize(self) -> bytes:
+        output = b'' if self._started else self._start()
+        if self._compressor is not None:
+            output += self._inner.update(self._compressor.flush())
+        return output + self._inner.finalize()
+
+    def _start(self) -> bytes:
+        self._started = True
+        sample, self._sample = bytes(self._sample), bytearray()
+
+        codec = self._codec if is_compressible(sample[:self._sample_size], self._min_savings) else NO_COMPRESSION
+        codec_id, compressor_factory, _ = CODECS[codec]
+        self._compressor = compressor_factory() if compressor_factory else None
+        return self._inner.update(bytes([codec_id])) + self._feed(sample)
+
+    def _feed(self, data: bytes) -> bytes:
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        return self._inner.update(data) if data else b''
+
+
+class _DecompressingDecryptor(StreamContext):
+    def __init__(self, inner: StreamContext, max_output_size: int):
+        self._inner = inner
+        self._max_output_size = max_output_size
+        self._codec = None
+        self._decompressor = None
+
+    def update(self, data: bytes) -> bytes:
+        return self._decompress(self._inner.update(data))
+
+    def finalize(self) -> bytes:
+        output = self._decompress(self._inner.finalize())
+        if self._codec is None:
+            raise ValueError('Ciphertext does not contain a codec header')
+        if self._decompressor is not None and not self._decompressor.eof:
+            raise ValueError('Compressed stream is truncated')
+        return output
+
+    def _decompress(self, plaintext: bytes) -> bytes:
+        if self._codec is None:
+            if not plaintext:
+                return b''
+            if plaintext[0] not in _CODECS_BY_ID:
+                raise ValueError(f'Unknown codec id: {plaintext[0]}')
+            self._codec = _CODECS_BY_ID[plaintext[0]]
+            decompressor_factory = CODECS[self._codec][2]
+            self._decompressor = decompressor_factory() if decompressor_factory else None
+            plaintext = plaintext[1:]
+
+        if self._decompressor is None or not plaintext:
+            return plaintext
+        # One byte over the limit is enough to tell that the limit was exceeded.
+        output = self._decompressor.decompress(plaintext, self._max_output_size + 1)
+        if len(output) > self._max_output_size:
+            raise ValueError(f'Compressed data expands to more than {self._max_output_size} bytes')
+        return output
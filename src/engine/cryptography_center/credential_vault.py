@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.application_config.app_logger import app_logger
+from src.engine.cryptography_center.cipher import Cipher
+
+# source -> (offset, length) of the line holding its latest record
+Index = Dict[str, Tuple[int, int]]
+# A scanned record's location, or None for a tombstone
+Location = Optional[Tuple[int, int]]
+
+
+class CredentialVault:
+    """
+    Append-only store of (source, password) pairs with one encrypted record per line.
+
+    Setting or deleting an entry appends a single record; an in-memory index maps each source to the
+    offset of its latest record, so lookups decrypt exactly one line. Superseded records and tombstones
+    are dead weight until compaction, which starts in a background thread once they make up more than
+    ``compaction_threshold`` of the file. Compaction copies the still-live lines verbatim (nothing is
+    re-encrypted) and only holds the lock while it splices in records appended in the meantime.
+
+    A crash in the middle of an append leaves a last line without its newline. That record was never
+    acknowledged, so opening the vault truncates it away instead of failing on it.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            cipher: Cipher,
+            compaction_threshold: float = 0.5,
+            min_dead_records: int = 64,
+    ):
+        self.path = path
+        self.cipher = cipher
+        self.compaction_threshold = compaction_threshold
+        self.min_dead_records = min_dead_records
+
+        self._lock = threading.RLock()
+        # Held for a whole compaction, so a manual compact() and the background one never share the temp file.
+        self._compaction_lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+        self._index: Index = {}
+        self._records = 0
+
+        open(self.path, 'ab').close()
+        self._truncate_torn_tail()
+        with open(self.path, 'rb') as file:
+            for source, location in self._scan(file, 0):
+                self._apply(self._index, source, location)
+                self._records += 1
+        self._writer = open(self.path, 'ab')
+        self._reader = open(self.path, 'rb')
+
+    def get(self, source: str) -> Optional[str]:
+        with self._lock:
+            location = self._index.get(source)
+            if location is None:
+                return None
+            offset, length = location
+            self._reader.seek(offset)
+            line = self._reader.read(length)
+        return self._decode(line)['password']
+
+    def set(self, source: str, password: str):
+        self._append({'source': source, 'password': password})
+
+    def delete(self, source: str) -> bool:
+        with self._lock:
+            if source not in self._index:
+                return False
+            self._append({'source': source, 'deleted': True})
+            return True
+
+    def sources(self) -> List[str]:
+        with self._lock:
+            return list(self._index)
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        for source in self.sources():
+            password = self.get(source)
+            if password is not None:
+                yield source, password
+
+    def __contains__(self, source: str) -> bool:
+        with self._lock:
+            return source in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+
+    @property
+    def dead_records(self) -> int:
+        with self._lock:
+            return self._records - len(self._index)
+
+    def compact(self):
+        """Rewrite the file with only live records. Safe to call while other threads use the vault."""
+        with self._compaction_lock:
+            self._compact()
+
+    def _compact(self):
+        with self._lock:
+            self._writer.flush()
+            snapshot_end = self._writer.tell()
+            snapshot = dict(self._index)
+
+        temporary_path = f'{self.path}.compact'
+        compacted: Index = {}
+        with open(self.path, 'rb') as source_file, open(temporary_path, 'wb') as target:
+            for source, (offset, length) in snapshot.items():
+                source_file.seek(offset)
+                compacted[source] = (target.tell(), length)
+                target.write(source_file.read(length))
+
+            with self._lock:
+                # Records appended while the bulk copy ran are carried over as-is, tombstones included.
+                self._writer.flush()
+                source_file.seek(snapshot_end)
+                tail_start = target.tell()
+                target.write(source_file.read())
+                target.flush()
+                os.fsync(target.fileno())
+
+                records = len(compacted)
+                with open(temporary_path, 'rb') as tail:
+                    for source, location in self._scan(tail, tail_start):
+                        self._apply(compacted, source, location)
+                        records += 1
+
+                # Windows cannot replace a file that is still open, so every handle on either file goes first.
+                source_file.close()
+                target.close()
+                self._writer.close()
+                self._reader.close()
+                os.replace(temporary_path, self.path)
+                self._writer = open(self.path, 'ab')
+                self._reader = open(self.path, 'rb')
+                self._index = compacted
+                self._records = records
+
+        app_logger.debug("Compacted credential vault %s to %d records", self.path, self._records)
+
+    def close(self):
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+        with self._lock:
+            self._writer.close()
+            self._reader.close()
+
+    def __enter__(self) -> 'CredentialVault':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _append(self, record: dict):
+        line = next(self.cipher.encrypt_many([json.dumps(record)])).encode() + b'\n'
+        with self._lock:
+            offset = self._writer.tell()
+            self._writer.write(line)
+            self._writer.flush()
+            self._apply(self._index, record['source'], None if record.get('deleted') else (offset, len(line)))
+            self._records += 1
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        dead = self.dead_records
+        if dead < self.min_dead_records or dead <= self._records * self.compaction_threshold:
+            return
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._compaction = threading.Thread(target=self._compact_in_background, daemon=True)
+        self._compaction.start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except Exception:
+            app_logger.error("Credential vault compaction failed", exc_info=True)
+
+    def _truncate_torn_tail(self):
+        with open(self.path, 'r+b') as file:
+            end = position = file.seek(0, os.SEEK_END)
+            while position > 0:
+                step = min(4096, position)
+                file.seek(position - step)
+                newline = file.read(step).rfind(b'\n')
+                if newline >= 0:
+                    position += newline + 1 - step
+                    break
+                position -= step
+            if position < end:
+                app_logger.warning("Dropping a torn %d byte record at the end of %s", end - position, self.path)
+                file.truncate(position)
+
+    @staticmethod
+    def _apply(index: Index, source: str, location: Location):
+        if location is None:
+            index.pop(source, None)
+        else:
+            index[source] = location
+
+    def _scan(self, file, offset: int) -> Iterator[Tuple[str, Location]]:
+        """Yield ``(source, location)`` for every record from ``offset`` on, with ``None`` for tombstones."""
+        file.seek(offset)
+        for line in file:
+            record = self._decode(line)
+            yield record['source'], None if record.get('deleted') else (offset, len(line))
+            offset += len(line)
+
+    def _decode(self, line: bytes) -> dict:
+        return json.loads(self.cipher.decrypt(line.decode().strip()))
@@ -1,12 +1,46 @@
-
 from abc import ABC, abstractmethod
+import struct
+from typing import TYPE_CHECKING, BinaryIO, Callable, Iterable, Iterator, Optional
+
+# pycryptodome is imported inside the methods that use it, so importing a strategy (or the Cipher that
+# wraps it) does not load the backend until something is actually encrypted.
+if TYPE_CHECKING:
+    from Crypto.PublicKey import RSA
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class StreamContext(ABC):
+    """Incremental encryption/decryption of a single payload, fed one chunk at a time."""
+
+    @abstractmethod
+    def update(self, data: bytes) -> bytes:
+        pass
+
+    @abstractmethod
+    def finalize(self) -> bytes:
+        pass
+
+
+class BufferedStreamContext(StreamContext):
+    """Fallback for strategies that can only work on the whole payload at once."""
+
+    def __init__(self, transform: Callable[[bytes], bytes]):
+        self._transform = transform
+        self._buffer = bytearray()
 
-from Crypto.Cipher import AES, PKCS1_OAEP
-from Crypto.PublicKey import RSA
-from Crypto.Random import get_random_bytes
+    def update(self, data: bytes) -> bytes:
+        self._buffer += data
+        return b''
+
+    def finalize(self) -> bytes:
+        return self._transform(bytes(self._buffer))
 
 
 class EncryptionStrategy(ABC):
+    # True when decrypting with the wrong key or tampered ciphertext raises instead of returning garbage.
+    authenticated = False
+
     @abstractmethod
     def encrypt(self, data: bytes) -> bytes:
         pass
@@ -15,33 +49,311 @@ class EncryptionStrategy(ABC):
     def decrypt(self, data: bytes) -> bytes:
         pass
 
+    def encryptor(self) -> StreamContext:
+        return BufferedStreamContext(self.encrypt)
+
+    def decryptor(self) -> StreamContext:
+        return BufferedStreamContext(self.decrypt)
+
+    def encrypt_many(self, items: Iterable[bytes]) -> Iterator[bytes]:
+        return map(self.encrypt, items)
+
+    def decrypt_many(self, items: Iterable[bytes]) -> Iterator[bytes]:
+        return map(self.decrypt, items)
+
+
+class SeekableEncryptionStrategy(EncryptionStrategy):
+    """A strategy whose ciphertext can be decrypted piecewise, without starting from byte zero."""
+
+    @abstractmethod
+    def read_range(self, reader: BinaryIO, offset: int, length: int) -> bytes:
+        pass
+
+    @abstractmethod
+    def plaintext_size(self, reader: BinaryIO) -> int:
+        pass
+
+
+class MappableEncryptionStrategy(EncryptionStrategy):
+    """A strategy with a fixed-size overhead, so ciphertext can be written straight into a preallocated buffer."""
+
+    @abstractmethod
+    def ciphertext_size(self, plaintext_size: int) -> int:
+        pass
+
+    @abstractmethod
+    def decrypted_size(self, ciphertext_size: int) -> int:
+        pass
+
+    @abstractmethod
+    def encrypt_into(self, source: memoryview, target: memoryview, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        pass
+
+    @abstractmethod
+    def decrypt_into(self, source: memoryview, target: memoryview, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        pass
+
+
+class ParallelEncryptionStrategy(EncryptionStrategy):
+    """A strategy whose ciphertext is made of independent records that can be decrypted concurrently."""
+
+    @abstractmethod
+    def decrypt_file_parallel(self, file_path: str, output_path: str, max_workers: Optional[int] = None) -> int:
+        pass
+
+
+class AESEncryptionStrategy(MappableEncryptionStrategy):
+    IV_BATCH = 1024
 
-class AESEncryptionStrategy(EncryptionStrategy):
     def __init__(self, key: bytes):
+        from Crypto.Random import get_random_bytes
+
         self.key = key
         self.iv = get_random_bytes(16)
 
     def encrypt(self, data: bytes) -> bytes:
+        from Crypto.Cipher import AES
+
         cipher = AES.new(self.key, AES.MODE_CFB, iv=self.iv)
         return self.iv + cipher.encrypt(data)
 
     def decrypt(self, data: bytes) -> bytes:
+        from Crypto.Cipher import AES
+
         iv = data[:16]
         cipher = AES.new(self.key, AES.MODE_CFB, iv=iv)
         return cipher.decrypt(data[16:])
 
+    def encrypt_many(self, items: Iterable[bytes]) -> Iterator[bytes]:
+        from Crypto.Cipher import AES
+        from Crypto.Random import get_random_bytes
+
+        # Each record still gets its own IV; they are just drawn from the RNG a batch at a time.
+        new, mode, key = AES.new, AES.MODE_CFB, self.key
+        ivs, position = b'', 0
+        for data in items:
+            if position == len(ivs):
+                ivs, position = get_random_bytes(16 * self.IV_BATCH), 0
+            iv = ivs[position:position + 16]
+            position += 16
+            yield iv + new(key, mode, iv=iv).encrypt(data)
+
+    def decrypt_many(self, items: Iterable[bytes]) -> Iterator[bytes]:
+        from Crypto.Cipher import AES
+
+        new, mode, key = AES.new, AES.MODE_CFB, self.key
+        for data in items:
+            yield new(key, mode, iv=data[:16]).decrypt(data[16:])
+
+    def ciphertext_size(self, plaintext_size: int) -> int:
+        return plaintext_size + 16
+
+    def decrypted_size(self, ciphertext_size: int) -> int:
+        if ciphertext_size < 16:
+            raise ValueError('Ciphertext is too short to contain an IV')
+        return ciphertext_size - 16
+
+    def encrypt_into(self, source: memoryview, target: memoryview, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        from Crypto.Cipher import AES
+        from Crypto.Random import get_random_bytes
+
+        if len(target) != self.ciphertext_size(len(source)):
+            raise ValueError('Target buffer has the wrong size')
+        iv = get_random_bytes(16)
+        target[:16] = iv
+        cipher = AES.new(self.key, AES.MODE_CFB, iv=iv)
+        for offset in range(0, len(source), chunk_size):
+            end = min(offset + chunk_size, len(source))
+            cipher.encrypt(source[offset:end], output=target[16 + offset:16 + end])
+
+    def decrypt_into(self, source: memoryview, target: memoryview, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        from Crypto.Cipher import AES
+
+        if len(target) != self.decrypted_size(len(source)):
+            raise ValueError('Target buffer has the wrong size')
+        cipher = AES.new(self.key, AES.MODE_CFB, iv=bytes(source[:16]))
+        for offset in range(0, len(target), chunk_size):
+            end = min(offset + chunk_size, len(target))
+            cipher.decrypt(source[16 + offset:16 + end], output=target[offset:end])
+
+    def encryptor(self) -> StreamContext:
+        return _AESStreamEncryptor(self.key)
+
+    def decryptor(self) -> StreamContext:
+        return _AESStreamDecryptor(self.key)
+
+
+class _AESStreamEncryptor(StreamContext):
+    """Produces the same ``iv + ciphertext`` layout as ``AESEncryptionStrategy.encrypt``."""
+
+    def __init__(self, key: bytes):
+        from Crypto.Cipher import AES
+        from Crypto.Random import get_random_bytes
+
+        # Every stream gets its own IV so two files never share a CFB keystream.
+        self._iv = get_random_bytes(16)
+        self._cipher = AES.new(key, AES.MODE_CFB, iv=self._iv)
+        self._header = self._iv
+
+    def update(self, data: bytes) -> bytes:
+        encrypted = self._cipher.encrypt(data)
+        if self._header:
+            encrypted, self._header = self._header + encrypted, b''
+        return encrypted
+
+    def finalize(self) -> bytes:
+        header, self._header = self._header, b''
+        return header
+
+
+class _AESStreamDecryptor(StreamContext):
+    def __init__(self, key: bytes):
+        self._key = key
+        self._cipher = None
+        self._pending = bytearray()
+
+    def update(self, data: bytes) -> bytes:
+        if self._cipher is not None:
+            return self._cipher.decrypt(data)
+
+        self._pending += data
+        if len(self._pending) < 16:
+            return b''
+
+        from Crypto.Cipher import AES
+
+        self._cipher = AES.new(self._key, AES.MODE_CFB, iv=bytes(self._pending[:16]))
+        remainder = bytes(self._pending[16:])
+        self._pending = bytearray()
+        return self._cipher.decrypt(remainder)
+
+    def finalize(self) -> bytes:
+        if self._cipher is None:
+            raise ValueError('Ciphertext is too short to contain an IV')
+        return b''
+
 
 class RSAEncryptionStrategy(EncryptionStrategy):
-    def __init__(self, public_key: RSA.RsaKey, private_key: RSA.RsaKey = None):
+    def __init__(self, public_key: 'RSA.RsaKey', private_key: 'RSA.RsaKey' = None):
         self.public_key = public_key
         self.private_key = private_key
 
     def encrypt(self, data: bytes) -> bytes:
+        from Crypto.Cipher import PKCS1_OAEP
+
         cipher = PKCS1_OAEP.new(self.public_key)
         return cipher.encrypt(data)
 
     def decrypt(self, data: bytes) -> bytes:
+        from Crypto.Cipher import PKCS1_OAEP
+
         if self.private_key is None:
             raise ValueError('Private key is required for decryption')
         cipher = PKCS1_OAEP.new(self.private_key)
         return cipher.decrypt(data)
+
+
+class HybridEncryptionStrategy(EncryptionStrategy):
+    """
+    RSA envelope around an AES-GCM payload, so payload size is not limited by the RSA modulus.
+
+    Layout: ``wrapped_key_length (2) | RSA-OAEP(session_key) | nonce (12) | ciphertext | tag (16)``.
+    Each payload gets a fresh session key; decrypting costs a single RSA operation plus AES.
+    """
+    SESSION_KEY_SIZE = 32
+    NONCE_SIZE = 12
+    TAG_SIZE = 16
+    authenticated = True
+
+    def __init__(self, public_key: 'RSA.RsaKey', private_key: 'RSA.RsaKey' = None):
+        self.public_key = public_key
+        self.private_key = private_key
+
+    def encrypt(self, data: bytes) -> bytes:
+        context = self.encryptor()
+        return context.update(data) + context.finalize()
+
+    def decrypt(self, data: bytes) -> bytes:
+        context = self.decryptor()
+        return context.update(data) + context.finalize()
+
+    def encryptor(self) -> StreamContext:
+        return _HybridStreamEncryptor(self.public_key)
+
+    def decryptor(self) -> StreamContext:
+        if self.private_key is None:
+            raise ValueError('Private key is required for decryption')
+        return _HybridStreamDecryptor(self.private_key)
+
+
+_WRAPPED_KEY_LENGTH = struct.Struct('>H')
+
+
+class _HybridStreamEncryptor(StreamContext):
+    def __init__(self, public_key: 'RSA.RsaKey'):
+        from Crypto.Cipher import AES, PKCS1_OAEP
+        from Crypto.Random import get_random_bytes
+
+        session_key = get_random_bytes(HybridEncryptionStrategy.SESSION_KEY_SIZE)
+        nonce = get_random_bytes(HybridEncryptionStrategy.NONCE_SIZE)
+        wrapped_key = PKCS1_OAEP.new(public_key).encrypt(session_key)
+
+        self._cipher = AES.new(session_key, AES.MODE_GCM, nonce=nonce)
+        self._header = _WRAPPED_KEY_LENGTH.pack(len(wrapped_key)) + wrapped_key + nonce
+
+    def update(self, data: bytes) -> bytes:
+        encrypted = self._cipher.encrypt(data)
+        if self._header:
+            encrypted, self._header = self._header + encrypted, b''
+        return encrypted
+
+    def finalize(self) -> bytes:
+        header, self._header = self._header, b''
+        return header + self._cipher.digest()
+
+
+class _HybridStreamDecryptor(StreamContext):
+    def __init__(self, private_key: 'RSA.RsaKey'):
+        self._private_key = private_key
+        self._cipher = None
+        self._pending = bytearray()
+
+    def update(self, data: bytes) -> bytes:
+        self._pending += data
+        if self._cipher is None and not self._open_envelope():
+            return b''
+
+        # The last TAG_SIZE bytes may be the tag, so they stay buffered until finalize.
+        releasable = len(self._pending) - HybridEncryptionStrategy.TAG_SIZE
+        if releasable <= 0:
+            return b''
+        decrypted = self._cipher.decrypt(bytes(self._pending[:releasable]))
+        del self._pending[:releasable]
+        return decrypted
+
+    def finalize(self) -> bytes:
+        if self._cipher is None or len(self._pending) != HybridEncryptionStrategy.TAG_SIZE:
+            raise ValueError('Ciphertext is truncated')
+        try:
+            self._cipher.verify(bytes(self._pending))
+        except ValueError:
+            raise ValueError('Ciphertext failed authentication') from None
+        return b''
+
+    def _open_envelope(self) -> bool:
+        if len(self._pending) < _WRAPPED_KEY_LENGTH.size:
+            return False
+        (wrapped_length,) = _WRAPPED_KEY_LENGTH.unpack_from(self._pending)
+        header_size = _WRAPPED_KEY_LENGTH.size + wrapped_length + HybridEncryptionStrategy.NONCE_SIZE
+        if len(self._pending) < header_size:
+            return False
+
+        from Crypto.Cipher import AES, PKCS1_OAEP
+
+        wrapped_key = bytes(self._pending[_WRAPPED_KEY_LENGTH.size:header_size - HybridEncryptionStrategy.NONCE_SIZE])
+        nonce = bytes(self._pending[header_size - HybridEncryptionStrategy.NONCE_SIZE:header_size])
+        session_key = PKCS1_OAEP.new(self._private_key).decrypt(wrapped_key)
+
+        self._cipher = AES.new(session_key, AES.MODE_GCM, nonce=nonce)
+        del self._pending[:header_size]
+        return True
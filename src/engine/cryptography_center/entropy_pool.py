@@ -0,0 +1,73 @@
+import string
+import threading
+from typing import Iterator, Optional
+
+DEFAULT_POOL_SIZE = 64 * 1024
+DEFAULT_ALPHABET = string.ascii_letters + string.digits + '+/'
+
+
+class EntropyPool:
+    """Hands out random bytes from one large ``get_random_bytes`` draw, refilling when it runs dry."""
+
+    def __init__(self, buffer_size: int = DEFAULT_POOL_SIZE):
+        self.buffer_size = buffer_size
+        self._buffer = b''
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def read(self, size: int) -> bytes:
+        from Crypto.Random import get_random_bytes
+
+        with self._lock:
+            available = len(self._buffer) - self._position
+            if size > available:
+                self._buffer = self._buffer[self._position:] + get_random_bytes(max(self.buffer_size, size - available))
+                self._position = 0
+            data = self._buffer[self._position:self._position + size]
+            # Bytes that were handed out are never handed out again.
+            self._position += size
+            return data
+
+
+def generate_passwords(
+        count: int,
+        length: int = 16,
+        alphabet: str = DEFAULT_ALPHABET,
+        pool: Optional[EntropyPool] = None,
+) -> Iterator[str]:
+    """
+    Lazily yield ``count`` passwords of ``length`` characters drawn uniformly from ``alphabet``.
+
+    Random bytes that would bias the modulo mapping (those at or above the largest multiple of the
+    alphabet size) are rejected rather than folded back in. ASCII alphabets are mapped a whole pool
+    buffer at a time with ``bytes.translate``. Invalid arguments raise ``ValueError`` right away, not at the
+    first ``next()``.
+    """
+    if len(set(alphabet)) != len(alphabet) or not 2 <= len(alphabet) <= 256:
+        raise ValueError('alphabet must contain between 2 and 256 distinct characters')
+    if length < 1:
+        raise ValueError('length must be positive')
+    return _generate_passwords(count, length, alphabet, pool or EntropyPool())
+
+
+def _generate_passwords(count: int, length: int, alphabet: str, pool: EntropyPool) -> Iterator[str]:
+    size = len(alphabet)
+    limit = 256 - 256 % size
+
+    if alphabet.isascii():
+        table = bytes(ord(alphabet[value % size]) if value < limit else 0 for value in range(256))
+        rejected = bytes(range(limit, 256))
+        characters, position = b'', 0
+        for _ in range(count):
+            while len(characters) - position < length:
+                characters = characters[position:] + pool.read(pool.buffer_size).translate(table, rejected)
+                position = 0
+            yield characters[position:position + length].decode('ascii')
+            position += length
+        return
+
+    for _ in range(count):
+        password = []
+        while len(password) < length:
+            password.extend(alphabet[value % size] for value in pool.read(length) if value < limit)
+        yield ''.join(password[:length])
@@ -0,0 +1,133 @@
+import base64
+import hashlib
+import json
+import mmap
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.application_config.app_logger import app_logger
+
+DEFAULT_HASH_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MMAP_THRESHOLD = 64 * 1024 * 1024
+
+# (size, mtime_ns, inode) - a file whose stat still matches its cached signature is not read again.
+Signature = Tuple[int, int, int]
+
+
+def _signature(stat: os.stat_result) -> Signature:
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+class FileHasher:
+    """
+    SHA-256 file fingerprints, encoded like ``Cipher.create_hash``, with an optional persistent cache.
+
+    Cached digests are keyed by absolute path and only trusted while the file's size, mtime and inode
+    are unchanged, so rehashing a large tree after a small change only reads the files that changed.
+    Files larger than ``mmap_threshold`` are hashed straight from a memory map instead of chunked reads.
+    """
+
+    def __init__(
+            self,
+            cache_path: Optional[str] = None,
+            chunk_size: int = DEFAULT_HASH_CHUNK_SIZE,
+            mmap_threshold: int = DEFAULT_MMAP_THRESHOLD,
+    ):
+        self.cache_path = cache_path
+        self.chunk_size = chunk_size
+        self.mmap_threshold = mmap_threshold
+        self._cache: Dict[str, List] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def hash_file(self, path: str) -> str:
+        path = os.path.abspath(path)
+        signature = _signature(os.stat(path))
+
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached is not None and tuple(cached[:3]) == signature:
+            return cached[3]
+
+        digest = self._digest(path, signature[0])
+
+        # Only cache the digest if the file did not change underneath us while it was being read.
+        if _signature(os.stat(path)) == signature:
+            with self._lock:
+                self._cache[path] = [*signature, digest]
+                self._dirty = True
+        return digest
+
+    def hash_many(self, paths: Iterable[str], max_workers: Optional[int] = None) -> Dict[str, str]:
+        """Hash ``paths`` on a thread pool; hashlib releases the GIL while it digests. Unreadable files are skipped."""
+        def safe_hash(path: str) -> Optional[str]:
+            try:
+                return self.hash_file(path)
+            except OSError:
+                app_logger.debug("Unable to hash %s", path, exc_info=True)
+                return None
+
+        paths = list(paths)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            digests = executor.map(safe_hash, paths)
+            return {path: digest for path, digest in zip(paths, digests) if digest is not None}
+
+    def forget_missing(self):
+        """Drop cache entries for files that no longer exist."""
+        with self._lock:
+            missing = [path for path in self._cache if not os.path.exists(path)]
+            for path in missing:
+                del self._cache[path]
+            self._dirty = self._dirty or bool(missing)
+
+    def load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r') as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            app_logger.error("Failed to load hash cache %s, starting empty", self.cache_path, exc_info=True)
+            return
+        with self._lock:
+            self._cache = cache
+            self._dirty = False
+
+    def save(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._cache)
+            self._dirty = False
+
+        temporary_path = f'{self.cache_path}.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(snapshot, file)
+        os.replace(temporary_path, self.cache_path)
+
+    def __enter__(self) -> 'FileHasher':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.save()
+
+    def _digest(self, path: str, size: int) -> str:
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as file:
+            if size and size >= self.mmap_threshold:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    sha256.update(mapped)
+            else:
+                buffer = bytearray(self.chunk_size)
+                view = memoryview(buffer)
+                while True:
+                    read = file.readinto(buffer)
+                    if not read:
+                        break
+                    sha256.update(view[:read])
+        return base64.b64encode(sha256.digest()).decode()
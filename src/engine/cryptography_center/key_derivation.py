@@ -0,0 +1,210 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from src.engine.cryptography_center.encryption_strategy import AESEncryptionStrategy
+
+PBKDF2 = 'pbkdf2'
+SCRYPT = 'scrypt'
+SALT_SIZE = 16
+# Upper bound for the memory one calibrated scrypt derivation may use; several derived keys may be in flight.
+DEFAULT_SCRYPT_MAX_MEMORY = 128 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class KDFParameters:
+    algorithm: str = SCRYPT
+    iterations: int = 600_000
+    n: int = 2 ** 15
+    r: int = 8
+    p: int = 1
+    key_size: int = 32
+
+    def __post_init__(self):
+        if self.algorithm not in (PBKDF2, SCRYPT):
+            raise ValueError(f'Unsupported KDF algorithm: {self.algorithm}')
+
+    @property
+    def scrypt_memory(self) -> int:
+        """Bytes one scrypt derivation allocates: 128 * r * (n + 2) for V plus 128 * r * p for B."""
+        return 128 * self.r * (self.n + 2 + self.p)
+
+    @property
+    def scrypt_maxmem(self) -> int:
+        # hashlib refuses anything above 32 MiB unless told otherwise.
+        return self.scrypt_memory + 1024 * 1024
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, config_dict: Dict[str, Any]) -> 'KDFParameters':
+        return cls(**config_dict)
+
+
+class DerivedKeyCache:
+    """
+    Bounded LRU of derived keys with a time-to-live.
+
+    Keys are held in ``bytearray`` buffers that are zeroed when they are evicted, expire or are cleared.
+    Expired keys are swept on every access and by a daemon timer armed for the earliest expiry, so no key
+    stays in memory much longer than ``ttl`` even if the cache is never used again.
+    Copies handed out by ``get`` are ordinary ``bytes`` and are outside of the cache's control.
+    """
+
+    def __init__(self, max_entries: int = 16, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: 'OrderedDict[bytes, Tuple[bytearray, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def get(self, cache_key: bytes) -> Optional[bytes]:
+        with self._lock:
+            self._sweep()
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(cache_key)
+            return bytes(entry[0])
+
+    def put(self, cache_key: bytes, key: bytes):
+        with self._lock:
+            self._sweep()
+            if cache_key in self._entries:
+                self._evict(cache_key)
+            self._entries[cache_key] = (bytearray(key), self._clock() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+            self._schedule()
+
+    def clear(self):
+        with self._lock:
+            for cache_key in list(self._entries):
+                self._evict(cache_key)
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sweep()
+            return len(self._entries)
+
+    def _evict(self, cache_key: bytes):
+        key, _ = self._entries.pop(cache_key)
+        key[:] = bytes(len(key))
+
+    def _sweep(self):
+        """Wipe every expired key. Caller holds the lock."""
+        now = self._clock()
+        for cache_key in [cache_key for cache_key, (_, expires) in self._entries.items() if expires <= now]:
+            self._evict(cache_key)
+
+    def _schedule(self):
+        """Arm the sweep timer for the earliest expiry, unless it is armed already. Caller holds the lock."""
+        if self._timer is not None or not self._entries:
+            return
+        delay = min(expires for _, expires in self._entries.values()) - self._clock()
+        self._timer = threading.Timer(max(delay, 0.0), self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._sweep()
+            self._schedule()
+
+
+class KeyDerivation:
+    """Turns passwords into AES keys with PBKDF2-HMAC-SHA256 or scrypt, optionally caching the results."""
+
+    def __init__(self, parameters: Optional[KDFParameters] = None, cache: Optional[DerivedKeyCache] = None):
+        self.parameters = parameters or KDFParameters()
+        self.cache = cache
+        # Cache entries are indexed by an HMAC under a per-process secret, never by the password itself.
+        self._cache_secret = os.urandom(32)
+
+    def derive(self, password: Union[str, bytes], salt: bytes) -> bytes:
+        if isinstance(password, str):
+            password = password.encode()
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = hmac.new(
+                self._cache_secret, salt + b'\0' + repr(self.parameters).encode() + b'\0' + password, hashlib.sha256
+            ).digest()
+            key = self.cache.get(cache_key)
+            if key is not None:
+                return key
+
+        key = derive_key(password, salt, self.parameters)
+        if cache_key is not None:
+            self.cache.put(cache_key, key)
+        return key
+
+    def aes_strategy(self, password: Union[str, bytes], salt: bytes) -> AESEncryptionStrategy:
+        return AESEncryptionStrategy(self.derive(password, salt))
+
+    @staticmethod
+    def generate_salt() -> bytes:
+        return os.urandom(SALT_SIZE)
+
+    @staticmethod
+    def calibrate(
+            target_seconds: float = 0.25,
+            algorithm: str = SCRYPT,
+            key_size: int = 32,
+            max_memory: int = DEFAULT_SCRYPT_MAX_MEMORY,
+    ) -> KDFParameters:
+        """
+        Pick cost parameters so that one derivation takes roughly ``target_seconds`` on this machine. scrypt's
+        ``n`` is also capped so that a derivation needs at most ``max_memory`` bytes.
+        """
+        salt = os.urandom(SALT_SIZE)
+        password = b'calibration password'
+
+        if algorithm == PBKDF2:
+            parameters = KDFParameters(PBKDF2, iterations=10_000, key_size=key_size)
+            for _ in range(2):
+                elapsed = _time_derivation(password, salt, parameters)
+                iterations = max(10_000, int(parameters.iterations * target_seconds / max(elapsed, 1e-6)))
+                parameters = KDFParameters(PBKDF2, iterations=iterations, key_size=key_size)
+            return parameters
+
+        # scrypt's n must be a power of two, so double it until the target or the memory budget is reached.
+        parameters = KDFParameters(SCRYPT, n=2 ** 12, key_size=key_size)
+        while True:
+            doubled = KDFParameters(SCRYPT, n=parameters.n * 2, key_size=key_size)
+            if doubled.n > 2 ** 22 or doubled.scrypt_memory > max_memory:
+                return parameters
+            if _time_derivation(password, salt, parameters) * 2 > target_seconds:
+                return parameters
+            parameters = doubled
+
+
+def derive_key(password: bytes, salt: bytes, parameters: KDFParameters) -> bytes:
+    if parameters.algorithm == PBKDF2:
+        return hashlib.pbkdf2_hmac('sha256', password, salt, parameters.iterations, parameters.key_size)
+    return hashlib.scrypt(
+        password,
+        salt=salt,
+        n=parameters.n,
+        r=parameters.r,
+        p=parameters.p,
+        maxmem=parameters.scrypt_maxmem,
+        dklen=parameters.key_size,
+    )
+
+
+def _time_derivation(password: bytes, salt: bytes, parameters: KDFParameters) -> float:
+    start = time.perf_counter()
+    derive_key(password, salt, parameters)
+    return time.perf_counter() - start
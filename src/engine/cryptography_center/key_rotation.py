@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.application_config.app_logger import app_logger
+from src.engine.cryptography_center.cipher import Cipher
+from src.engine.cryptography_center.encryption_strategy import DEFAULT_CHUNK_SIZE
+
+STAGED = 'staged'
+DONE = 'done'
+TEMPORARY_SUFFIX = '.rotating'
+KEY_CHECK_SIZE = 32
+
+
+class RateLimiter:
+    """Token bucket over bytes; ``acquire`` sleeps just long enough to keep the average under ``rate``."""
+
+    def __init__(
+            self,
+            rate: float,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = rate
+        self._updated = clock()
+
+    def acquire(self, amount: int):
+        now = self._clock()
+        self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate) - amount
+        self._updated = now
+        if self._tokens < 0:
+            self._sleep(-self._tokens / self.rate)
+
+
+@dataclass(frozen=True)
+class KeyCheck:
+    """
+    A known-good sample encrypted under a key, kept next to the key so that the key can be verified later.
+    Unauthenticated strategies decrypt with any key, so this is the only way to tell a wrong one.
+    """
+    ciphertext: bytes
+    plaintext: bytes
+
+    @classmethod
+    def create(cls, cipher: Cipher) -> 'KeyCheck':
+        plaintext = os.urandom(KEY_CHECK_SIZE)
+        return cls(cipher.strategy.encrypt(plaintext), plaintext)
+
+    def matches(self, cipher: Cipher) -> bool:
+        try:
+            return cipher.strategy.decrypt(self.ciphertext) == self.plaintext
+        except ValueError:
+            return False
+
+
+@dataclass
+class RotationReport:
+    rotated: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    failures: Dict[str, str] = field(default_factory=dict)
+    bytes: int = 0
+    seconds: float = 0.0
+    stopped: bool = False
+
+
+class ReencryptionJob:
+    """
+    Re-encrypts files in place from ``old_cipher`` to ``new_cipher``, streaming one chunk at a time.
+
+    Each file is written to ``<file>.rotating``, fsynced and then atomically swapped in. The journal (JSON
+    lines) records a file as ``staged`` before the swap and ``done`` after it, so a job that is rerun after a
+    crash skips finished files, completes a swap that was interrupted and never decrypts an already rotated
+    file with the old key. ``bytes_per_second`` caps the read rate; setting ``stop_event`` pauses the job
+    after the current chunk.
+
+    A wrong old key must never get as far as the swap, or the only good copy is replaced by garbage. An
+    authenticated old strategy fails the file on its own; any other needs ``old_key_check``, which is verified
+    before the first file is touched.
+    """
+
+    def __init__(
+            self,
+            old_cipher: Cipher,
+            new_cipher: Cipher,
+            journal_path: str,
+            bytes_per_second: Optional[float] = None,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            stop_event: Optional[threading.Event] = None,
+            old_key_check: Optional[KeyCheck] = None,
+    ):
+        if old_key_check is None and not old_cipher.strategy.authenticated:
+            raise ValueError(
+                f'{type(old_cipher.strategy).__name__} cannot detect a wrong key; pass old_key_check to verify it'
+            )
+        self.old_cipher = old_cipher
+        self.old_key_check = old_key_check
+        self.new_cipher = new_cipher
+        self.journal_path = journal_path
+        self.chunk_size = chunk_size
+        self.stop_event = stop_event or threading.Event()
+        self._limiter = RateLimiter(bytes_per_second) if bytes_per_second else None
+
+    def journal(self) -> Dict[str, str]:
+        """Latest journal state per path."""
+        states: Dict[str, str] = {}
+        if not os.path.exists(self.journal_path):
+            return states
+        with open(self.journal_path, 'r') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-append; everything before it is intact.
+                    continue
+                states[entry['path']] = entry['status']
+        return states
+
+    def run(self, paths: Iterable[str]) -> RotationReport:
+        report = RotationReport()
+        states = self.journal()
+        start = time.perf_counter()
+        wrong_key = self.old_key_check is not None and not self.old_key_check.matches(self.old_cipher)
+        if wrong_key:
+            app_logger.error("The old key does not match its key check, no file will be rotated")
+
+        for path in paths:
+            path = os.path.abspath(path)
+            if wrong_key and states.get(path) is None:
+                report.failures[path] = 'old key does not match its key check'
+                continue
+            if self.stop_event.is_set():
+                report.stopped = True
+                break
+
+            state = states.get(path)
+            if state == DONE:
+                report.skipped.append(path)
+                continue
+
+            try:
+                if state == STAGED:
+                    self._finish_swap(path)
+                else:
+                    rotated = self._rotate(path)
+                    if rotated is None:
+                        report.stopped = True
+                        break
+                    report.bytes += rotated
+                report.rotated.append(path)
+            except Exception as e:
+                app_logger.debug("Failed to rotate %s", path, exc_info=True)
+                report.failures[path] = str(e)
+
+        report.seconds = time.perf_counter() - start
+        app_logger.info(
+            "Key rotation: %d rotated, %d already done, %d failed%s",
+            len(report.rotated), len(report.skipped), len(report.failures), ' (stopped)' if report.stopped else '',
+        )
+        return report
+
+    def _rotate(self, path: str) -> Optional[int]:
+        temporary_path = path + TEMPORARY_SUFFIX
+        decryptor = self.old_cipher.strategy.decryptor()
+        encryptor = self.new_cipher.strategy.encryptor()
+        buffer = bytearray(self.chunk_size)
+        view = memoryview(buffer)
+        total = 0
+
+        try:
+            with open(path, 'rb') as reader, open(temporary_path, 'wb') as writer:
+                while True:
+                    if self.stop_event.is_set():
+                        raise _Stopped()
+                    read = reader.readinto(buffer)
+                    if not read:
+                        break
+                    if self._limiter is not None:
+                        self._limiter.acquire(read)
+                    total += read
+                    writer.write(encryptor.update(decryptor.update(view[:read])))
+                writer.write(encryptor.update(decryptor.finalize()))
+                writer.write(encryptor.finalize())
+                writer.flush()
+                os.fsync(writer.fileno())
+        except BaseException as e:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            if isinstance(e, _Stopped):
+                return None
+            raise
+
+        self._record(path, STAGED)
+        self._finish_swap(path)
+        return total
+
+    def _finish_swap(self, path: str):
+        temporary_path = path + TEMPORARY_SUFFIX
+        # Without the temporary file the swap already happened before the interruption.
+        if os.path.exists(temporary_path):
+            os.replace(temporary_path, path)
+        self._record(path, DONE)
+
+    def _record(self, path: str, status: str):
+        with open(self.journal_path, 'a') as file:
+            file.write(json.dumps({'path': path, 'status': status}) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+
+class _Stopped(Exception):
+    pass
@@ -0,0 +1,166 @@
+"""
+Merkle-tree integrity manifests for (encrypted) files.
+
+The file is split into fixed-size blocks, each block is hashed into a leaf and leaves are paired up into a
+binary tree. Only the hashes of the stored bytes are involved, so a ciphertext can be checked without its
+key. A manifest is written next to the file as ``<file>.manifest`` and holds the leaves and the root; the
+inner levels are rebuilt on load. Leaves and inner nodes are hashed with different prefixes, and an odd
+node at the end of a level is promoted unchanged rather than paired with itself.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+MANIFEST_SUFFIX = '.manifest'
+
+_LEAF_PREFIX = b'\x00'
+_NODE_PREFIX = b'\x01'
+
+
+def hash_leaf(block: bytes) -> bytes:
+    return hashlib.sha256(_LEAF_PREFIX + block).digest()
+
+
+def hash_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+def build_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [hash_node(level[index], level[index + 1]) for index in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def _read_block(file_path: str, block_size: int, index: int) -> bytes:
+    with open(file_path, 'rb') as file:
+        file.seek(index * block_size)
+        return file.read(block_size)
+
+
+def _block_count(file_size: int, block_size: int) -> int:
+    # An empty file still has one (empty) block so that it has a root.
+    return max(1, -(-file_size // block_size))
+
+
+@dataclass
+class MerkleManifest:
+    block_size: int
+    file_size: int
+    leaves: List[bytes]
+    levels: List[List[bytes]] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.levels = build_levels(self.leaves)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    @classmethod
+    def build(
+            cls,
+            file_path: str,
+            block_size: int = DEFAULT_BLOCK_SIZE,
+            max_workers: Optional[int] = None,
+    ) -> 'MerkleManifest':
+        file_size = os.path.getsize(file_path)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            leaves = list(executor.map(
+                lambda index: hash_leaf(_read_block(file_path, block_size, index)),
+                range(_block_count(file_size, block_size)),
+            ))
+        return cls(block_size, file_size, leaves)
+
+    def verify(self, file_path: str, max_workers: Optional[int] = None) -> List[int]:
+        """Hash every block in parallel and return the indices of blocks that do not match (empty if intact)."""
+        def block_matches(index: int) -> bool:
+            return hash_leaf(_read_block(file_path, self.block_size, index)) == self.leaves[index]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            matches = list(executor.map(block_matches, range(len(self.leaves))))
+
+        corrupt = [index for index, match in enumerate(matches) if not match]
+        if os.path.getsize(file_path) != self.file_size and len(self.leaves) - 1 not in corrupt:
+            corrupt.append(len(self.leaves) - 1)
+        return corrupt
+
+    def verify_range(self, file_path: str, offset: int, length: int, root: Optional[bytes] = None) -> bool:
+        """
+        Check the blocks overlapping ``[offset, offset + length)`` against ``root`` (the manifest's own root
+        by default) using one O(log n) audit path per block.
+        """
+        root = root or self.root
+        if offset < 0 or length < 0 or offset + length > self.file_size:
+            raise ValueError('Range is outside of the file')
+
+        first = offset // self.block_size
+        last = max(first, (offset + length - 1) // self.block_size)
+        with open(file_path, 'rb') as file:
+            for index in range(first, last + 1):
+                file.seek(index * self.block_size)
+                node = hash_leaf(file.read(self.block_size))
+                for sibling, sibling_is_left in self.audit_path(index):
+                    node = hash_node(sibling, node) if sibling_is_left else hash_node(node, sibling)
+                if node != root:
+                    return False
+        return True
+
+    def audit_path(self, index: int) -> List[Tuple[bytes, bool]]:
+        """Sibling hashes from leaf ``index`` up to the root, each flagged with whether it sits on the left."""
+        path = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                path.append((level[sibling], sibling < index))
+            index //= 2
+        return path
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'block_size': self.block_size,
+            'file_size': self.file_size,
+            'root': self.root.hex(),
+            'leaves': [leaf.hex() for leaf in self.leaves],
+        }
+
+    @classmethod
+    def from_dict(cls, config_dict: Dict[str, Any]) -> 'MerkleManifest':
+        manifest = cls(
+            config_dict['block_size'],
+            config_dict['file_size'],
+            [bytes.fromhex(leaf) for leaf in config_dict['leaves']],
+        )
+        if manifest.root.hex() != config_dict['root']:
+            raise ValueError('Manifest leaves do not match its root')
+        return manifest
+
+    def save(self, manifest_path: str):
+        temporary_path = f'{manifest_path}.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(self.as_dict(), file)
+        os.replace(temporary_path, manifest_path)
+
+    @classmethod
+    def load(cls, manifest_path: str) -> 'MerkleManifest':
+        with open(manifest_path, 'r') as file:
+            return cls.from_dict(json.load(file))
+
+
+def write_manifest(file_path: str, block_size: int = DEFAULT_BLOCK_SIZE) -> MerkleManifest:
+    manifest = MerkleManifest.build(file_path, block_size)
+    manifest.save(file_path + MANIFEST_SUFFIX)
+    return manifest
+
+
+def verify_file(file_path: str, max_workers: Optional[int] = None) -> List[int]:
+    """Verify ``file_path`` against its ``.manifest``. Returns the corrupt block indices."""
+    return MerkleManifest.load(file_path + MANIFEST_SUFFIX).verify(file_path, max_workers)
@@ -0,0 +1,105 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from src.application_config.app_logger import app_logger
+from src.engine.cryptography_center.cipher import Cipher
+
+KeyPair = Tuple[bytes, bytes]
+
+
+@dataclass
+class KeyPoolStats:
+    hits: int = 0
+    misses: int = 0
+    ready: int = 0
+    in_flight: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+class RSAKeyPool:
+    """
+    Keeps ``target`` RSA keypairs of each configured size generated ahead of time on worker processes.
+
+    ``get`` pops a ready keypair in O(1) and tops the pool back up in the background. When the pool is
+    empty it blocks until the next in-flight keypair lands, which is never slower than generating one
+    inline. Keypairs are returned as ``(private_pem, public_pem)``, like ``Cipher.generate_rsa_keypair``.
+    """
+
+    def __init__(self, key_sizes: Iterable[int] = (2048,), target: int = 4, max_workers: Optional[int] = None):
+        if target < 1:
+            raise ValueError('target must be at least 1')
+
+        self.target = target
+        self._ready: Dict[int, Deque[KeyPair]] = {size: deque() for size in key_sizes}
+        self._stats: Dict[int, KeyPoolStats] = {size: KeyPoolStats() for size in self._ready}
+        self._condition = threading.Condition()
+        self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        self._closed = False
+
+        for key_size in self._ready:
+            self._refill(key_size)
+
+    def get(self, key_size: int = 2048, timeout: Optional[float] = None) -> KeyPair:
+        if key_size not in self._ready:
+            raise ValueError(f'Key size {key_size} is not pooled')
+
+        ready, stats = self._ready[key_size], self._stats[key_size]
+        with self._condition:
+            if ready:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+                self._refill(key_size)
+                self._condition.wait_for(lambda: ready or not stats.in_flight or self._closed, timeout)
+
+            keypair = ready.popleft() if ready else None
+            self._refill(key_size)
+
+        if keypair is None:
+            app_logger.debug("RSA key pool could not supply a %d-bit key, generating inline", key_size)
+            keypair = Cipher.generate_rsa_keypair(key_size)
+        return keypair
+
+    def stats(self, key_size: int = 2048) -> KeyPoolStats:
+        with self._condition:
+            stats = self._stats[key_size]
+            return KeyPoolStats(stats.hits, stats.misses, len(self._ready[key_size]), stats.in_flight)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> 'RSAKeyPool':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _refill(self, key_size: int):
+        with self._condition:
+            if self._closed:
+                return
+            stats = self._stats[key_size]
+            for _ in range(self.target - len(self._ready[key_size]) - stats.in_flight):
+                stats.in_flight += 1
+                future = self._executor.submit(Cipher.generate_rsa_keypair, key_size)
+                future.add_done_callback(partial(self._on_generated, key_size))
+
+    def _on_generated(self, key_size: int, future: Future):
+        with self._condition:
+            self._stats[key_size].in_flight -= 1
+            if not future.cancelled() and future.exception() is None:
+                self._ready[key_size].append(future.result())
+            elif not future.cancelled():
+                app_logger.error("RSA keypair generation failed: %s", future.exception())
+            self._condition.notify_all()
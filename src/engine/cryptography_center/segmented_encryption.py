@@ -0,0 +1,255 @@
+"""
+Segmented AES-GCM container.
+
+Layout::
+
+    header   = MAGIC (4) | version (1) | segment_size (4, big-endian)
+    segment  = nonce (12) | ciphertext (<= segment_size) | tag (16)
+
+Every segment except the last holds exactly ``segment_size`` plaintext bytes, so the header alone is
+the index: segment ``i`` starts at ``HEADER_SIZE + i * (segment_size + SEGMENT_OVERHEAD)``. Each
+segment is authenticated together with the header, its own index and a final-segment flag, which
+stops segments from being swapped, reordered or silently truncated away.
+"""
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Optional, Tuple
+
+from src.engine.cryptography_center.encryption_strategy import (
+    ParallelEncryptionStrategy,
+    SeekableEncryptionStrategy,
+    StreamContext,
+)
+
+MAGIC = b'STSG'
+VERSION = 1
+DEFAULT_SEGMENT_SIZE = 64 * 1024
+# Plaintext handled by one thread pool job, so per-job overhead stays small next to the AES work.
+PARALLEL_RUN_SIZE = 4 * 1024 * 1024
+
+NONCE_SIZE = 12
+TAG_SIZE = 16
+SEGMENT_OVERHEAD = NONCE_SIZE + TAG_SIZE
+
+_HEADER = struct.Struct('>4sBI')
+_SEGMENT_AAD = struct.Struct('>QB')
+HEADER_SIZE = _HEADER.size
+
+
+class SegmentedAESEncryptionStrategy(SeekableEncryptionStrategy, ParallelEncryptionStrategy):
+    authenticated = True
+
+    def __init__(self, key: bytes, segment_size: int = DEFAULT_SEGMENT_SIZE):
+        if segment_size <= 0:
+            raise ValueError('segment_size must be a positive integer')
+        self.key = key
+        self.segment_size = segment_size
+
+    def encrypt(self, data: bytes) -> bytes:
+        context = self.encryptor()
+        return context.update(data) + context.finalize()
+
+    def decrypt(self, data: bytes) -> bytes:
+        context = self.decryptor()
+        return context.update(data) + context.finalize()
+
+    def encryptor(self) -> StreamContext:
+        return _SegmentEncryptor(self.key, self.segment_size)
+
+    def decryptor(self) -> StreamContext:
+        return _SegmentDecryptor(self.key)
+
+    def plaintext_size(self, reader: BinaryIO) -> int:
+        segment_size, segment_count, last_length = self._layout(reader)
+        return (segment_count - 1) * segment_size + last_length
+
+    def read_range(self, reader: BinaryIO, offset: int, length: int) -> bytes:
+        """Decrypt ``length`` plaintext bytes starting at ``offset``, touching only the segments involved."""
+        if offset < 0 or length < 0:
+            raise ValueError('offset and length must not be negative')
+
+        segment_size, segment_count, last_length = self._layout(reader)
+        total = (segment_count - 1) * segment_size + last_length
+        end = min(offset + length, total)
+        if offset >= end:
+            return b''
+
+        header = _HEADER.pack(MAGIC, VERSION, segment_size)
+        first, last = offset // segment_size, (end - 1) // segment_size
+
+        plaintext = bytearray()
+        for index in range(first, last + 1):
+            final = index == segment_count - 1
+            record_length = (last_length if final else segment_size) + SEGMENT_OVERHEAD
+            reader.seek(segment_offset(segment_size, index))
+            record = reader.read(record_length)
+            plaintext += open_segment(self.key, header, index, final, record)
+
+        start = offset - first * segment_size
+        return bytes(plaintext[start:start + end - offset])
+
+    def decrypt_file_parallel(self, file_path: str, output_path: str, max_workers: Optional[int] = None) -> int:
+        """
+        Decrypt a container on a thread pool and return the plaintext size.
+
+        Each job reads a run of segments, authenticates them and writes the plaintext at its final offset in
+        the preallocated output, so jobs never wait on each other. pycryptodome releases the GIL inside AES,
+        which lets the jobs use every core. If any segment fails, the partial output is removed.
+        """
+        with open(file_path, 'rb') as reader:
+            segment_size, segment_count, last_length = self._layout(reader)
+        header = _HEADER.pack(MAGIC, VERSION, segment_size)
+        record_size = segment_size + SEGMENT_OVERHEAD
+        run_length = max(1, PARALLEL_RUN_SIZE // segment_size)
+
+        def decrypt_run(first: int) -> int:
+            last = min(first + run_length, segment_count)
+            with open(file_path, 'rb') as reader:
+                reader.seek(segment_offset(segment_size, first))
+                records = memoryview(reader.read((last - first) * record_size))
+
+            plaintexts = [
+                open_segment(self.key, header, index, index == segment_count - 1,
+                             records[(index - first) * record_size:(index - first + 1) * record_size])
+                for index in range(first, last)
+            ]
+            with open(output_path, 'r+b') as writer:
+                writer.seek(first * segment_size)
+                writer.writelines(plaintexts)
+            return sum(map(len, plaintexts))
+
+        with open(output_path, 'wb') as writer:
+            writer.truncate((segment_count - 1) * segment_size + last_length)
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return sum(executor.map(decrypt_run, range(0, segment_count, run_length)))
+        except BaseException:
+            os.remove(output_path)
+            raise
+
+    @staticmethod
+    def _layout(reader: BinaryIO) -> Tuple[int, int, int]:
+        """Return ``(segment_size, segment_count, last_segment_plaintext_length)`` for a container."""
+        reader.seek(0)
+        segment_size = parse_header(reader.read(HEADER_SIZE))
+        body = reader.seek(0, 2) - HEADER_SIZE
+        record_size = segment_size + SEGMENT_OVERHEAD
+
+        segment_count = max(1, -(-body // record_size))
+        last_record = body - (segment_count - 1) * record_size
+        if last_record < SEGMENT_OVERHEAD:
+            raise ValueError('Container is truncated')
+        return segment_size, segment_count, last_record - SEGMENT_OVERHEAD
+
+
+def parse_header(header: bytes) -> int:
+    if len(header) < HEADER_SIZE:
+        raise ValueError('Container is too short to hold a header')
+    magic, version, segment_size = _HEADER.unpack(header[:HEADER_SIZE])
+    if magic != MAGIC:
+        raise ValueError('Not a segmented container')
+    if version != VERSION:
+        raise ValueError(f'Unsupported container version: {version}')
+    if segment_size <= 0:
+        raise ValueError('Container has an invalid segment size')
+    return segment_size
+
+
+def segment_offset(segment_size: int, index: int) -> int:
+    return HEADER_SIZE + index * (segment_size + SEGMENT_OVERHEAD)
+
+
+def seal_segment(key: bytes, header: bytes, index: int, final: bool, plaintext: bytes) -> bytes:
+    from Crypto.Cipher import AES
+    from Crypto.Random import get_random_bytes
+
+    nonce = get_random_bytes(NONCE_SIZE)
+    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
+    cipher.update(header + _SEGMENT_AAD.pack(index, final))
+    ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+    return nonce + ciphertext + tag
+
+
+def open_segment(key: bytes, header: bytes, index: int, final: bool, record: bytes) -> bytes:
+    from Crypto.Cipher import AES
+
+    if len(record) < SEGMENT_OVERHEAD:
+        raise ValueError(f'Segment {index} is truncated')
+    cipher = AES.new(key, AES.MODE_GCM, nonce=record[:NONCE_SIZE])
+    cipher.update(header + _SEGMENT_AAD.pack(index, final))
+    try:
+        return cipher.decrypt_and_verify(record[NONCE_SIZE:-TAG_SIZE], record[-TAG_SIZE:])
+    except ValueError:
+        raise ValueError(f'Segment {index} failed authentication') from None
+
+
+class _SegmentEncryptor(StreamContext):
+    def __init__(self, key: bytes, segment_size: int):
+        self._key = key
+        self._segment_size = segment_size
+        self._header = _HEADER.pack(MAGIC, VERSION, segment_size)
+        self._pending = bytearray()
+        self._index = 0
+        self._header_written = False
+
+    def update(self, data: bytes) -> bytes:
+        self._pending += data
+        output = bytearray(self._take_header())
+        # Hold back the last full segment until more data arrives: only finalize knows which one is final.
+        while len(self._pending) > self._segment_size:
+            output += self._seal(bytes(self._pending[:self._segment_size]), final=False)
+            del self._pending[:self._segment_size]
+        return bytes(output)
+
+    def finalize(self) -> bytes:
+        output = self._take_header() + self._seal(bytes(self._pending), final=True)
+        self._pending = bytearray()
+        return output
+
+    def _take_header(self) -> bytes:
+        if self._header_written:
+            return b''
+        self._header_written = True
+        return self._header
+
+    def _seal(self, plaintext: bytes, final: bool) -> bytes:
+        record = seal_segment(self._key, self._header, self._index, final, plaintext)
+        self._index += 1
+        return record
+
+
+class _SegmentDecryptor(StreamContext):
+    def __init__(self, key: bytes):
+        self._key = key
+        self._header = None
+        self._record_size = 0
+        self._pending = bytearray()
+        self._index = 0
+
+    def update(self, data: bytes) -> bytes:
+        self._pending += data
+        if self._header is None:
+            if len(self._pending) < HEADER_SIZE:
+                return b''
+            self._record_size = parse_header(self._pending) + SEGMENT_OVERHEAD
+            self._header = bytes(self._pending[:HEADER_SIZE])
+            del self._pending[:HEADER_SIZE]
+
+        output = bytearray()
+        while len(self._pending) > self._record_size:
+            output += self._open(bytes(self._pending[:self._record_size]), final=False)
+            del self._pending[:self._record_size]
+        return bytes(output)
+
+    def finalize(self) -> bytes:
+        if self._header is None:
+            raise ValueError('Container is too short to hold a header')
+        plaintext = self._open(bytes(self._pending), final=True)
+        self._pending = bytearray()
+        return plaintext
+
+    def _open(self, record: bytes, final: bool) -> bytes:
+        plaintext = open_segment(self._key, self._header, self._index, final, record)
+        self._index += 1
+        return plaintext
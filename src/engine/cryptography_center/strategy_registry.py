@@ -0,0 +1,54 @@
+"""
+Encryption strategies by name.
+
+Strategies are registered as ``'module:ClassName'`` paths and only imported the first time they are
+resolved, so listing or configuring them costs nothing; the strategies themselves load pycryptodome
+when they first encrypt or decrypt.
+"""
+import importlib
+import threading
+from typing import Dict, List, Type, Union
+
+from src.engine.cryptography_center.encryption_strategy import EncryptionStrategy
+
+_PACKAGE = 'src.engine.cryptography_center'
+
+_registry: Dict[str, Union[str, Type[EncryptionStrategy]]] = {
+    'aes': f'{_PACKAGE}.encryption_strategy:AESEncryptionStrategy',
+    'rsa': f'{_PACKAGE}.encryption_strategy:RSAEncryptionStrategy',
+    'hybrid': f'{_PACKAGE}.encryption_strategy:HybridEncryptionStrategy',
+    'segmented-aes': f'{_PACKAGE}.segmented_encryption:SegmentedAESEncryptionStrategy',
+    'compressed': f'{_PACKAGE}.compressed_encryption:CompressedEncryptionStrategy',
+}
+_lock = threading.Lock()
+
+
+def register_strategy(name: str, strategy: Union[str, Type[EncryptionStrategy]]):
+    """Register a strategy class, or a ``'module:ClassName'`` path to import on first use."""
+    if isinstance(strategy, str) and ':' not in strategy:
+        raise ValueError(f"Strategy path must look like 'module:ClassName', got {strategy!r}")
+    with _lock:
+        _registry[name] = strategy
+
+
+def resolve_strategy(name: str) -> Type[EncryptionStrategy]:
+    with _lock:
+        if name not in _registry:
+            raise ValueError(f'Unknown strategy: {name}')
+        strategy = _registry[name]
+        if isinstance(strategy, str):
+            module_name, class_name = strategy.split(':', 1)
+            strategy = getattr(importlib.import_module(module_name), class_name)
+            if not (isinstance(strategy, type) and issubclass(strategy, EncryptionStrategy)):
+                raise TypeError(f'{name} does not resolve to an EncryptionStrategy')
+            _registry[name] = strategy
+        return strategy
+
+
+def create_strategy(name: str, *args, **kwargs) -> EncryptionStrategy:
+    return resolve_strategy(name)(*args, **kwargs)
+
+
+def available_strategies() -> List[str]:
+    with _lock:
+        return sorted(_registry)
@@ -0,0 +1,95 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.application_config.app_logger import app_logger
+
+
+@dataclass
+class TreeReport:
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    failures: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes / (1024 * 1024) / self.seconds if self.seconds else 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.failures
+
+
+def scan_tree(root: str) -> Iterator[Tuple[str, int]]:
+    """Yield ``(path, size)`` for every regular file below ``root``. Symlinks are not followed."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path, entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            app_logger.debug("Unable to scan %s", directory, exc_info=True)
+
+
+def _transform_file(operation: Callable[[str, str], int], source: str, target: str) -> int:
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    operation(source, target)
+    return os.path.getsize(source)
+
+
+def process_tree(
+        operation: Callable[[str, str], int],
+        source_dir: str,
+        output_dir: str,
+        rename: Callable[[str], Optional[str]],
+        max_workers: Optional[int] = None,
+        use_processes: bool = False,
+) -> TreeReport:
+    """
+    Apply ``operation(source, target)`` to every file below ``source_dir``, mirroring the tree into ``output_dir``.
+
+    Files are submitted largest first so a few huge files do not end up queued behind thousands of small
+    ones and leave the other workers idle at the end of the run. ``rename`` maps a file name to its output
+    name, or to ``None`` to skip the file.
+
+    Threads are the default: pycryptodome releases the GIL while it runs AES, so a thread pool already
+    uses every core without pickling the strategy. ``use_processes`` is there for strategies that do not.
+    """
+    jobs: List[Tuple[int, str, str]] = []
+    for path, size in scan_tree(source_dir):
+        new_name = rename(os.path.basename(path))
+        if new_name is None:
+            continue
+        relative_dir = os.path.relpath(os.path.dirname(path), source_dir)
+        jobs.append((size, path, os.path.normpath(os.path.join(output_dir, relative_dir, new_name))))
+    jobs.sort(reverse=True)
+
+    report = TreeReport()
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    start = time.perf_counter()
+
+    with executor_class(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = {executor.submit(_transform_file, operation, path, target): path for _, path, target in jobs}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                report.bytes += future.result()
+                report.files += 1
+            except Exception as e:
+                app_logger.debug("Failed to process %s", path, exc_info=True)
+                report.failures[path] = str(e)
+
+    report.seconds = time.perf_counter() - start
+    app_logger.info(
+        "Processed %d files (%.1f MB/s), %d failures",
+        report.files, report.mb_per_s, len(report.failures),
+    )
+    return report
@@ -0,0 +1,115 @@
+"""
+Cleans every policed directory in one go.
+
+``clean_all`` empties each entry of ``FileCenterSettings.directories_to_police`` with its own
+``DeletionJob``, all of them at once, except that directories on the same device (``st_dev``) take turns
+through a per-device semaphore: parallel deletions on one disk mostly fight over its queue, while separate
+disks proceed independently. Directories nested inside another policed directory are left to the outer
+one rather than deleted twice concurrently, and graveyards are left to the purger that may be emptying them.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from src.application_config.app_logger import app_logger
+from src.engine.file_center.deletion_engine import DEFAULT_MAX_WORKERS, DeletionJob, DeletionReport
+from src.engine.file_center.file_center_settings import FileCenterSettings
+from src.engine.file_center.graveyard import GRAVEYARD_NAME
+
+DEFAULT_PER_DEVICE = 1
+
+
+@dataclass
+class BatchCleanReport:
+    reports: Dict[str, DeletionReport] = field(default_factory=dict)
+    # Directories that could not be cleaned, with the reason.
+    skipped: Dict[str, str] = field(default_factory=dict)
+    # Directories cleaned as part of the policed directory they are in.
+    nested: Dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def bytes(self) -> int:
+        return sum(report.bytes for report in self.reports.values())
+
+    @property
+    def failures(self) -> int:
+        return sum(len(report.failures) for report in self.reports.values())
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.skipped and all(report.succeeded for report in self.reports.values())
+
+    def summary(self) -> str:
+        lines = [f'Cleaned {len(self.reports)} directories, freed {self.bytes / (1024 * 1024):,.1f} MB '
+                 f'in {self.seconds:.1f} s.']
+        for directory, report in self.reports.items():
+            status = 'cancelled' if report.cancelled else f'{len(report.failures):,} errors'
+            lines.append(f'  {directory}: {report.bytes / (1024 * 1024):,.1f} MB in {report.seconds:.1f} s, {status}')
+        lines.extend(f'  {directory}: skipped, {reason}' for directory, reason in self.skipped.items())
+        lines.extend(f'  {directory}: cleaned with {outer}' for directory, outer in self.nested.items())
+        return '\n'.join(lines)
+
+
+def clean_all(
+        settings: FileCenterSettings,
+        per_device: int = DEFAULT_PER_DEVICE,
+        max_workers_per_job: int = DEFAULT_MAX_WORKERS,
+        stop_event: Optional[threading.Event] = None,
+) -> BatchCleanReport:
+    """
+    Delete the contents of every policed directory, at most ``per_device`` directories per device at a time.
+    Setting ``stop_event`` cancels all of them.
+    """
+    stop_event = stop_event or threading.Event()
+    report = BatchCleanReport()
+    start = time.perf_counter()
+
+    devices: Dict[str, int] = {}
+    for directory in _distinct(settings.directories_to_police.values(), report):
+        try:
+            devices[directory] = os.stat(directory).st_dev
+        except OSError as e:
+            report.skipped[directory] = e.strerror or str(e)
+    semaphores = {device: threading.Semaphore(per_device) for device in set(devices.values())}
+
+    def clean(directory: str) -> DeletionReport:
+        with semaphores[devices[directory]]:
+            if stop_event.is_set():
+                return DeletionReport(directory, cancelled=True)
+            job = DeletionJob(directory, max_workers=max_workers_per_job, stop_event=stop_event, keep=[GRAVEYARD_NAME])
+            return job.run()
+
+    if devices:
+        with ThreadPoolExecutor(max_workers=len(devices)) as executor:
+            futures = {directory: executor.submit(clean, directory) for directory in devices}
+            for directory, future in futures.items():
+                report.reports[directory] = future.result()
+
+    report.seconds = time.perf_counter() - start
+    app_logger.info("Cleaned %d policed directories on %d devices in %.1f s: %d bytes freed, %d failures, %d skipped",
+                    len(report.reports), len(semaphores), report.seconds, report.bytes, report.failures,
+                    len(report.skipped))
+    return report
+
+
+def _distinct(directories: Iterable[str], report: BatchCleanReport) -> List[str]:
+    """
+    The configured directories without blanks, duplicates and directories inside another one. Symlinks are
+    resolved first, so a link to a policed directory (or into one) is not cleaned a second time.
+    """
+    candidates = sorted({os.path.realpath(directory) for directory in directories if directory})
+    selected: List[str] = []
+    for directory in candidates:
+        if not os.path.isdir(directory):
+            report.skipped[directory] = 'not a directory'
+            continue
+        outer = next((parent for parent in selected if directory.startswith(os.path.join(parent, ''))), None)
+        if outer is not None:
+            report.nested[directory] = outer
+            continue
+        selected.append(directory)
+    return selected
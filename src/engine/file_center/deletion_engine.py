@@ -0,0 +1,232 @@
+"""
+Background deletion of a directory's contents.
+
+Every directory becomes one job on a bounded thread pool: the job scans it with ``os.scandir``, unlinks its
+files and queues a job per subdirectory, so a single deep tree is spread over all workers. Once every job has
+finished, the emptied directories are removed deepest first. Progress snapshots go to a ``queue.Queue`` that
+a GUI can poll, and setting the stop event makes every job return after the entry it is working on.
+"""
+import os
+import queue
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.application_config.app_logger import app_logger
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PROGRESS_INTERVAL = 0.1
+# winnt.h; the stat module only defines it on Windows.
+_IO_REPARSE_TAG_MOUNT_POINT = 0xA0000003
+
+
+@dataclass
+class DeletionProgress:
+    files: int = 0
+    directories: int = 0
+    bytes: int = 0
+    errors: int = 0
+    done: bool = False
+
+
+@dataclass
+class DeletionReport:
+    directory: str
+    files: int = 0
+    directories: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    failures: Dict[str, str] = field(default_factory=dict)
+    cancelled: bool = False
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.failures and not self.cancelled
+
+    def summary(self, max_failures: int = 10) -> str:
+        """Human readable outcome, listing at most ``max_failures`` of the paths that could not be deleted."""
+        lines = [f'Deleted {self.files:,} files and {self.directories:,} directories '
+                 f'({self.bytes / (1024 * 1024):,.1f} MB) in {self.seconds:.1f} s.']
+        if self.cancelled:
+            lines.append('The deletion was cancelled before it finished.')
+        if self.failures:
+            lines.append(f'{len(self.failures):,} items could not be deleted:')
+            lines.extend(f'  {path}: {error}' for path, error in list(self.failures.items())[:max_failures])
+            if len(self.failures) > max_failures:
+                lines.append(f'  ... and {len(self.failures) - max_failures:,} more (see the log).')
+        return '\n'.join(lines)
+
+
+def _is_link(entry_stat: os.stat_result) -> bool:
+    """
+    Symlinks and Windows junctions. ``DirEntry.is_dir(follow_symlinks=False)`` is True for a junction, so it
+    has to be told apart by its reparse tag, as ``shutil.rmtree`` does; emptying it would delete its target.
+    """
+    if stat.S_ISLNK(entry_stat.st_mode):
+        return True
+    attributes = getattr(entry_stat, 'st_file_attributes', 0)
+    return bool(attributes & stat.FILE_ATTRIBUTE_REPARSE_POINT
+                and getattr(entry_stat, 'st_reparse_tag', None) == _IO_REPARSE_TAG_MOUNT_POINT)
+
+
+class DeletionJob:
+    def __init__(
+            self,
+            directory: str,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+            stop_event: Optional[threading.Event] = None,
+            keep: Iterable[str] = (),
+    ):
+        self.directory = os.path.abspath(directory)
+        self.max_workers = max_workers
+        # Names of entries directly in ``directory`` that are left alone.
+        self.keep = frozenset(keep)
+        self.progress_interval = progress_interval
+        self.stop_event = stop_event or threading.Event()
+        self.progress: 'queue.Queue[DeletionProgress]' = queue.Queue()
+        self.report: Optional[DeletionReport] = None
+
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._counts = DeletionProgress()
+        self._failures: Dict[str, str] = {}
+        self._emptied: List[str] = []
+        # Directories that still hold something that could not be deleted; removing them would only fail again.
+        self._kept: Set[str] = set()
+        self._last_progress = 0.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'DeletionJob':
+        """Run the job on a daemon thread; poll ``progress`` and call ``join`` (or check ``report``) for the result."""
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.stop_event.set()
+
+    def join(self, timeout: Optional[float] = None) -> Optional[DeletionReport]:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.report
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self) -> DeletionReport:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._executor = executor
+            self._submit(self.directory)
+            with self._idle:
+                while self._pending:
+                    self._idle.wait()
+
+        # Children sort after their parents, so reverse order removes the deepest directories first.
+        for path in sorted(self._emptied, reverse=True):
+            if self.stop_event.is_set():
+                break
+            if path in self._kept:
+                continue
+            local = DeletionProgress()
+            if self._remove(path, os.rmdir, local):
+                local.directories += 1
+            self._merge(local)
+
+        counts = self._counts
+        self.report = DeletionReport(
+            self.directory, counts.files, counts.directories, counts.bytes, time.perf_counter() - start,
+            dict(self._failures), self.stop_event.is_set(),
+        )
+        self.progress.put(replace(counts, done=True))
+        app_logger.info(
+            "Deleted contents of %s: %d files, %d directories, %d failures%s",
+            self.directory, counts.files, counts.directories, len(self._failures),
+            ' (cancelled)' if self.report.cancelled else '',
+        )
+        return self.report
+
+    def _submit(self, path: str):
+        with self._lock:
+            self._pending += 1
+        self._executor.submit(self._clear_directory, path)
+
+    def _clear_directory(self, path: str):
+        local = DeletionProgress()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if self.stop_event.is_set():
+                        break
+                    if entry.name in self.keep and path == self.directory:
+                        continue
+                    try:
+                        entry_stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        entry_stat = None
+                    link = entry_stat is not None and _is_link(entry_stat)
+                    if not link and entry.is_dir(follow_symlinks=False):
+                        with self._lock:
+                            self._emptied.append(entry.path)
+                        self._submit(entry.path)
+                        continue
+                    size = entry_stat.st_size if entry_stat is not None else 0
+                    # Windows removes links to directories (junctions included) like directories, never emptying them.
+                    remove = os.rmdir if link and os.name == 'nt' and entry.is_dir() else os.remove
+                    if self._remove(entry.path, remove, local):
+                        local.files += 1
+                        local.bytes += size
+        except OSError as e:
+            # Subdirectories may be removed by someone else in the meantime, e.g. a graveyard purge.
+            if path == self.directory or not isinstance(e, FileNotFoundError):
+                self._fail(path, e, local)
+        finally:
+            self._merge(local)
+            with self._idle:
+                self._pending -= 1
+                if not self._pending:
+                    self._idle.notify_all()
+
+    def _remove(self, path: str, remove, local: DeletionProgress) -> bool:
+        try:
+            try:
+                remove(path)
+            except PermissionError:
+                # Read-only entries (common on Windows) can be deleted once they are made writable.
+                os.chmod(path, stat.S_IWRITE | stat.S_IREAD)
+                remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            self._fail(path, e, local)
+            return False
+
+    def _fail(self, path: str, error: OSError, local: DeletionProgress):
+        app_logger.debug("Failed to delete: %s", path, exc_info=True)
+        local.errors += 1
+        with self._lock:
+            self._failures[path] = error.strerror or str(error)
+            parent = path
+            while parent != self.directory and parent.startswith(self.directory) and parent not in self._kept:
+                self._kept.add(parent)
+                parent = os.path.dirname(parent)
+
+    def _merge(self, local: DeletionProgress):
+        with self._lock:
+            counts = self._counts
+            counts.files += local.files
+            counts.directories += local.directories
+            counts.bytes += local.bytes
+            counts.errors += local.errors
+
+            now = time.monotonic()
+            if now - self._last_progress >= self.progress_interval:
+                self._last_progress = now
+                self.progress.put(replace(counts))
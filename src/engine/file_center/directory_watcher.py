@@ -0,0 +1,523 @@
+"""
+Watches policed directories and triggers their cleanup once one grows past a threshold.
+
+On Linux the watcher puts an inotify watch (through ctypes) on every directory of a watched tree; elsewhere,
+or when inotify is unavailable or runs out of watches, it polls directory mtimes instead. Events only mark
+the directory they happened in as dirty. They are coalesced: the watcher waits until the tree has been
+quiet for ``settle`` seconds (but no longer than ``max_delay`` after the first event), then re-reads each
+dirty directory once and applies the difference to the running totals of its tree. A burst of 100k writes
+therefore costs one evaluation, and nothing is ever rescanned from the top.
+
+Totals are kept per directory (the files directly inside it and their bytes), so memory grows with the
+number of directories, not files. The polling fallback only notices entries being created, deleted or
+renamed; files growing in place are picked up when their directory next changes.
+"""
+import ctypes
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.application_config.app_logger import app_logger
+from src.engine.file_center.graveyard import GRAVEYARD_NAME
+
+DEFAULT_SETTLE = 1.0
+DEFAULT_MAX_DELAY = 10.0
+DEFAULT_POLL_INTERVAL = 5.0
+DEFAULT_COOLDOWN = 60.0
+# Longest the watcher thread blocks before it checks for new trees or a stop.
+WAKE_INTERVAL = 0.5
+RACY_WINDOW_NS = 2_000_000_000
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+               | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+# struct inotify_event: wd, mask, cookie, len, then len bytes of name.
+_EVENT = struct.Struct('iIII')
+_READ_SIZE = 64 * 1024
+
+
+@dataclass
+class WatchThreshold:
+    max_bytes: Optional[int] = None
+    max_files: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, config_dict: Dict[str, Any]) -> 'WatchThreshold':
+        field_names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in config_dict.items() if k in field_names})
+
+    def validate(self) -> bool:
+        for name in ('max_bytes', 'max_files'):
+            value = getattr(self, name)
+            if value is not None and (not isinstance(value, int) or value < 0):
+                app_logger.error("Invalid watch threshold %s: %s", name, value)
+                return False
+        return True
+
+    def exceeded(self, totals: 'WatchTotals') -> bool:
+        return ((self.max_bytes is not None and totals.bytes > self.max_bytes)
+                or (self.max_files is not None and totals.files > self.max_files))
+
+
+@dataclass
+class WatchTotals:
+    directory: str
+    files: int = 0
+    directories: int = 0
+    bytes: int = 0
+
+
+ThresholdCallback = Callable[[WatchTotals], Any]
+
+
+class _Tree:
+    def __init__(self, directory: str, threshold: WatchThreshold, on_exceeded: ThresholdCallback):
+        self.directory = directory
+        self.threshold = threshold
+        self.on_exceeded = on_exceeded
+        # Kept up to date by the watcher thread alone; ``totals`` is the copy other threads get to see.
+        self.counted = WatchTotals(directory)
+        self.totals = WatchTotals(directory)
+        self.scanned = False
+        self.last_triggered: Optional[float] = None
+
+
+class _Node:
+    __slots__ = ('tree', 'files', 'bytes', 'subdirectories')
+
+    def __init__(self, tree: _Tree, files: int, size: int, subdirectories: Set[str]):
+        self.tree = tree
+        self.files = files
+        self.bytes = size
+        self.subdirectories = subdirectories
+
+
+class _InotifyBackend:
+    """One inotify watch per directory, all read from a single non-blocking descriptor."""
+
+    name = 'inotify'
+
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._libc.inotify_rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        self._paths: Dict[int, str] = {}
+        self._descriptors: Dict[str, int] = {}
+
+    def add(self, path: str):
+        descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if descriptor < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), path)
+        previous = self._paths.get(descriptor)
+        if previous is not None and previous != path:
+            # A watched directory was moved here and the kernel handed back its watch; the old path no longer
+            # owns it, so dropping that path later must not remove it.
+            self._descriptors.pop(previous, None)
+        self._paths[descriptor] = path
+        self._descriptors[path] = descriptor
+
+    def remove(self, path: str):
+        descriptor = self._descriptors.pop(path, None)
+        if descriptor is not None and self._paths.get(descriptor) == path:
+            del self._paths[descriptor]
+            # Fails harmlessly when the kernel already dropped the watch along with the directory.
+            self._libc.inotify_rm_watch(self._fd, descriptor)
+
+    def wait(self, timeout: float) -> Set[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        dirty: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                descriptor, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    # Events were lost; every directory has to be read again.
+                    app_logger.warning("inotify queue overflowed, re-reading all watched directories")
+                    dirty.update(self._descriptors)
+                elif mask & IN_IGNORED:
+                    path = self._paths.pop(descriptor, None)
+                    if path is not None and self._descriptors.get(path) == descriptor:
+                        del self._descriptors[path]
+                else:
+                    path = self._paths.get(descriptor)
+                    if path is not None:
+                        dirty.add(path)
+        return dirty
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _PollingBackend:
+    """
+    Compares directory mtimes every ``interval`` seconds. A directory modified within ``RACY_WINDOW_NS`` of
+    being looked at may change again within the same mtime tick, so it is reported once more after that.
+    """
+
+    name = 'polling'
+
+    def __init__(self, interval: float, stop_event: threading.Event):
+        self.interval = interval
+        self.stop_event = stop_event
+        self._mtimes: Dict[str, int] = {}
+        self._racy: Set[str] = set()
+        self._next_poll = time.monotonic() + interval
+
+    def add(self, path: str):
+        self._record(path, os.stat(path).st_mtime_ns)
+
+    def remove(self, path: str):
+        self._mtimes.pop(path, None)
+        self._racy.discard(path)
+
+    def wait(self, timeout: float) -> Set[str]:
+        delay = self._next_poll - time.monotonic()
+        if delay > timeout:
+            self.stop_event.wait(timeout)
+            return set()
+        self.stop_event.wait(max(delay, 0))
+        self._next_poll = time.monotonic() + self.interval
+
+        dirty = set()
+        for path, mtime_ns in list(self._mtimes.items()):
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                # Gone; reading it again lets the watcher drop it.
+                dirty.add(path)
+                self.remove(path)
+                continue
+            if current != mtime_ns or (path in self._racy and time.time_ns() - current >= RACY_WINDOW_NS):
+                dirty.add(path)
+                self._record(path, current)
+        return dirty
+
+    def close(self):
+        self._mtimes.clear()
+        self._racy.clear()
+
+    def _record(self, path: str, mtime_ns: int):
+        self._mtimes[path] = mtime_ns
+        if time.time_ns() - mtime_ns < RACY_WINDOW_NS:
+            self._racy.add(path)
+        else:
+            self._racy.discard(path)
+
+
+class DirectoryWatcher:
+    """
+    Keeps running totals of the watched trees on a background thread and calls a tree's ``on_exceeded`` with
+    its totals when it passes its threshold. The callback runs on the watcher thread, and not again for the
+    same tree within ``cooldown`` seconds, so a cleanup that cannot get below the threshold is not retried
+    in a loop.
+    """
+
+    def __init__(
+            self,
+            settle: float = DEFAULT_SETTLE,
+            max_delay: float = DEFAULT_MAX_DELAY,
+            poll_interval: float = DEFAULT_POLL_INTERVAL,
+            cooldown: float = DEFAULT_COOLDOWN,
+            use_inotify: bool = True,
+    ):
+        self.settle = settle
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.cooldown = cooldown
+        self.use_inotify = use_inotify
+        self.stop_event = threading.Event()
+        self.evaluations = 0
+        self._trees: Dict[str, _Tree] = {}
+        self._retired: List[_Tree] = []
+        self._nodes: Dict[str, _Node] = {}
+        # Directories to re-read on the next evaluation without waiting for an event.
+        self._backlog: Set[str] = set()
+        self._backend = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def mode(self) -> Optional[str]:
+        """'inotify' or 'polling' once the watcher thread is running."""
+        return self._backend.name if self._backend is not None else None
+
+    def watch(self, directory: str, threshold: WatchThreshold, on_exceeded: ThresholdCallback):
+        """Start watching ``directory``. Its initial scan happens on the watcher thread."""
+        directory = os.path.abspath(directory)
+        with self._lock:
+            previous = self._trees.get(directory)
+            if previous is not None:
+                self._retired.append(previous)
+            self._trees[directory] = _Tree(directory, threshold, on_exceeded)
+            if self._thread is None or not self._thread.is_alive():
+                self.stop_event.clear()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def unwatch(self, directory: str):
+        directory = os.path.abspath(directory)
+        with self._lock:
+            tree = self._trees.pop(directory, None)
+            if tree is not None:
+                self._retired.append(tree)
+
+    def totals(self, directory: str) -> Optional[WatchTotals]:
+        """A copy of the running totals of ``directory``, or None before its initial scan is done."""
+        with self._lock:
+            tree = self._trees.get(os.path.abspath(directory))
+            if tree is None or not tree.scanned:
+                return None
+            return WatchTotals(**asdict(tree.totals))
+
+    def stop(self, timeout: Optional[float] = None):
+        self.stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        self._backend = self._create_backend()
+        app_logger.info("Watching policed directories using %s", self._backend.name)
+        try:
+            while not self.stop_event.is_set():
+                scanned = self._sync_trees()
+                dirty = self._collect()
+                if scanned or dirty:
+                    self._evaluate(dirty, scanned)
+        finally:
+            with self._lock:
+                self._backend.close()
+                self._backend = None
+                self._nodes.clear()
+                self._retired.clear()
+                for tree in self._trees.values():
+                    tree.scanned = False
+                    tree.counted = WatchTotals(tree.directory)
+                    tree.totals = WatchTotals(tree.directory)
+
+    def _create_backend(self):
+        if self.use_inotify:
+            try:
+                return _InotifyBackend()
+            except (OSError, AttributeError):
+                app_logger.debug("inotify is unavailable, falling back to polling", exc_info=True)
+        return _PollingBackend(self.poll_interval, self.stop_event)
+
+    def _collect(self) -> Set[str]:
+        """Dirty directories of the next burst of events, once it has settled."""
+        dirty = self._backend.wait(WAKE_INTERVAL)
+        with self._lock:
+            dirty |= self._backlog
+            self._backlog = set()
+        if not dirty:
+            return dirty
+        first = last = time.monotonic()
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            remaining = min(self.settle - (now - last), self.max_delay - (now - first))
+            if remaining <= 0:
+                break
+            more = self._backend.wait(remaining)
+            if more:
+                dirty |= more
+                last = time.monotonic()
+        return dirty
+
+    def _sync_trees(self) -> List[_Tree]:
+        """
+        Apply ``watch`` and ``unwatch`` calls. The backend, the nodes and the trees' counts are only ever
+        touched on the watcher thread, so scanning happens outside the lock and only publishing takes it.
+        """
+        with self._lock:
+            retired = [tree for tree in self._retired if tree.scanned]
+            self._retired.clear()
+            trees = [tree for tree in self._trees.values() if not tree.scanned]
+
+        for tree in retired:
+            self._drop(tree.directory, tree)
+        for tree in trees:
+            self._add(tree.directory, tree)
+            app_logger.debug("Watching %s: %d files, %d bytes",
+                             tree.directory, tree.counted.files, tree.counted.bytes)
+        self._publish(trees, scanned=True)
+        return trees
+
+    def _evaluate(self, dirty: Set[str], scanned: List[_Tree]):
+        start = time.perf_counter()
+        touched = {id(tree): tree for tree in scanned}
+        for path in dirty:
+            node = self._nodes.get(path)
+            if node is not None:
+                self._refresh(path, node)
+                touched[id(node.tree)] = node.tree
+        self._publish(touched.values())
+
+        now = time.monotonic()
+        exceeded = []
+        with self._lock:
+            for tree in touched.values():
+                if self._trees.get(tree.directory) is not tree or not tree.threshold.exceeded(tree.counted):
+                    continue
+                if tree.last_triggered is not None and now - tree.last_triggered < self.cooldown:
+                    continue
+                tree.last_triggered = now
+                exceeded.append((tree, WatchTotals(**asdict(tree.counted))))
+            self.evaluations += 1
+        app_logger.debug("Evaluated %d dirty directories in %.3f s", len(dirty), time.perf_counter() - start)
+
+        for tree, totals in exceeded:
+            app_logger.info("%s passed its threshold (%d files, %d bytes), cleaning up",
+                            tree.directory, totals.files, totals.bytes)
+            try:
+                tree.on_exceeded(totals)
+            except Exception:
+                app_logger.error("Cleanup of %s failed", tree.directory, exc_info=True)
+
+    def _publish(self, trees: Iterable[_Tree], scanned: bool = False):
+        """Make the counts of ``trees`` visible to ``totals``."""
+        with self._lock:
+            for tree in trees:
+                tree.totals = WatchTotals(**asdict(tree.counted))
+                tree.scanned = tree.scanned or scanned
+
+    def _refresh(self, path: str, node: _Node):
+        """Re-read one directory and apply what changed to its tree. Watcher thread only."""
+        tree = node.tree
+        contents = self._contents(path, tree)
+        if contents is None:
+            # Gone: its parent's refresh drops it, unless it was the top of the tree.
+            if path == tree.directory:
+                self._drop(path, tree)
+            return
+
+        files, size, subdirectories = contents
+        tree.counted.files += files - node.files
+        tree.counted.bytes += size - node.bytes
+        node.files, node.bytes = files, size
+        for name in node.subdirectories - subdirectories:
+            self._drop(os.path.join(path, name), tree)
+        for name in subdirectories - node.subdirectories:
+            self._add(os.path.join(path, name), tree)
+        node.subdirectories = subdirectories
+
+    def _add(self, directory: str, tree: _Tree):
+        """Watch and count ``directory`` and everything below it. Watcher thread only."""
+        stack = [directory]
+        while stack:
+            path = stack.pop()
+            # Watch before reading, so nothing changing in between is missed.
+            self._add_watch(path)
+            contents = self._contents(path, tree)
+            if contents is None:
+                self._backend.remove(path)
+                continue
+            files, size, subdirectories = contents
+            self._nodes[path] = _Node(tree, files, size, subdirectories)
+            tree.counted.files += files
+            tree.counted.bytes += size
+            tree.counted.directories += path != tree.directory
+            stack.extend(os.path.join(path, name) for name in subdirectories)
+
+    def _drop(self, directory: str, tree: _Tree):
+        """Stop watching and counting ``directory`` and everything below it. Watcher thread only."""
+        stack = [directory]
+        while stack:
+            path = stack.pop()
+            node = self._nodes.pop(path, None)
+            if node is None:
+                continue
+            self._backend.remove(path)
+            tree.counted.files -= node.files
+            tree.counted.bytes -= node.bytes
+            tree.counted.directories -= path != tree.directory
+            stack.extend(os.path.join(path, name) for name in node.subdirectories)
+
+    def _add_watch(self, path: str):
+        try:
+            self._backend.add(path)
+        except OSError as e:
+            if e.errno == errno.ENOSPC and isinstance(self._backend, _InotifyBackend):
+                app_logger.warning("Out of inotify watches, falling back to polling")
+                self._switch_to_polling()
+                self._add_watch(path)
+            else:
+                app_logger.debug("Unable to watch %s", path, exc_info=True)
+
+    def _switch_to_polling(self):
+        self._backend.close()
+        self._backend = _PollingBackend(self.poll_interval, self.stop_event)
+        for path in self._nodes:
+            try:
+                self._backend.add(path)
+            except OSError:
+                app_logger.debug("Unable to watch %s", path, exc_info=True)
+        # Events still queued on the closed inotify descriptor are lost.
+        self._backlog.update(self._nodes)
+
+    def _contents(self, path: str, tree: _Tree) -> Optional[Tuple[int, int, Set[str]]]:
+        """
+        What ``_read`` finds in ``path``, leaving out the graveyard at the top of the tree: burying only moves
+        files into it, so counting it would keep the tree over its threshold until the purge is done.
+        """
+        contents = self._read(path)
+        if contents is not None and path == tree.directory:
+            contents[2].discard(GRAVEYARD_NAME)
+        return contents
+
+    @staticmethod
+    def _read(path: str) -> Optional[Tuple[int, int, Set[str]]]:
+        files, size, subdirectories = 0, 0, set()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.add(entry.name)
+                        else:
+                            files += 1
+                            size += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        app_logger.debug("Unable to stat %s", entry.path, exc_info=True)
+        except OSError:
+            app_logger.debug("Unable to scan %s", path, exc_info=True)
+            return None
+        return files, size, subdirectories
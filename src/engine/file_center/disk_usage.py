@@ -0,0 +1,190 @@
+"""
+Cached, incrementally refreshed disk usage of policed directories.
+
+The index stores one node per directory: its mtime, the number and total size of the files directly inside
+it and the names of its subdirectories. Creating, deleting or renaming an entry changes the mtime of the
+directory holding it, so a refresh only has to ``stat`` each directory and re-read (``os.scandir``) the ones
+whose mtime moved; unchanged directories are answered from the index. Rewriting an existing file in place
+does not touch its directory, so sizes of such files are only picked up once their directory changes.
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.application_config.app_logger import app_logger
+from src.engine.file_center.graveyard import GRAVEYARD_NAME
+
+DEFAULT_TOP_N = 5
+# A directory modified this recently may change again within the same mtime tick, so it is not trusted yet.
+RACY_WINDOW_NS = 2_000_000_000
+_UNTRUSTED_MTIME = -1
+
+# path -> [mtime_ns, files, bytes, [subdirectory names]]
+Node = List
+
+
+@dataclass
+class DiskUsage:
+    directory: str
+    files: int = 0
+    directories: int = 0
+    bytes: int = 0
+    largest: List[Tuple[str, int]] = field(default_factory=list)
+    scanned: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        lines = [f'{self.files:,} files in {self.directories:,} folders, {format_size(self.bytes)}']
+        if self.largest:
+            lines.append('Largest folders:')
+            lines.extend(f'  {os.path.basename(path)}  {format_size(size)}' for path, size in self.largest)
+        return '\n'.join(lines)
+
+
+def format_size(size: int) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f'{size:,.0f} {unit}' if unit == 'B' else f'{size:,.1f} {unit}'
+        size /= 1024
+    return f'{size:,.1f} TB'
+
+
+class DiskUsageIndex:
+    def __init__(self, cache_path: Optional[str] = None, top_n: int = DEFAULT_TOP_N):
+        self.cache_path = cache_path
+        self.top_n = top_n
+        self._nodes: Dict[str, Node] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def usage(self, directory: str) -> DiskUsage:
+        """
+        Totals for ``directory``, re-reading only the directories that changed since the last call. Its graveyard
+        holds entries that were already cleared, so it is left out.
+        """
+        directory = os.path.abspath(directory)
+        usage = DiskUsage(directory)
+        start = time.perf_counter()
+
+        # Pre-order walk; reversing it visits every directory after all of its subdirectories.
+        order: List[Tuple[str, Node]] = []
+        stack = [directory]
+        while stack:
+            path = stack.pop()
+            node = self._node(path, usage)
+            if node is None:
+                continue
+            order.append((path, node))
+            stack.extend(os.path.join(path, name) for name in node[3]
+                         if path != directory or name != GRAVEYARD_NAME)
+
+        with self._lock:
+            self._forget_below(directory, {path for path, _ in order})
+
+        totals: Dict[str, List[int]] = {}
+        for path, (_, files, size, subdirectories) in reversed(order):
+            total = [files, 0, size]
+            for name in subdirectories:
+                child = totals.get(os.path.join(path, name))
+                if child is not None:
+                    total[0] += child[0]
+                    total[1] += child[1] + 1
+                    total[2] += child[2]
+            totals[path] = total
+
+        if order:
+            usage.files, usage.directories, usage.bytes = totals[directory]
+            subtrees = ((os.path.join(directory, name), totals.get(os.path.join(directory, name)))
+                        for name in order[0][1][3])
+            sizes = ((path, total[2]) for path, total in subtrees if total is not None)
+            usage.largest = heapq.nlargest(self.top_n, sizes, key=lambda item: item[1])
+        usage.seconds = time.perf_counter() - start
+        app_logger.debug("Disk usage of %s: %d files, %d bytes, %d of %d directories scanned",
+                         directory, usage.files, usage.bytes, usage.scanned, len(order))
+        return usage
+
+    def usage_many(self, directories: Iterable[str]) -> Dict[str, DiskUsage]:
+        return {directory: self.usage(directory) for directory in directories if directory and os.path.isdir(directory)}
+
+    def load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r') as file:
+                nodes = json.load(file)
+        except (OSError, ValueError):
+            app_logger.error("Failed to load disk usage index %s, starting empty", self.cache_path, exc_info=True)
+            return
+        with self._lock:
+            self._nodes = nodes
+            self._dirty = False
+
+    def save(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._nodes)
+            self._dirty = False
+
+        temporary_path = f'{self.cache_path}.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(snapshot, file)
+        os.replace(temporary_path, self.cache_path)
+
+    def __enter__(self) -> 'DiskUsageIndex':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.save()
+
+    def _node(self, path: str, usage: DiskUsage) -> Optional[Node]:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            app_logger.debug("Unable to stat %s", path, exc_info=True)
+            return None
+
+        with self._lock:
+            node = self._nodes.get(path)
+        if node is not None and node[0] == mtime_ns:
+            return node
+
+        files, size, subdirectories = 0, 0, []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.name)
+                        else:
+                            files += 1
+                            size += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        app_logger.debug("Unable to stat %s", entry.path, exc_info=True)
+        except OSError:
+            app_logger.debug("Unable to scan %s", path, exc_info=True)
+            return None
+
+        if time.time_ns() - mtime_ns < RACY_WINDOW_NS:
+            mtime_ns = _UNTRUSTED_MTIME
+        node = [mtime_ns, files, size, subdirectories]
+        usage.scanned += 1
+        with self._lock:
+            self._nodes[path] = node
+            self._dirty = True
+        return node
+
+    def _forget_below(self, directory: str, seen: Set[str]):
+        """Drop nodes of directories under ``directory`` that no longer exist. Caller holds the lock."""
+        prefix = os.path.join(directory, '')
+        stale = [path for path in self._nodes if path.startswith(prefix) and path not in seen]
+        for path in stale:
+            del self._nodes[path]
+        self._dirty = self._dirty or bool(stale)
@@ -1,9 +1,11 @@
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Callable, Union
+from typing import Any, Dict, List, Optional, Callable, Union
 
 from src.application_config.app_logger import app_logger
 from src.application_config.base.base_settings import BaseSettings, DefaultDictMixin
+from src.engine.file_center.directory_watcher import WatchThreshold
+from src.engine.file_center.retention_policy import RetentionPolicy
 
 
 def default_directories_to_police() -> Dict[str, str]:
@@ -22,10 +24,20 @@ def default_temp_file_extensions() -> Dict[str, List[str]]:
     }
 
 
+def default_retention_policies() -> Dict[str, Dict[str, Any]]:
+    return {}
+
+
+def default_watch_thresholds() -> Dict[str, Dict[str, Any]]:
+    return {}
+
+
 @dataclass
 class FileCenterSettings(DefaultDictMixin, BaseSettings):
     directories_to_police: Dict[str, str] = field(default_factory=default_directories_to_police)
     temp_file_extensions: Dict[str, List[str]] = field(default_factory=default_temp_file_extensions)
+    retention_policies: Dict[str, Dict[str, Any]] = field(default_factory=default_retention_policies)
+    watch_thresholds: Dict[str, Dict[str, Any]] = field(default_factory=default_watch_thresholds)
 
     def get_directory_to_police(self, uid: int) -> str:
         return self.directories_to_police.get(str(uid), "Error")
@@ -39,8 +51,29 @@ class FileCenterSettings(DefaultDictMixin, BaseSettings):
     def set_temp_file_extensions(self, uid: int, value: List[str]):
         self.temp_file_extensions[str(uid)] = value
 
+    def get_retention_policy(self, uid: int) -> Optional[RetentionPolicy]:
+        policy = self.retention_policies.get(str(uid))
+        return RetentionPolicy.from_dict(policy) if policy is not None else None
+
+    def set_retention_policy(self, uid: int, policy: Optional[RetentionPolicy]):
+        if policy is None:
+            self.retention_policies.pop(str(uid), None)
+        else:
+            self.retention_policies[str(uid)] = policy.as_dict()
+
+    def get_watch_threshold(self, uid: int) -> Optional[WatchThreshold]:
+        threshold = self.watch_thresholds.get(str(uid))
+        return WatchThreshold.from_dict(threshold) if threshold is not None else None
+
+    def set_watch_threshold(self, uid: int, threshold: Optional[WatchThreshold]):
+        if threshold is None:
+            self.watch_thresholds.pop(str(uid), None)
+        else:
+            self.watch_thresholds[str(uid)] = threshold.as_dict()
+
     def validate(self) -> bool:
-        return self._validate_directories() and self._validate_extensions()
+        return (self._validate_directories() and self._validate_extensions()
+                and self._validate_retention_policies() and self._validate_watch_thresholds())
 
     def _validate_directories(self) -> bool:
         for key, directory in self.directories_to_police.items():
@@ -65,3 +98,27 @@ class FileCenterSettings(DefaultDictMixin, BaseSettings):
                 return False
 
         return True
+
+    def _validate_retention_policies(self) -> bool:
+        for key, policy in self.retention_policies.items():
+            if not isinstance(key, str):
+                app_logger.error("Invalid key: %s", key)
+                return False
+
+            if not isinstance(policy, dict) or not RetentionPolicy.from_dict(policy).validate():
+                app_logger.error("Invalid retention policy in key %s: %s", key, policy)
+                return False
+
+        return True
+
+    def _validate_watch_thresholds(self) -> bool:
+        for key, threshold in self.watch_thresholds.items():
+            if not isinstance(key, str):
+                app_logger.error("Invalid key: %s", key)
+                return False
+
+            if not isinstance(threshold, dict) or not WatchThreshold.from_dict(threshold).validate():
+                app_logger.error("Invalid watch threshold in key %s: %s", key, threshold)
+                return False
+
+        return True
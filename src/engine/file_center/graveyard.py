@@ -0,0 +1,202 @@
+"""
+Instant clearing: move a directory's entries into a hidden graveyard, purge them later.
+
+``bury`` renames every top-level entry into a fresh grave under ``<directory>/.stephatility-graveyard``.
+Keeping the graveyard inside the cleared directory puts it on the same filesystem even when the directory is
+a mount point, and nothing is written outside it. A rename within a filesystem only touches directory
+metadata, so the directory is empty (but for the graveyard) after one rename per entry no matter how large
+the trees inside are. ``GraveyardPurger`` then deletes the graves
+on a single low-priority thread. Anything still in a graveyard is garbage by definition, so purges that were
+interrupted (the app closed, the machine rebooted) are picked up again with ``resume``.
+"""
+import datetime
+import errno
+import os
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.application_config.app_logger import app_logger
+from src.engine.file_center.deletion_engine import DeletionJob
+
+GRAVEYARD_NAME = '.stephatility-graveyard'
+DEFAULT_NICENESS = 10
+
+_FILE_ATTRIBUTE_HIDDEN = 0x2
+
+
+@dataclass
+class BurialReport:
+    directory: str
+    grave: Optional[str] = None
+    entries: int = 0
+    seconds: float = 0.0
+    failures: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def succeeded(self) -> bool:
+        return self.grave is not None and not self.failures
+
+
+def graveyard_path(directory: str) -> str:
+    """The graveyard serving ``directory``: a hidden entry of the directory itself."""
+    return os.path.join(os.path.abspath(directory), GRAVEYARD_NAME)
+
+
+def bury(directory: str) -> BurialReport:
+    """
+    Rename every entry of ``directory`` except the graveyard into a new grave. Returns a report without a
+    grave (and touches nothing) if the grave cannot be created.
+    """
+    directory = os.path.abspath(directory)
+    report = BurialReport(directory)
+    start = time.perf_counter()
+
+    graveyard = graveyard_path(directory)
+    grave = os.path.join(graveyard, f"{datetime.datetime.now():%Y%m%dT%H%M%S%f}")
+    try:
+        os.makedirs(grave)
+    except OSError:
+        app_logger.debug("Could not create grave %s", grave, exc_info=True)
+        return report
+    _hide(graveyard)
+    report.grave = grave
+
+    with os.scandir(directory) as entries:
+        names = [entry.name for entry in entries if entry.name != GRAVEYARD_NAME]
+    for name in names:
+        try:
+            os.rename(os.path.join(directory, name), os.path.join(grave, name))
+            report.entries += 1
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                # Something inside is a mount point of its own; leave it for a regular deletion.
+                app_logger.debug("%s is on another filesystem, not buried", name)
+            else:
+                app_logger.debug("Failed to bury %s", name, exc_info=True)
+            report.failures[os.path.join(directory, name)] = e.strerror or str(e)
+
+    report.seconds = time.perf_counter() - start
+    app_logger.info("Buried %d entries of %s in %s", report.entries, directory, grave)
+    return report
+
+
+def find_graves(directories: Iterable[str]) -> List[str]:
+    """Graves left in the graveyards serving ``directories``, e.g. by a purge that never finished."""
+    graves = []
+    for graveyard in sorted({graveyard_path(directory) for directory in directories if directory}):
+        if not os.path.isdir(graveyard):
+            continue
+        with os.scandir(graveyard) as entries:
+            graves.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+    return sorted(graves)
+
+
+def _hide(path: str):
+    if os.name == 'nt':
+        import ctypes
+        ctypes.windll.kernel32.SetFileAttributesW(path, _FILE_ATTRIBUTE_HIDDEN)
+
+
+class GraveyardPurger:
+    """
+    Deletes graves one at a time on a background thread at reduced CPU priority (Linux: the thread's nice
+    value, which the deletion workers inherit). ``stop`` interrupts the current grave; what is left of it is
+    found again by ``resume`` on the next start.
+    """
+
+    def __init__(self, max_workers: int = 1, niceness: int = DEFAULT_NICENESS):
+        self.max_workers = max_workers
+        self.niceness = niceness
+        self.stop_event = threading.Event()
+        self._graves: 'queue.Queue[str]' = queue.Queue()
+        self._queued: Set[str] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def bury(self, directory: str) -> BurialReport:
+        """Empty ``directory`` right away and queue its grave for purging."""
+        report = bury(directory)
+        if report.grave is not None:
+            self.purge(report.grave)
+        return report
+
+    def resume(self, directories: Iterable[str]) -> int:
+        """Queue the graves that earlier runs left behind for ``directories``. Returns how many were found."""
+        graves = find_graves(directories)
+        for grave in graves:
+            self.purge(grave)
+        if graves:
+            app_logger.info("Resuming purge of %d graves", len(graves))
+        return len(graves)
+
+    def purge(self, grave: str):
+        with self._lock:
+            if grave in self._queued:
+                return
+            self._queued.add(grave)
+            self._graves.put(grave)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queued)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued grave is purged. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        self.stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        self._lower_priority()
+        while not self.stop_event.is_set():
+            try:
+                grave = self._graves.get(timeout=0.5)
+            except queue.Empty:
+                with self._lock:
+                    if self._graves.empty():
+                        self._thread = None
+                        return
+                continue
+            try:
+                self._purge(grave)
+            finally:
+                with self._lock:
+                    self._queued.discard(grave)
+
+    def _purge(self, grave: str):
+        report = DeletionJob(grave, max_workers=self.max_workers, stop_event=self.stop_event).run()
+        if report.cancelled:
+            return
+        try:
+            os.rmdir(grave)
+            graveyard = os.path.dirname(grave)
+            if not os.listdir(graveyard):
+                os.rmdir(graveyard)
+        except OSError:
+            # Failed entries stay in the grave and are retried by the next resume.
+            app_logger.debug("Grave %s is not empty yet", grave, exc_info=True)
+
+    def _lower_priority(self):
+        # Only Linux gives threads their own nice value; elsewhere a thread id passed here could name a process.
+        if not sys.platform.startswith('linux'):
+            return
+        try:
+            # PRIO_PROCESS with a thread id renices just that thread, and the threads it starts inherit it.
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.niceness)
+        except OSError:
+            app_logger.debug("Could not lower purge thread priority", exc_info=True)
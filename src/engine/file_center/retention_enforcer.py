@@ -0,0 +1,101 @@
+"""
+Applies retention policies to policed directories when they grow past their watch thresholds.
+
+``RetentionEnforcer`` keeps a ``DirectoryWatcher`` in line with ``FileCenterSettings``: ``sync`` watches the
+policed directory of a uid with its current threshold and stops watching whatever was watched for that uid
+before, so it has to be called whenever a policed directory or a threshold changes. Several uids may police
+the same directory; it is watched once, with the lowest of their limits, and each uid whose own threshold was
+passed gets its policy applied. As a second line of defence, a policy is only applied if the directory that
+passed the threshold is still the one policed for its uid, so a stale watch can never delete files in a
+directory the user has moved away from.
+"""
+import functools
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.application_config.app_logger import app_logger
+from src.engine.file_center.directory_watcher import DirectoryWatcher, WatchThreshold, WatchTotals
+from src.engine.file_center.file_center_settings import FileCenterSettings
+from src.engine.file_center.retention_policy import apply_policy
+
+
+class RetentionEnforcer:
+    def __init__(self, settings: FileCenterSettings, watcher: Optional[DirectoryWatcher] = None):
+        self.settings = settings
+        self.watcher = watcher or DirectoryWatcher()
+        # uid -> (absolute directory, threshold) currently watched for it.
+        self._watched: Dict[int, Tuple[str, WatchThreshold]] = {}
+        # directory -> the combined threshold it is registered with.
+        self._registered: Dict[str, WatchThreshold] = {}
+        self._lock = threading.Lock()
+
+    def sync(self, uid: Optional[int] = None):
+        """Bring the watches of ``uid`` (every policed uid by default) up to date with the settings."""
+        uids = [int(key) for key in self.settings.directories_to_police] if uid is None else [uid]
+        with self._lock:
+            for uid in uids:
+                self._sync(uid)
+
+    def stop(self, timeout: Optional[float] = None):
+        self.watcher.stop(timeout)
+
+    def _sync(self, uid: int):
+        """Caller holds the lock."""
+        directory = self.settings.get_directory_to_police(uid)
+        threshold = self.settings.get_watch_threshold(uid)
+        wanted = None
+        if threshold is not None and directory and os.path.isdir(directory):
+            wanted = (os.path.abspath(directory), threshold)
+
+        previous = self._watched.pop(uid, None)
+        if wanted is not None:
+            self._watched[uid] = wanted
+        if previous != wanted:
+            for changed in {entry[0] for entry in (previous, wanted) if entry is not None}:
+                self._register(changed)
+
+    def _register(self, directory: str):
+        """Watch ``directory`` for every uid policing it, or stop watching it if none is left. Caller holds the lock."""
+        thresholds = [threshold for watched, threshold in self._watched.values() if watched == directory]
+        if not thresholds:
+            if self._registered.pop(directory, None) is not None:
+                app_logger.info("No longer watching %s", directory)
+                self.watcher.unwatch(directory)
+            return
+        combined = _lowest(thresholds)
+        if self._registered.get(directory) != combined:
+            self._registered[directory] = combined
+            self.watcher.watch(directory, combined, functools.partial(self._on_threshold_exceeded, directory))
+
+    def _on_threshold_exceeded(self, directory: str, totals: WatchTotals):
+        """Runs on the watcher thread."""
+        with self._lock:
+            uids = [uid for uid, (watched, threshold) in self._watched.items()
+                    if watched == directory and threshold.exceeded(totals)]
+        for uid in uids:
+            self._enforce(uid, totals)
+
+    def _enforce(self, uid: int, totals: WatchTotals):
+        policed = self.settings.get_directory_to_police(uid)
+        if not policed or os.path.abspath(policed) != totals.directory:
+            app_logger.warning("%s passed its watch threshold but is no longer policed, leaving it alone",
+                               totals.directory)
+            return
+        policy = self.settings.get_retention_policy(uid)
+        if policy is None:
+            app_logger.warning("%s passed its watch threshold but has no retention policy", totals.directory)
+            return
+        apply_policy(totals.directory, policy, stop_event=self.watcher.stop_event)
+
+
+def _lowest(thresholds: Iterable[WatchThreshold]) -> WatchThreshold:
+    """A threshold passed as soon as any of ``thresholds`` is."""
+    thresholds = list(thresholds)
+
+    def lowest(values: List[Optional[int]]) -> Optional[int]:
+        values = [value for value in values if value is not None]
+        return min(values) if values else None
+
+    return WatchThreshold(max_bytes=lowest([threshold.max_bytes for threshold in thresholds]),
+                          max_files=lowest([threshold.max_files for threshold in thresholds]))
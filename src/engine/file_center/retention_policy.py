@@ -0,0 +1,235 @@
+"""
+Rule-based retention for policed directories.
+
+A ``RetentionPolicy`` selects files that match every rule it sets: any of its glob patterns, older than an
+age, larger than a size, not deeper than a depth. ``keep_newest`` then spares the newest N of those. Policies
+are evaluated in one streaming ``os.scandir`` pass: the globs are compiled once into combined regular
+expressions, and ``keep_newest`` only holds N entries in a min-heap, so memory does not grow with the number
+of files. ``apply_policy`` deletes the selection, or only reports it when ``dry_run`` is set.
+"""
+import fnmatch
+import heapq
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Pattern
+
+from src.application_config.app_logger import app_logger
+from src.engine.file_center.graveyard import GRAVEYARD_NAME
+
+DAY = 24 * 60 * 60
+DEFAULT_SAMPLE_SIZE = 20
+
+
+@dataclass
+class RetentionPolicy:
+    patterns: List[str] = field(default_factory=list)
+    older_than_days: Optional[float] = None
+    larger_than_bytes: Optional[int] = None
+    keep_newest: int = 0
+    max_depth: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, config_dict: Dict[str, Any]) -> 'RetentionPolicy':
+        field_names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in config_dict.items() if k in field_names})
+
+    def validate(self) -> bool:
+        if not isinstance(self.patterns, list) or not all(isinstance(pattern, str) for pattern in self.patterns):
+            app_logger.error("Invalid retention patterns: %s", self.patterns)
+            return False
+        for name in ('older_than_days', 'larger_than_bytes', 'max_depth'):
+            value = getattr(self, name)
+            if value is not None and (not isinstance(value, (int, float)) or value < 0):
+                app_logger.error("Invalid retention %s: %s", name, value)
+                return False
+        if not isinstance(self.keep_newest, int) or self.keep_newest < 0:
+            app_logger.error("Invalid retention keep_newest: %s", self.keep_newest)
+            return False
+        return True
+
+
+class Candidate(NamedTuple):
+    path: str
+    size: int
+    mtime: float
+
+
+@dataclass
+class RetentionReport:
+    directory: str
+    dry_run: bool
+    scanned: int = 0
+    matched: int = 0
+    kept: int = 0
+    # In a dry run: the files that would have been deleted.
+    deleted: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    sample: List[str] = field(default_factory=list)
+    failures: Dict[str, str] = field(default_factory=dict)
+    cancelled: bool = False
+
+
+class GlobMatcher:
+    """
+    All of a policy's globs compiled into (at most) two regular expressions. Patterns containing ``/`` are
+    matched against the path relative to the policed directory (``build/*.o``, ``**/cache/*``), the others
+    against the file name alone.
+    """
+
+    def __init__(self, patterns: List[str]):
+        flags = re.IGNORECASE if os.name == 'nt' else 0
+        name_patterns = [fnmatch.translate(pattern) for pattern in patterns if '/' not in pattern]
+        path_patterns = [self._translate_path(pattern) for pattern in patterns if '/' in pattern]
+        self._name = self._combine(name_patterns, flags)
+        self._path = self._combine(path_patterns, flags)
+        self.matches_everything = not patterns
+
+    def matches(self, name: str, relative_path: str) -> bool:
+        if self.matches_everything:
+            return True
+        return bool(self._name and self._name.match(name)) or bool(self._path and self._path.match(relative_path))
+
+    @staticmethod
+    def _combine(expressions: List[str], flags: int) -> Optional[Pattern]:
+        if not expressions:
+            return None
+        return re.compile('|'.join(f'(?:{expression})' for expression in expressions), flags)
+
+    @staticmethod
+    def _translate_path(pattern: str) -> str:
+        """Like ``fnmatch.translate``, but ``*`` and ``?`` stay within one path segment and ``**`` spans any."""
+        parts, i = [], 0
+        while i < len(pattern):
+            char = pattern[i]
+            if pattern.startswith('**/', i):
+                parts.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i):
+                parts.append('.*')
+                i += 2
+                continue
+            i += 1
+            if char == '*':
+                parts.append('[^/]*')
+            elif char == '?':
+                parts.append('[^/]')
+            elif char == '[' and ']' in pattern[i + 1:]:
+                end = pattern.index(']', i + 1)
+                body = pattern[i:end]
+                body = '^' + body[1:] if body.startswith('!') else body
+                parts.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end + 1
+            else:
+                parts.append(re.escape(char))
+        return '(?s:' + ''.join(parts) + r')\Z'
+
+
+def select(
+        directory: str,
+        policy: RetentionPolicy,
+        now: Optional[float] = None,
+        stop_event: Optional[threading.Event] = None,
+        report: Optional[RetentionReport] = None,
+) -> Iterator[Candidate]:
+    """
+    Stream the files ``policy`` would delete under ``directory``, leaving out its graveyard. ``report`` receives
+    the scan counts.
+    """
+    now = time.time() if now is None else now
+    matcher = GlobMatcher(policy.patterns)
+    cutoff = now - policy.older_than_days * DAY if policy.older_than_days is not None else None
+    report = report or RetentionReport(directory, dry_run=True)
+    newest: List[tuple] = []
+
+    stack = [(directory, '', 0)]
+    while stack:
+        path, relative, depth = stack.pop()
+        try:
+            entries = os.scandir(path)
+        except OSError as e:
+            app_logger.debug("Unable to scan %s", path, exc_info=True)
+            report.failures[path] = e.strerror or str(e)
+            continue
+
+        with entries:
+            for entry in entries:
+                if stop_event is not None and stop_event.is_set():
+                    report.cancelled = True
+                    return
+                if not depth and entry.name == GRAVEYARD_NAME:
+                    continue
+                entry_relative = f'{relative}{entry.name}'
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if policy.max_depth is None or depth < policy.max_depth:
+                            stack.append((entry.path, entry_relative + '/', depth + 1))
+                        continue
+                    report.scanned += 1
+                    if not matcher.matches(entry.name, entry_relative):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError as e:
+                    report.failures[entry.path] = e.strerror or str(e)
+                    continue
+
+                if cutoff is not None and stat.st_mtime >= cutoff:
+                    continue
+                if policy.larger_than_bytes is not None and stat.st_size <= policy.larger_than_bytes:
+                    continue
+                report.matched += 1
+                candidate = Candidate(entry.path, stat.st_size, stat.st_mtime)
+
+                if not policy.keep_newest:
+                    yield candidate
+                    continue
+                # Min-heap of the newest matches; whatever falls out of it is old enough to go.
+                item = (candidate.mtime, candidate.path, candidate)
+                if len(newest) < policy.keep_newest:
+                    heapq.heappush(newest, item)
+                    continue
+                yield heapq.heappushpop(newest, item)[2]
+
+    report.kept = len(newest)
+
+
+def apply_policy(
+        directory: str,
+        policy: RetentionPolicy,
+        dry_run: bool = False,
+        now: Optional[float] = None,
+        stop_event: Optional[threading.Event] = None,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+) -> RetentionReport:
+    """Delete (or with ``dry_run``, only count) the files ``policy`` selects under ``directory``."""
+    directory = os.path.abspath(directory)
+    report = RetentionReport(directory, dry_run)
+    start = time.perf_counter()
+
+    for candidate in select(directory, policy, now, stop_event, report):
+        if not dry_run:
+            try:
+                os.remove(candidate.path)
+            except OSError as e:
+                app_logger.debug("Failed to delete: %s", candidate.path, exc_info=True)
+                report.failures[candidate.path] = e.strerror or str(e)
+                continue
+        report.deleted += 1
+        report.bytes += candidate.size
+        if len(report.sample) < sample_size:
+            report.sample.append(candidate.path)
+
+    report.seconds = time.perf_counter() - start
+    app_logger.info(
+        "Retention%s in %s: %d of %d files matched, %d %s (%d bytes), %d kept as newest, %d failures",
+        ' dry run' if dry_run else '', directory, report.matched, report.scanned, report.deleted,
+        'would be deleted' if dry_run else 'deleted', report.bytes, report.kept, len(report.failures),
+    )
+    return report
@@ -0,0 +1,290 @@
+"""
+Deduplicated, encrypted snapshots of policed directories.
+
+Files are cut into variable-size chunks with a gear rolling hash (content-defined chunking), so inserting
+bytes into a file only changes the chunks around the edit. Every distinct chunk is encrypted with ``Cipher``
+and stored once under its HMAC-SHA256, keyed with a key derived from the cipher's, so that listing the store
+does not reveal whether some known content is in it. A snapshot is an encrypted index mapping each file to its
+chunk list. Files whose size and mtime match the previous snapshot of the same directory are not even read
+again.
+
+    store/
+        chunks/ab/abcdef...        encrypted chunk
+        snapshots/<root>/<id>      encrypted JSON index
+"""
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+from src.application_config.app_logger import app_logger
+from src.engine.cryptography_center.cipher import Cipher
+from src.engine.cryptography_center.tree_operations import scan_tree
+from src.engine.file_center.file_center_settings import FileCenterSettings
+
+DEFAULT_MIN_CHUNK = 16 * 1024
+DEFAULT_AVG_CHUNK = 64 * 1024
+DEFAULT_MAX_CHUNK = 256 * 1024
+READ_SIZE = 1024 * 1024
+_ID_KEY_CONTEXT = b'stephatility snapshot ids'
+
+# Fixed pseudo-random table so the same content is always cut at the same places.
+_GEAR = [int.from_bytes(hashlib.sha256(bytes([value])).digest()[:4], 'big') for value in range(256)]
+# One translate table per byte of the gear values, so a block's gear values are looked up in C.
+_GEAR_BYTES = [bytes((gear >> shift) & 0xFF for gear in _GEAR) for shift in (0, 8, 16, 24)]
+# The 32-bit hash shifts left once per byte, so its value only depends on the last 32 bytes.
+_WINDOW = 32
+# Bytes per position when hashing a block: a window's sum of 32 shifted 32-bit gear values stays below 2**64, so
+# the positions' slots in one big integer never carry into each other.
+_SLOT = 8
+_SEARCH_BLOCK = 4096
+
+
+class ContentDefinedChunker:
+    """
+    Gear-hash chunking. The hashes of a whole block of bytes are computed at once with big-integer arithmetic
+    instead of a per-byte Python loop, which gives the same cut points about four times faster. Chunking still
+    runs at roughly 15-20 MB/s per core and is what limits how fast changed files are snapshotted; unchanged files
+    are not read at all.
+    """
+
+    def __init__(
+            self,
+            min_size: int = DEFAULT_MIN_CHUNK,
+            avg_size: int = DEFAULT_AVG_CHUNK,
+            max_size: int = DEFAULT_MAX_CHUNK,
+    ):
+        if not 0 < min_size <= avg_size <= max_size or avg_size & (avg_size - 1):
+            raise ValueError('Chunk sizes must satisfy 0 < min <= avg <= max, with avg a power of two')
+        self.min_size = min_size
+        self.max_size = max_size
+        bits = avg_size.bit_length() - 1
+        # The high bits of the hash depend on the most bytes, so those are the ones tested for a cut.
+        mask = ((1 << bits) - 1) << (32 - bits)
+        # (byte of a hash, table mapping that byte to 1 where it has masked bits set) for every masked byte.
+        self._mask_tests = [
+            (index, bytes(1 if value & (mask >> 8 * index) else 0 for value in range(256)))
+            for index in range(4) if (mask >> 8 * index) & 0xFF
+        ]
+
+    def cut_point(self, data: bytes, start: int) -> int:
+        """End offset of the chunk beginning at ``start``, or ``len(data)`` if no cut was found yet."""
+        end = min(len(data), start + self.max_size)
+        # Bytes before min_size can never end a chunk, so hashing starts there. Going block by block keeps the
+        # work done past the cut small.
+        origin = start + self.min_size
+        for first in range(origin, end, _SEARCH_BLOCK):
+            cut = self._find_cut(data, origin, first, min(end, first + _SEARCH_BLOCK))
+            if cut >= 0:
+                return cut + 1
+        return end
+
+    def _find_cut(self, data: bytes, origin: int, first: int, stop: int) -> int:
+        """
+        The first position in ``[first, stop)`` whose hash (started at ``origin``) passes the mask, or -1.
+
+        The hash at ``p`` is ``sum(gear[data[p - i]] << i for i < 32)`` modulo 2**32. With every position's gear
+        value in its own 64-bit slot of one integer, adding the integer to itself shifted by ``w`` slots and
+        ``w`` bits doubles the number of terms in every slot, so five shift-and-adds hash the whole block.
+        """
+        lead = min(_WINDOW - 1, first - origin)
+        block = data[first - lead:stop]
+        size = len(block)
+        slots = bytearray(_SLOT * size)
+        for index, table in enumerate(_GEAR_BYTES):
+            slots[index::_SLOT] = block.translate(table)
+        value = int.from_bytes(slots, 'little')
+        terms = 1
+        while terms < _WINDOW:
+            value += value << (terms * (_SLOT * 8 + 1))
+            terms *= 2
+
+        # The shifted copies reach past the last slot; those bytes are never looked at.
+        hashes = value.to_bytes(_SLOT * (size + _WINDOW) + _SLOT, 'little')
+        misses = 0
+        for index, table in self._mask_tests:
+            misses |= int.from_bytes(hashes[index:_SLOT * size:_SLOT].translate(table), 'little')
+        cut = misses.to_bytes(size, 'little').find(0, lead)
+        return cut + first - lead if cut >= 0 else -1
+
+    def chunks(self, reader: BinaryIO) -> Iterator[bytes]:
+        buffer = b''
+        eof = False
+        while True:
+            if not eof and len(buffer) < self.max_size:
+                data = reader.read(READ_SIZE)
+                eof = not data
+                buffer += data
+                continue
+            if not buffer:
+                return
+
+            start = 0
+            while len(buffer) - start >= self.max_size or (eof and start < len(buffer)):
+                end = self.cut_point(buffer, start)
+                yield buffer[start:end]
+                start = end
+            buffer = buffer[start:]
+
+
+@dataclass
+class SnapshotReport:
+    snapshot_id: str
+    directory: str
+    files: int = 0
+    reused_files: int = 0
+    new_chunks: int = 0
+    new_bytes: int = 0
+    total_bytes: int = 0
+    seconds: float = 0.0
+    failures: Dict[str, str] = field(default_factory=dict)
+
+
+class SnapshotBackup:
+    """
+    ``id_key`` keys the chunk ids and the snapshot directory names. By default it is derived from the
+    symmetric key of ``cipher``'s strategy; strategies without one (RSA, hybrid) need it passed explicitly.
+    """
+
+    def __init__(
+            self,
+            store_dir: str,
+            cipher: Cipher,
+            chunker: Optional[ContentDefinedChunker] = None,
+            id_key: Optional[bytes] = None,
+    ):
+        self.store_dir = store_dir
+        self.cipher = cipher
+        self.chunker = chunker or ContentDefinedChunker()
+        self._id_key = id_key if id_key is not None else self._derive_id_key(cipher)
+
+    def snapshot(self, directory: str) -> SnapshotReport:
+        directory = os.path.abspath(directory)
+        report = SnapshotReport(datetime.datetime.now().strftime('%Y%m%dT%H%M%S%f'), directory)
+        start = time.perf_counter()
+
+        previous = self._latest_index(directory)
+        previous_files = previous['files'] if previous else {}
+        files = {}
+
+        for path, size in scan_tree(directory):
+            relative = os.path.relpath(path, directory)
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+                earlier = previous_files.get(relative)
+                if earlier and earlier['size'] == size and earlier['mtime_ns'] == mtime_ns \
+                        and all(self._has_chunk(chunk_id) for chunk_id in earlier['chunks']):
+                    files[relative] = earlier
+                    report.reused_files += 1
+                else:
+                    files[relative] = {'size': size, 'mtime_ns': mtime_ns, 'chunks': self._store_file(path, report)}
+                report.files += 1
+                report.total_bytes += size
+            except OSError as e:
+                app_logger.debug("Failed to back up %s", path, exc_info=True)
+                report.failures[path] = str(e)
+
+        index = {'directory': directory, 'created': time.time(), 'files': files}
+        self._write_atomic(
+            os.path.join(self._snapshot_dir(directory), report.snapshot_id),
+            self._seal(json.dumps(index).encode()),
+        )
+
+        report.seconds = time.perf_counter() - start
+        app_logger.info(
+            "Snapshot %s of %s: %d files (%d unchanged), %d new chunks (%d bytes)",
+            report.snapshot_id, directory, report.files, report.reused_files, report.new_chunks, report.new_bytes,
+        )
+        return report
+
+    def snapshot_policed(self, settings: FileCenterSettings) -> List[SnapshotReport]:
+        """Snapshot every configured directory to police that exists."""
+        return [
+            self.snapshot(directory)
+            for directory in settings.directories_to_police.values()
+            if directory and os.path.isdir(directory)
+        ]
+
+    def list_snapshots(self, directory: str) -> List[str]:
+        snapshot_dir = self._snapshot_dir(os.path.abspath(directory))
+        if not os.path.isdir(snapshot_dir):
+            return []
+        return sorted(name for name in os.listdir(snapshot_dir) if not name.endswith('.tmp'))
+
+    def restore(self, directory: str, snapshot_id: str, target_dir: str):
+        index = self._read_index(os.path.abspath(directory), snapshot_id)
+        for relative, entry in index['files'].items():
+            target = os.path.join(target_dir, relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as file:
+                for chunk_id in entry['chunks']:
+                    file.write(self._read_chunk(chunk_id))
+            os.utime(target, ns=(entry['mtime_ns'], entry['mtime_ns']))
+
+    def _store_file(self, path: str, report: SnapshotReport) -> List[str]:
+        chunk_ids = []
+        with open(path, 'rb') as file:
+            for chunk in self.chunker.chunks(file):
+                chunk_id = self._id(chunk)
+                if not self._has_chunk(chunk_id):
+                    self._write_atomic(self._chunk_path(chunk_id), self._seal(chunk))
+                    report.new_chunks += 1
+                    report.new_bytes += len(chunk)
+                chunk_ids.append(chunk_id)
+        return chunk_ids
+
+    def _read_chunk(self, chunk_id: str) -> bytes:
+        chunk = self._open(Cipher.read_from_file(self._chunk_path(chunk_id)))
+        if not hmac.compare_digest(self._id(chunk), chunk_id):
+            raise ValueError(f'Chunk {chunk_id} is corrupt')
+        return chunk
+
+    def _id(self, data: bytes) -> str:
+        return hmac.new(self._id_key, data, hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def _derive_id_key(cipher: Cipher) -> bytes:
+        strategy = cipher.strategy
+        # Wrappers such as CompressedEncryptionStrategy keep the keyed strategy in ``strategy``.
+        while not isinstance(getattr(strategy, 'key', None), bytes) and hasattr(strategy, 'strategy'):
+            strategy = strategy.strategy
+        key = getattr(strategy, 'key', None)
+        if not isinstance(key, bytes):
+            raise ValueError(f'{type(cipher.strategy).__name__} has no symmetric key; pass id_key explicitly')
+        return hmac.new(key, _ID_KEY_CONTEXT, hashlib.sha256).digest()
+
+    def _has_chunk(self, chunk_id: str) -> bool:
+        return os.path.exists(self._chunk_path(chunk_id))
+
+    def _chunk_path(self, chunk_id: str) -> str:
+        return os.path.join(self.store_dir, 'chunks', chunk_id[:2], chunk_id)
+
+    def _snapshot_dir(self, directory: str) -> str:
+        return os.path.join(self.store_dir, 'snapshots', self._id(directory.encode())[:16])
+
+    def _latest_index(self, directory: str) -> Optional[dict]:
+        snapshots = self.list_snapshots(directory)
+        return self._read_index(directory, snapshots[-1]) if snapshots else None
+
+    def _read_index(self, directory: str, snapshot_id: str) -> dict:
+        return json.loads(self._open(Cipher.read_from_file(os.path.join(self._snapshot_dir(directory), snapshot_id))))
+
+    def _seal(self, data: bytes) -> bytes:
+        # Stream contexts draw a fresh IV per call; strategy.encrypt may reuse the strategy's IV.
+        context = self.cipher.strategy.encryptor()
+        return context.update(data) + context.finalize()
+
+    def _open(self, data: bytes) -> bytes:
+        context = self.cipher.strategy.decryptor()
+        return context.update(data) + context.finalize()
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f'{path}.tmp'
+        Cipher.save_to_file(temporary_path, data)
+        os.replace(temporary_path, path)
@@ -1,6 +1,8 @@
 
 import os
-import shutil
+import queue
+import threading
+from typing import Callable, Optional
 
 import tkinter as tk
 from tkinter import messagebox, ttk
@@ -9,7 +11,12 @@ from src.application_config.app_logger import app_logger
 from src.constants import Colors
 from src.gui.containers.widgets.directory_picker import DirectoryPicker
 from src.gui.containers.widgets.tooltip import add_tooltip
+from src.engine.file_center.deletion_engine import DeletionJob, DeletionProgress
+from src.engine.file_center.disk_usage import DiskUsage, DiskUsageIndex
 from src.engine.file_center.file_center_settings import FileCenterSettings
+from src.engine.file_center.graveyard import GRAVEYARD_NAME, GraveyardPurger
+
+POLL_INTERVAL_MS = 100
 
 
 class DirectoryCleaner(tk.Frame):
@@ -18,10 +25,20 @@ class DirectoryCleaner(tk.Frame):
             parent,
             uid: int = 0,
             user_settings: FileCenterSettings = None,
+            purger: Optional[GraveyardPurger] = None,
+            disk_usage: Optional[DiskUsageIndex] = None,
+            on_directory_change: Optional[Callable[[int], None]] = None,
             **kwargs
     ):
         super().__init__(parent, background=Colors.BLUE_GRAY, **kwargs)
         self._user_settings = user_settings
+        self._purger = purger
+        self._disk_usage = disk_usage
+        # Called with the uid after the policed directory changed, e.g. to move its watch along.
+        self._on_directory_change = on_directory_change
+        self._deletion: Optional[DeletionJob] = None
+        # Receives the disk usage shown in the confirmation, measured off the main loop.
+        self._preview: Optional['queue.Queue[Optional[DiskUsage]]'] = None
 
         self.uid = uid
 
@@ -35,6 +52,10 @@ class DirectoryCleaner(tk.Frame):
         self.directory_picker.set_directory(self.load_user_directory())
         self.directory_picker.grid(row=0, column=0, sticky=tk.EW)
 
+        # Label - Deletion Progress
+        self.progress_label = tk.Label(self, text="", fg=Colors.BLUE_GRAY_DARK, bg=Colors.BLUE_GRAY)
+        self.progress_label.grid(row=0, column=1, padx=(10, 0), sticky=tk.E)
+
         # Button - Delete Contents
         self.delete_button = ttk.Button(
             self,
@@ -52,6 +73,14 @@ class DirectoryCleaner(tk.Frame):
         self.save_user_directory(self.directory_picker.get_directory())
 
     def _delete_contents(self) -> None:
+        if self._deletion is not None:
+            app_logger.debug("Cancelling deletion in %s", self._deletion.directory)
+            self._deletion.cancel()
+            self.delete_button.config(text="Cancelling...", state=tk.DISABLED)
+            return
+        if self._preview is not None:
+            return
+
         directory = self.directory_picker.get_directory()
 
         if not directory or not os.path.isdir(directory):
@@ -59,32 +88,109 @@ class DirectoryCleaner(tk.Frame):
             messagebox.showerror("Error", "The specified directory does not exist.")
             return
 
+        if self._disk_usage is None:
+            self._confirm_deletion(directory, None)
+            return
+
+        # Scanning a large tree can take seconds, so it runs on a worker and the dialog opens once it is done.
+        self._preview = queue.Queue(maxsize=1)
+        threading.Thread(target=self._measure, args=(directory, self._preview), daemon=True).start()
+        self.delete_button.config(text="Measuring...", state=tk.DISABLED)
+        self.after(POLL_INTERVAL_MS, self._poll_preview, directory)
+
+    def _measure(self, directory: str, results: 'queue.Queue[Optional[DiskUsage]]') -> None:
+        usage = None
+        try:
+            usage = self._disk_usage.usage(directory)
+        except Exception:
+            app_logger.error("Failed to measure %s", directory, exc_info=True)
+        finally:
+            results.put(usage)
+
+    def _poll_preview(self, directory: str) -> None:
+        """Runs on the Tk main loop: asks for confirmation once the disk usage of ``directory`` is known."""
+        try:
+            usage = self._preview.get_nowait()
+        except queue.Empty:
+            self.after(POLL_INTERVAL_MS, self._poll_preview, directory)
+            return
+
+        self._preview = None
+        self.delete_button.config(text="Delete Contents", state=tk.NORMAL)
+        self._confirm_deletion(directory, usage)
+
+    def _confirm_deletion(self, directory: str, usage: Optional[DiskUsage]) -> None:
         prompt = f"Are you sure you want to delete all contents in {directory}?"
+        if usage is not None:
+            prompt += f"\n\n{usage.summary()}"
         if not messagebox.askyesno("Confirm", prompt):
             return
 
-        for item in os.listdir(directory):
-            item_path = os.path.join(directory, item)
-            try:
-                if os.path.isfile(item_path) or os.path.islink(item_path):
-                    os.remove(item_path)
-                elif os.path.isdir(item_path):
-                    shutil.rmtree(item_path)
-                app_logger.debug("Deleted %s", item_path)
+        self.save_user_directory(directory)
+        if self._purger is not None and self._clear_via_graveyard(directory):
+            return
+
+        self._deletion = DeletionJob(directory, keep=[GRAVEYARD_NAME]).start()
+        self.delete_button.config(text="Cancel")
+        self.after(POLL_INTERVAL_MS, self._poll_deletion)
+
+    def _clear_via_graveyard(self, directory: str) -> bool:
+        """Empty the directory by renaming its entries away; False if that is not possible here."""
+        report = self._purger.bury(directory)
+        if report.grave is None:
+            return False
+
+        message = f"Cleared {report.entries:,} items; they are being purged in the background."
+        if report.failures:
+            failed = '\n'.join(f"  {path}: {error}" for path, error in list(report.failures.items())[:10])
+            messagebox.showwarning("Delete Contents", f"{message}\n\nThese items could not be moved:\n{failed}")
+        else:
+            messagebox.showinfo("Success", message)
+        return True
+
+    def _poll_deletion(self) -> None:
+        """Runs on the Tk main loop: shows the latest progress and reports once the deletion has finished."""
+        progress = None
+        try:
+            while True:
+                progress = self._deletion.progress.get_nowait()
+        except queue.Empty:
+            pass
+        if progress is not None:
+            self._show_progress(progress)
+
+        if self._deletion.is_running():
+            self.after(POLL_INTERVAL_MS, self._poll_deletion)
+            return
 
-            except Exception as e:
-                app_logger.debug("Failed to delete: %s", item_path, exc_info=True)
-                messagebox.showerror("Error", f"Failed to delete {item_path}: {e}")
-                continue
+        report = self._deletion.join()
+        self._deletion = None
+        self.delete_button.config(text="Delete Contents", state=tk.NORMAL)
+        self.progress_label.config(text="")
 
-        self.save_user_directory(directory)
+        if report.succeeded:
+            messagebox.showinfo("Success", f"Contents deleted successfully.\n\n{report.summary()}")
+        else:
+            messagebox.showwarning("Delete Contents", report.summary())
 
-        app_logger.info("Contents deleted successfully: %s", directory)
-        messagebox.showinfo("Success", "Contents deleted successfully.")
+    def _show_progress(self, progress: DeletionProgress) -> None:
+        text = f"{progress.files:,} files, {progress.bytes / (1024 * 1024):,.1f} MB"
+        if progress.errors:
+            text += f", {progress.errors:,} errors"
+        self.progress_label.config(text=text)
+
+    def destroy(self) -> None:
+        if self._deletion is not None:
+            self._deletion.cancel()
+        super().destroy()
 
     def save_user_directory(self, directory) -> None:
-        if self._user_settings is not None:
-            self._user_settings.set_directory_to_police(self.uid, directory)
+        if self._user_settings is None:
+            return
+        changed = directory != self._user_settings.get_directory_to_police(self.uid)
+        self._user_settings.set_directory_to_police(self.uid, directory)
+        if changed and self._on_directory_change is not None:
+            self._on_directory_change(self.uid)
 
     def load_user_directory(self) -> str:
         return self._user_settings.get_directory_to_police(self.uid) if self._user_settings is not None else ''
@@ -1,7 +1,14 @@
 
+import threading
+
 import tkinter as tk
+from src.application_config.app_logger import app_logger
+from src.constants import DISK_USAGE_JSON
 from src.gui import DirectoryCleaner, TempFileGenerator
+from src.engine.file_center.disk_usage import DiskUsageIndex
 from src.engine.file_center.file_center_settings import FileCenterSettings
+from src.engine.file_center.graveyard import GraveyardPurger
+from src.engine.file_center.retention_enforcer import RetentionEnforcer
 
 
 class FileCenter(tk.Frame):
@@ -10,6 +17,22 @@ class FileCenter(tk.Frame):
 
         self.user_settings = user_settings
 
+        # Purges what the cleaners move into graveyards, starting with whatever the last session left behind.
+        self.purger = GraveyardPurger()
+        self.purger.resume(self.user_settings.directories_to_police.values())
+
+        # Brought up to date in the background, so the cleaners' confirmation prompts only pay for changes.
+        self.disk_usage = DiskUsageIndex(str(DISK_USAGE_JSON))
+        threading.Thread(
+            target=self.disk_usage.usage_many,
+            args=(list(self.user_settings.directories_to_police.values()),),
+            daemon=True,
+        ).start()
+
+        # Applies a directory's retention policy whenever it grows past its watch threshold.
+        self.retention = RetentionEnforcer(self.user_settings)
+        self.retention.sync()
+
         # Frame - Self
         self.grid_columnconfigure(0, weight=1)
         self.grid_columnconfigure(1, weight=1)
@@ -17,7 +40,10 @@ class FileCenter(tk.Frame):
         self.grid_rowconfigure(1, weight=1)
 
         # Frame - Directory Cleaner
-        self.directory_cleaner_0 = DirectoryCleaner(self, uid=0, user_settings=self.user_settings)
+        self.directory_cleaner_0 = DirectoryCleaner(
+            self, uid=0, user_settings=self.user_settings, purger=self.purger, disk_usage=self.disk_usage,
+            on_directory_change=self.retention.sync,
+        )
         self.directory_cleaner_0.grid(row=0, column=0, sticky=tk.EW, padx=10, pady=5)
 
         # Frame - Tempfile Generator
@@ -25,7 +51,10 @@ class FileCenter(tk.Frame):
         self.tempfile_gen01.grid(row=0, column=1, sticky=tk.EW, padx=10, pady=5)
 
         # Frame - Directory Cleaner
-        self.directory_cleaner_1 = DirectoryCleaner(self, uid=1, user_settings=self.user_settings)
+        self.directory_cleaner_1 = DirectoryCleaner(
+            self, uid=1, user_settings=self.user_settings, purger=self.purger, disk_usage=self.disk_usage,
+            on_directory_change=self.retention.sync,
+        )
         self.directory_cleaner_1.grid(row=1, column=0, sticky=tk.EW, padx=10, pady=5)
 
         # Frame - Tempfile Generator
@@ -34,4 +63,10 @@ class FileCenter(tk.Frame):
 
     def on_close(self):
         """Handle any cleanup necessary when the FileCenter is closed."""
-        pass
+        self.retention.stop(timeout=1)
+        # An unfinished purge is resumed on the next start.
+        self.purger.stop(timeout=1)
+        try:
+            self.disk_usage.save()
+        except OSError as e:
+            app_logger.error("Failed to save disk usage index: %s", e)
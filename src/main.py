@@ -38,6 +38,7 @@ class StephaTility(tk.Frame):
     def on_close(self):
         """Handle the window close event to save the configuration before exiting."""
         self.user_settings.save_settings()
+        self.file_center.on_close()
         self.thread_manager.stop_all_threads()
         self.master.destroy()
 
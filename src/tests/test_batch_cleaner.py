@@ -0,0 +1,111 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from src.engine.file_center.batch_cleaner import clean_all
+from src.engine.file_center.deletion_engine import DeletionJob
+from src.engine.file_center.file_center_settings import FileCenterSettings
+from src.engine.file_center.graveyard import GRAVEYARD_NAME
+
+
+class TestCleanAll(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        root = os.path.realpath(self.workdir.name)
+        self.first = os.path.join(root, 'first')
+        self.second = os.path.join(root, 'second')
+        self._write(self.first, 'a.txt', 100)
+        self._write(self.first, 'build/b.o', 200)
+        self._write(self.second, 'c.log', 300)
+        self.settings = FileCenterSettings(directories_to_police={
+            '0': self.first,
+            '1': self.second,
+            '2': os.path.join(self.first, 'build'),
+            '3': '',
+        })
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def _write(self, root, relative, size):
+        path = os.path.join(root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'x' * size)
+
+    def test_cleans_every_policed_directory(self):
+        report = clean_all(self.settings)
+
+        self.assertTrue(report.succeeded, report.summary())
+        self.assertEqual(set(report.reports), {self.first, self.second})
+        self.assertEqual(report.reports[self.first].bytes, 300)
+        self.assertEqual(report.bytes, 600)
+        self.assertEqual(report.nested, {os.path.join(self.first, 'build'): self.first})
+        self.assertEqual(os.listdir(self.first) + os.listdir(self.second), [])
+
+    def test_graveyard_is_left_to_the_purger(self):
+        self._write(self.first, os.path.join(GRAVEYARD_NAME, 'grave', 'old.txt'), 400)
+        report = clean_all(self.settings)
+
+        self.assertTrue(report.succeeded, report.summary())
+        self.assertEqual(os.listdir(self.first), [GRAVEYARD_NAME])
+        self.assertEqual(report.bytes, 600)
+
+    def test_one_directory_per_device_at_a_time(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+        run = DeletionJob.run
+
+        def tracked_run(job):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            try:
+                return run(job)
+            finally:
+                with lock:
+                    active[0] -= 1
+
+        with mock.patch.object(DeletionJob, 'run', tracked_run):
+            report = clean_all(self.settings)
+        self.assertEqual(len(report.reports), 2)
+        # Both directories live on the temporary directory's device.
+        self.assertEqual(peak[0], 1)
+
+    def test_symlinked_entries_are_resolved(self):
+        link = os.path.join(self.workdir.name, 'link')
+        os.symlink(self.first, link)
+        inner_link = os.path.join(self.workdir.name, 'inner')
+        os.symlink(os.path.join(self.first, 'build'), inner_link)
+        self.settings.set_directory_to_police(3, link)
+        self.settings.set_directory_to_police(4, inner_link)
+        report = clean_all(self.settings)
+
+        self.assertTrue(report.succeeded, report.summary())
+        self.assertEqual(set(report.reports), {self.first, self.second})
+        self.assertEqual(report.nested, {os.path.join(self.first, 'build'): self.first})
+        self.assertEqual(report.bytes, 600)
+
+    def test_missing_directory_is_reported(self):
+        missing = os.path.join(self.workdir.name, 'missing')
+        self.settings.set_directory_to_police(3, missing)
+        report = clean_all(self.settings)
+
+        self.assertFalse(report.succeeded)
+        self.assertIn(missing, report.skipped)
+        self.assertIn('skipped', report.summary())
+
+    def test_cancelled(self):
+        stop_event = threading.Event()
+        stop_event.set()
+        report = clean_all(self.settings, stop_event=stop_event)
+
+        self.assertTrue(all(result.cancelled for result in report.reports.values()))
+        self.assertEqual(len(os.listdir(self.first)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from src.engine.cryptography_center import benchmarks
+from src.engine.cryptography_center.cipher import Cipher
+
+ROW_KEYS = {
+    'strategy', 'path', 'operation', 'bytes', 'chunk_size',
+    'repetitions', 'mb_per_s', 'ops_per_s', 'p50_ms', 'p99_ms', 'peak_traced_mb',
+}
+
+
+class TestSuite(unittest.TestCase):
+
+    def test_suite_json_schema(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = benchmarks.run_suite(
+                [64, 1024], [512], min_seconds=0, min_repetitions=1, strategies=['aes-cfb8', 'aes-ctr', 'rsa-oaep']
+            )
+        document = json.loads(json.dumps(benchmarks.suite_document(results)))
+
+        self.assertEqual(set(document), {'environment', 'results'})
+        self.assertIn('pycryptodome', document['environment'])
+        for row in document['results']:
+            self.assertEqual(set(row), ROW_KEYS)
+            self.assertGreaterEqual(row['repetitions'], 1)
+        # Every strategy runs encrypt and decrypt over both paths, except that RSA skips what it cannot hold.
+        cases = {(row['strategy'], row['bytes']) for row in document['results']}
+        self.assertEqual(cases, {('aes-cfb8', 64), ('aes-cfb8', 1024), ('aes-ctr', 64), ('aes-ctr', 1024),
+                                 ('rsa-oaep', 64)})
+        self.assertEqual(len(document['results']), len(cases) * 4)
+
+
+class TestFileCases(unittest.TestCase):
+
+    def test_allocation_per_byte_is_measured(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            source = os.path.join(workdir, 'payload.bin')
+            benchmarks.write_payload(source, 4 * benchmarks.MB)
+            rows = {name: benchmarks.run_file_case(name, source, 64 * 1024) for name in ('whole_file', 'streaming')}
+
+        # Holding the whole file needs at least one payload-sized buffer; streaming only holds chunks.
+        self.assertGreaterEqual(rows['whole_file']['allocated_per_byte'], 1.0)
+        self.assertLess(rows['streaming']['allocated_per_byte'], 0.5)
+        self.assertIn('alloc/B', benchmarks.format_row(rows['streaming']))
+
+
+class TestAESModeStrategies(unittest.TestCase):
+
+    def test_roundtrip_of_every_mode(self):
+        key = Cipher.generate_key(32)
+        payload = os.urandom(10_001)
+        for name in ('aes-cfb128', 'aes-ctr', 'aes-ofb'):
+            with self.subTest(name):
+                strategy = benchmarks.SUITE_STRATEGIES[name](key, None)
+                cipher = Cipher(strategy)
+                self.assertEqual(strategy.decrypt(strategy.encrypt(payload)), payload)
+                self.assertNotEqual(strategy.encrypt(payload), strategy.encrypt(payload))
+
+                for chunk_size in (1, 7, 4096):
+                    encrypted, decrypted = io.BytesIO(), io.BytesIO()
+                    cipher.encrypt_stream(io.BytesIO(payload), encrypted, chunk_size)
+                    cipher.decrypt_stream(io.BytesIO(encrypted.getvalue()), decrypted, chunk_size)
+                    self.assertEqual(decrypted.getvalue(), payload)
+                    # The stream format is the whole-buffer format.
+                    self.assertEqual(strategy.decrypt(encrypted.getvalue()), payload)
+
+                empty = io.BytesIO()
+                cipher.encrypt_stream(io.BytesIO(b''), empty)
+                self.assertEqual(strategy.decrypt(empty.getvalue()), b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
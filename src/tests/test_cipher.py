@@ -0,0 +1,436 @@
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from Crypto.PublicKey import RSA
+
+from src.engine.cryptography_center.cipher import Cipher
+from src.engine.cryptography_center.compressed_encryption import CompressedEncryptionStrategy
+from src.engine.cryptography_center.encryption_strategy import AESEncryptionStrategy, HybridEncryptionStrategy
+from src.engine.cryptography_center.segmented_encryption import HEADER_SIZE, SegmentedAESEncryptionStrategy
+
+
+class TestCipherStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.strategy = AESEncryptionStrategy(Cipher.generate_key(32))
+        self.cipher = Cipher(self.strategy)
+        self.workdir = tempfile.TemporaryDirectory()
+        self.payload = os.urandom(100_003)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.workdir.name, name)
+
+    def test_encrypt_decrypt_string(self):
+        encrypted = self.cipher.encrypt('Hello, World!')
+        self.assertEqual(self.cipher.decrypt(encrypted), 'Hello, World!')
+
+    def test_encrypt_many_matches_single_calls(self):
+        records = ['secret', b'\xff\xfe binary', '', 'x' * 1000]
+        encrypted = self.cipher.encrypt_many(iter(records))
+        self.assertNotIsInstance(encrypted, list)
+        encrypted = list(encrypted)
+
+        self.assertEqual([self.cipher.decrypt(item) for item in encrypted], records)
+        self.assertEqual(list(self.cipher.decrypt_many(encrypted)), records)
+        self.assertEqual(len({item[:24] for item in encrypted}), len(records))
+
+    def test_stream_roundtrip_with_odd_chunk_sizes(self):
+        for chunk_size in (1, 7, 16, 4096, 1_000_000):
+            encrypted = io.BytesIO()
+            self.cipher.encrypt_stream(io.BytesIO(self.payload), encrypted, chunk_size)
+            decrypted = io.BytesIO()
+            self.cipher.decrypt_stream(io.BytesIO(encrypted.getvalue()), decrypted, chunk_size)
+            self.assertEqual(decrypted.getvalue(), self.payload)
+
+    def test_stream_output_matches_whole_buffer_format(self):
+        encrypted = io.BytesIO()
+        self.cipher.encrypt_stream(io.BytesIO(self.payload), encrypted, 1024)
+        self.assertEqual(len(encrypted.getvalue()), len(self.payload) + 16)
+        self.assertEqual(self.strategy.decrypt(encrypted.getvalue()), self.payload)
+
+        whole = self.strategy.encrypt(self.payload)
+        decrypted = io.BytesIO()
+        self.cipher.decrypt_stream(io.BytesIO(whole), decrypted, 1024)
+        self.assertEqual(decrypted.getvalue(), self.payload)
+
+    def test_streams_use_fresh_ivs(self):
+        first, second = io.BytesIO(), io.BytesIO()
+        self.cipher.encrypt_stream(io.BytesIO(self.payload), first)
+        self.cipher.encrypt_stream(io.BytesIO(self.payload), second)
+        self.assertNotEqual(first.getvalue()[:16], second.getvalue()[:16])
+
+    def test_empty_stream(self):
+        encrypted = io.BytesIO()
+        self.cipher.encrypt_stream(io.BytesIO(b''), encrypted)
+        decrypted = io.BytesIO()
+        self.cipher.decrypt_stream(io.BytesIO(encrypted.getvalue()), decrypted)
+        self.assertEqual(decrypted.getvalue(), b'')
+
+    def test_file_roundtrip(self):
+        with open(self._path('plain.bin'), 'wb') as file:
+            file.write(self.payload)
+
+        read = self.cipher.encrypt_file(self._path('plain.bin'), self._path('cipher.bin'), chunk_size=4096)
+        self.cipher.decrypt_file(self._path('cipher.bin'), self._path('restored.bin'), chunk_size=333)
+
+        self.assertEqual(read, len(self.payload))
+        with open(self._path('restored.bin'), 'rb') as file:
+            self.assertEqual(file.read(), self.payload)
+
+    def test_mapped_file_roundtrip(self):
+        for payload in (self.payload, b''):
+            with open(self._path('plain.bin'), 'wb') as file:
+                file.write(payload)
+
+            self.cipher.encrypt_file_mapped(self._path('plain.bin'), self._path('cipher.bin'), chunk_size=4096)
+            self.assertEqual(os.path.getsize(self._path('cipher.bin')), len(payload) + 16)
+
+            self.cipher.decrypt_file(self._path('cipher.bin'), self._path('streamed.bin'))
+            self.cipher.decrypt_file_mapped(self._path('cipher.bin'), self._path('mapped.bin'), chunk_size=1000)
+            for name in ('streamed.bin', 'mapped.bin'):
+                with open(self._path(name), 'rb') as file:
+                    self.assertEqual(file.read(), payload)
+
+    def test_mapped_requires_mappable_strategy(self):
+        cipher = Cipher(SegmentedAESEncryptionStrategy(Cipher.generate_key(32)))
+        with self.assertRaises(TypeError):
+            cipher.encrypt_file_mapped(self._path('plain.bin'), self._path('cipher.bin'))
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            self.cipher.encrypt_stream(io.BytesIO(b'data'), io.BytesIO(), 0)
+
+
+class TestSegmentedEncryption(unittest.TestCase):
+
+    def setUp(self):
+        self.key = Cipher.generate_key(32)
+        self.strategy = SegmentedAESEncryptionStrategy(self.key, segment_size=1000)
+        self.cipher = Cipher(self.strategy)
+        self.workdir = tempfile.TemporaryDirectory()
+        self.payload = os.urandom(10_500)
+        self.plain_path = os.path.join(self.workdir.name, 'plain.bin')
+        self.cipher_path = os.path.join(self.workdir.name, 'cipher.bin')
+        with open(self.plain_path, 'wb') as file:
+            file.write(self.payload)
+        self.cipher.encrypt_file(self.plain_path, self.cipher_path, chunk_size=777)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_roundtrip(self):
+        for size in (0, 1, 999, 1000, 1001, 3000):
+            data = self.payload[:size]
+            self.assertEqual(self.strategy.decrypt(self.strategy.encrypt(data)), data)
+
+    def test_file_roundtrip(self):
+        restored = os.path.join(self.workdir.name, 'restored.bin')
+        self.cipher.decrypt_file(self.cipher_path, restored, chunk_size=123)
+        with open(restored, 'rb') as file:
+            self.assertEqual(file.read(), self.payload)
+
+    def test_read_range(self):
+        for offset, length in ((0, 10), (995, 10), (1000, 1000), (10_400, 500), (0, 20_000), (10_500, 5)):
+            self.assertEqual(
+                self.cipher.read_range(self.cipher_path, offset, length),
+                self.payload[offset:offset + length],
+            )
+
+    def test_plaintext_size(self):
+        with open(self.cipher_path, 'rb') as reader:
+            self.assertEqual(self.strategy.plaintext_size(reader), len(self.payload))
+
+    def test_tampered_segment_is_detected(self):
+        with open(self.cipher_path, 'r+b') as file:
+            file.seek(HEADER_SIZE + 1028 * 3 + 50)
+            byte = file.read(1)
+            file.seek(-1, 1)
+            file.write(bytes([byte[0] ^ 1]))
+
+        self.assertEqual(self.cipher.read_range(self.cipher_path, 0, 100), self.payload[:100])
+        with self.assertRaises(ValueError):
+            self.cipher.read_range(self.cipher_path, 3000, 100)
+
+    def test_truncation_is_detected(self):
+        encrypted = self.strategy.encrypt(self.payload)
+        with self.assertRaises(ValueError):
+            self.strategy.decrypt(encrypted[:HEADER_SIZE + 1028 * 2])
+
+    def test_zero_segment_size_is_rejected(self):
+        with open(self.cipher_path, 'r+b') as file:
+            file.seek(HEADER_SIZE - 4)
+            file.write(bytes(4))
+
+        with self.assertRaises(ValueError):
+            self.cipher.read_range(self.cipher_path, 0, 10)
+        with open(self.cipher_path, 'rb') as reader, self.assertRaises(ValueError):
+            self.strategy.plaintext_size(reader)
+
+    def test_read_range_requires_seekable_strategy(self):
+        cipher = Cipher(AESEncryptionStrategy(self.key))
+        with self.assertRaises(TypeError):
+            cipher.read_range(self.cipher_path, 0, 10)
+
+    def test_parallel_decryption(self):
+        restored_path = os.path.join(self.workdir.name, 'restored.bin')
+        # Three segments per job, so the 11 segments are spread over several jobs with a short last one.
+        with mock.patch('src.engine.cryptography_center.segmented_encryption.PARALLEL_RUN_SIZE', 3000):
+            for max_workers in (1, 2, 4):
+                self.assertEqual(self.cipher.decrypt_file_parallel(self.cipher_path, restored_path, max_workers),
+                                 len(self.payload))
+                with open(restored_path, 'rb') as file:
+                    self.assertEqual(file.read(), self.payload)
+
+    def test_parallel_decryption_of_empty_file(self):
+        empty_path = os.path.join(self.workdir.name, 'empty.bin')
+        restored_path = os.path.join(self.workdir.name, 'restored.bin')
+        with open(empty_path, 'wb') as file:
+            file.write(self.strategy.encrypt(b''))
+        self.assertEqual(self.cipher.decrypt_file_parallel(empty_path, restored_path), 0)
+        self.assertEqual(os.path.getsize(restored_path), 0)
+
+    def test_parallel_decryption_failure_removes_output(self):
+        restored_path = os.path.join(self.workdir.name, 'restored.bin')
+        with open(self.cipher_path, 'r+b') as file:
+            file.seek(HEADER_SIZE + 1028 * 7 + 50)
+            byte = file.read(1)
+            file.seek(-1, 1)
+            file.write(bytes([byte[0] ^ 1]))
+
+        with self.assertRaises(ValueError):
+            self.cipher.decrypt_file_parallel(self.cipher_path, restored_path, max_workers=3)
+        self.assertFalse(os.path.exists(restored_path))
+
+    def test_parallel_decryption_requires_parallel_strategy(self):
+        cipher = Cipher(AESEncryptionStrategy(self.key))
+        with self.assertRaises(TypeError):
+            cipher.decrypt_file_parallel(self.cipher_path, os.path.join(self.workdir.name, 'restored.bin'))
+
+
+class TestCipherTree(unittest.TestCase):
+
+    def setUp(self):
+        self.cipher = Cipher(AESEncryptionStrategy(Cipher.generate_key(32)))
+        self.workdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.workdir.name, 'source')
+        self.files = {
+            'a.txt': os.urandom(10),
+            os.path.join('nested', 'b.bin'): os.urandom(5000),
+            os.path.join('nested', 'deeper', 'c.log'): b'',
+        }
+        for relative, data in self.files.items():
+            path = os.path.join(self.source, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(data)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_tree_roundtrip(self):
+        encrypted = os.path.join(self.workdir.name, 'encrypted')
+        restored = os.path.join(self.workdir.name, 'restored')
+
+        report = self.cipher.encrypt_tree(self.source, encrypted, max_workers=2)
+        self.assertTrue(report.succeeded)
+        self.assertEqual(report.files, 3)
+        self.assertEqual(report.bytes, sum(len(data) for data in self.files.values()))
+        self.assertTrue(os.path.isfile(os.path.join(encrypted, 'nested', 'b.bin.enc')))
+
+        report = self.cipher.decrypt_tree(encrypted, restored)
+        self.assertEqual(report.files, 3)
+        for relative, data in self.files.items():
+            with open(os.path.join(restored, relative), 'rb') as file:
+                self.assertEqual(file.read(), data)
+
+    def test_failures_are_reported_per_file(self):
+        encrypted = os.path.join(self.workdir.name, 'encrypted')
+        with open(os.path.join(self.source, 'broken.enc'), 'wb') as file:
+            file.write(b'short')
+
+        report = self.cipher.decrypt_tree(self.source, encrypted)
+        self.assertFalse(report.succeeded)
+        self.assertEqual(list(report.failures), [os.path.join(self.source, 'broken.enc')])
+
+
+class TestHybridEncryption(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        private_key, public_key = Cipher.generate_rsa_keypair(2048)
+        cls.private_key = RSA.import_key(private_key)
+        cls.public_key = RSA.import_key(public_key)
+
+    def setUp(self):
+        self.cipher = Cipher(HybridEncryptionStrategy(self.public_key, self.private_key))
+
+    def test_payload_larger_than_modulus(self):
+        payload = os.urandom(50_000)
+        self.assertEqual(self.cipher.strategy.decrypt(self.cipher.strategy.encrypt(payload)), payload)
+        self.assertEqual(self.cipher.decrypt(self.cipher.encrypt('Hello, RSA!')), 'Hello, RSA!')
+
+    def test_stream_roundtrip(self):
+        payload = os.urandom(70_001)
+        for chunk_size in (1, 100, 65536):
+            encrypted, decrypted = io.BytesIO(), io.BytesIO()
+            self.cipher.encrypt_stream(io.BytesIO(payload), encrypted, chunk_size)
+            self.cipher.decrypt_stream(io.BytesIO(encrypted.getvalue()), decrypted, chunk_size)
+            self.assertEqual(decrypted.getvalue(), payload)
+
+    def test_tampering_is_detected(self):
+        encrypted = bytearray(self.cipher.strategy.encrypt(b'important data'))
+        encrypted[-20] ^= 1
+        with self.assertRaises(ValueError):
+            self.cipher.strategy.decrypt(bytes(encrypted))
+
+    def test_tampered_file_leaves_no_output(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            source, encrypted, decrypted = (os.path.join(workdir, name) for name in ('plain', 'enc', 'dec'))
+            with open(source, 'wb') as file:
+                file.write(os.urandom(200_000))
+            self.cipher.encrypt_file(source, encrypted)
+            with open(encrypted, 'r+b') as file:
+                file.seek(-1, os.SEEK_END)
+                last = file.read(1)
+                file.seek(-1, os.SEEK_END)
+                file.write(bytes([last[0] ^ 1]))
+
+            with self.assertRaises(ValueError):
+                self.cipher.decrypt_file(encrypted, decrypted, chunk_size=4096)
+            self.assertEqual(sorted(os.listdir(workdir)), ['enc', 'plain'])
+
+    def test_public_key_only_cannot_decrypt(self):
+        cipher = Cipher(HybridEncryptionStrategy(self.public_key))
+        encrypted = cipher.strategy.encrypt(b'data')
+        with self.assertRaises(ValueError):
+            cipher.strategy.decrypt(encrypted)
+
+
+class TestCompressedEncryption(unittest.TestCase):
+
+    def setUp(self):
+        self.inner = AESEncryptionStrategy(Cipher.generate_key(32))
+        self.text = b''.join(b'2024-01-01 INFO request %d served\n' % i for i in range(20_000))
+
+    def _roundtrip(self, strategy, payload, chunk_size=4096):
+        cipher = Cipher(strategy)
+        encrypted, decrypted = io.BytesIO(), io.BytesIO()
+        cipher.encrypt_stream(io.BytesIO(payload), encrypted, chunk_size)
+        cipher.decrypt_stream(io.BytesIO(encrypted.getvalue()), decrypted, chunk_size)
+        self.assertEqual(decrypted.getvalue(), payload)
+        return encrypted.getvalue()
+
+    def test_text_is_compressed_with_every_codec(self):
+        for codec in ('zlib', 'lzma', 'bz2'):
+            encrypted = self._roundtrip(CompressedEncryptionStrategy(self.inner, codec, sample_size=1000), self.text)
+            self.assertLess(len(encrypted), len(self.text) // 5)
+
+    def test_random_data_is_stored_uncompressed(self):
+        payload = os.urandom(200_000)
+        encrypted = self._roundtrip(CompressedEncryptionStrategy(self.inner), payload)
+        self.assertEqual(len(encrypted), len(payload) + 16 + 1)
+
+    def test_small_and_empty_payloads(self):
+        strategy = CompressedEncryptionStrategy(self.inner)
+        for payload in (b'', b'a', self.text[:100]):
+            self._roundtrip(strategy, payload, chunk_size=7)
+            self.assertEqual(strategy.decrypt(strategy.encrypt(payload)), payload)
+
+    def test_works_with_authenticated_inner_strategy(self):
+        inner = SegmentedAESEncryptionStrategy(Cipher.generate_key(32), segment_size=512)
+        self._roundtrip(CompressedEncryptionStrategy(inner, 'lzma'), self.text, chunk_size=1000)
+
+    def test_decompression_bomb_is_refused(self):
+        for codec in ('zlib', 'lzma', 'bz2'):
+            strategy = CompressedEncryptionStrategy(self.inner, codec, max_output_size=1024 * 1024)
+            encrypted = strategy.encrypt(bytes(8 * 1024 * 1024))
+            self.assertLess(len(encrypted), 64 * 1024)
+            with self.assertRaises(ValueError):
+                strategy.decrypt(encrypted)
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            CompressedEncryptionStrategy(self.inner, 'zstd')
+
+
+class TestCipherAsync(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.cipher = Cipher(AESEncryptionStrategy(Cipher.generate_key(32)))
+        self.workdir = tempfile.TemporaryDirectory()
+        self.payload = os.urandom(50_000)
+        self.plain_path = os.path.join(self.workdir.name, 'plain.bin')
+        with open(self.plain_path, 'wb') as file:
+            file.write(self.payload)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.workdir.name, name)
+
+    async def test_file_roundtrip_with_progress(self):
+        updates = []
+        read = await self.cipher.encrypt_file_async(
+            self.plain_path, self._path('cipher.bin'), chunk_size=10_000, progress=lambda *args: updates.append(args)
+        )
+        await self.cipher.decrypt_file_async(self._path('cipher.bin'), self._path('restored.bin'))
+
+        self.assertEqual(read, len(self.payload))
+        self.assertEqual(updates[-1], (len(self.payload), len(self.payload)))
+        self.assertEqual(len(updates), 5)
+        with open(self._path('restored.bin'), 'rb') as file:
+            self.assertEqual(file.read(), self.payload)
+
+    async def test_concurrent_operations(self):
+        await asyncio.gather(*(
+            self.cipher.encrypt_file_async(self.plain_path, self._path(f'cipher_{index}.bin'), chunk_size=4096)
+            for index in range(20)
+        ))
+        for index in range(20):
+            self.assertEqual(self.cipher.strategy.decrypt(Cipher.read_from_file(self._path(f'cipher_{index}.bin'))),
+                             self.payload)
+
+    async def test_cancellation_removes_partial_output(self):
+        started = asyncio.Event()
+        task = asyncio.create_task(self.cipher.encrypt_file_async(
+            self.plain_path, self._path('cipher.bin'), chunk_size=1, progress=lambda *args: started.set()
+        ))
+        await started.wait()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertFalse(os.path.exists(self._path('cipher.bin')))
+
+    async def test_failed_decryption_keeps_existing_output(self):
+        cipher = Cipher(SegmentedAESEncryptionStrategy(Cipher.generate_key(32), segment_size=1000))
+        await cipher.encrypt_file_async(self.plain_path, self._path('cipher.bin'))
+        with open(self._path('cipher.bin'), 'r+b') as file:
+            file.seek(-1, os.SEEK_END)
+            last = file.read(1)
+            file.seek(-1, os.SEEK_END)
+            file.write(bytes([last[0] ^ 1]))
+        with open(self._path('restored.bin'), 'wb') as file:
+            file.write(b'previous')
+
+        with self.assertRaises(ValueError):
+            await cipher.decrypt_file_async(self._path('cipher.bin'), self._path('restored.bin'), chunk_size=4096)
+        with open(self._path('restored.bin'), 'rb') as file:
+            self.assertEqual(file.read(), b'previous')
+        self.assertEqual(sorted(os.listdir(self.workdir.name)), ['cipher.bin', 'plain.bin', 'restored.bin'])
+
+    async def test_encrypt_many_async(self):
+        records = [f'record {index}' for index in range(1000)]
+        encrypted = [item async for item in self.cipher.encrypt_many_async(records, batch_size=64)]
+        self.assertEqual(list(self.cipher.decrypt_many(encrypted)), records)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from src.engine.cryptography_center.cipher import Cipher
+from src.engine.cryptography_center.credential_vault import CredentialVault
+from src.engine.cryptography_center.encryption_strategy import AESEncryptionStrategy
+
+
+class TestCredentialVault(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.workdir.name, 'vault.dat')
+        self.cipher = Cipher(AESEncryptionStrategy(Cipher.generate_key(32)))
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def _vault(self, **kwargs):
+        vault = CredentialVault(self.path, self.cipher, **kwargs)
+        self.addCleanup(vault.close)
+        return vault
+
+    def test_set_get_delete(self):
+        vault = self._vault()
+        vault.set('github', 'hunter2')
+        vault.set('gitlab', 'correct horse')
+        vault.set('github', 'hunter3')
+
+        self.assertEqual(vault.get('github'), 'hunter3')
+        self.assertEqual(vault.get('gitlab'), 'correct horse')
+        self.assertIsNone(vault.get('bitbucket'))
+        self.assertTrue(vault.delete('gitlab'))
+        self.assertFalse(vault.delete('gitlab'))
+        self.assertEqual(dict(vault.items()), {'github': 'hunter3'})
+        self.assertEqual(vault.dead_records, 3)
+
+    def test_updates_append_a_single_record(self):
+        vault = self._vault()
+        for index in range(10):
+            vault.set(f'source {index}', 'password')
+        size = os.path.getsize(self.path)
+        vault.set('source 3', 'new password')
+        with open(self.path, 'rb') as file:
+            lines = file.readlines()
+        self.assertEqual(len(lines), 11)
+        self.assertEqual(os.path.getsize(self.path) - size, len(lines[-1]))
+
+    def test_records_are_encrypted_and_persisted(self):
+        vault = self._vault()
+        vault.set('github', 'hunter2')
+        vault.set('gitlab', 'correct horse')
+        vault.delete('gitlab')
+        vault.close()
+
+        with open(self.path, 'rb') as file:
+            self.assertNotIn(b'hunter2', file.read())
+        reopened = self._vault()
+        self.assertEqual(dict(reopened.items()), {'github': 'hunter2'})
+
+    def test_manual_compaction_keeps_live_records(self):
+        vault = self._vault(min_dead_records=10_000)
+        for index in range(50):
+            vault.set('rotating', f'password {index}')
+            vault.set(f'source {index}', 'x')
+        vault.delete('source 0')
+        size = os.path.getsize(self.path)
+
+        vault.compact()
+        self.assertLess(os.path.getsize(self.path), size)
+        self.assertEqual(vault.dead_records, 0)
+        self.assertEqual(vault.get('rotating'), 'password 49')
+        self.assertNotIn('source 0', vault)
+        self.assertEqual(len(self._vault()), 50)
+
+    def test_background_compaction_with_concurrent_writers(self):
+        vault = self._vault(compaction_threshold=0.5, min_dead_records=20)
+
+        def writer(name):
+            for index in range(200):
+                vault.set(name, f'{name} {index}')
+
+        threads = [threading.Thread(target=writer, args=(f'writer {index}',)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if vault._compaction is not None:
+            vault._compaction.join()
+
+        expected = {f'writer {index}': f'writer {index} 199' for index in range(4)}
+        self.assertEqual(dict(vault.items()), expected)
+        vault.close()
+        with open(self.path, 'rb') as file:
+            self.assertLess(len(file.readlines()), 800)
+        self.assertEqual(dict(self._vault().items()), expected)
+
+    @unittest.skipUnless(os.path.isdir('/proc/self/fd'), "needs /proc to list open files")
+    def test_compaction_closes_files_before_replacing(self):
+        vault = self._vault()
+        for index in range(10):
+            vault.set('github', f'token-{index}')
+        real_replace = os.replace
+        still_open = []
+
+        def replace(source, target):
+            # Windows refuses to rename over (or away) a file that is still open.
+            for descriptor in os.listdir('/proc/self/fd'):
+                try:
+                    path = os.readlink(f'/proc/self/fd/{descriptor}')
+                except OSError:
+                    continue
+                if path in (os.path.realpath(source), os.path.realpath(target)):
+                    still_open.append(path)
+            real_replace(source, target)
+
+        with mock.patch('os.replace', side_effect=replace):
+            vault.compact()
+        self.assertEqual(still_open, [])
+        self.assertEqual(vault.get('github'), 'token-9')
+
+    def test_torn_last_record_is_dropped(self):
+        vault = self._vault()
+        vault.set('github', 'hunter2')
+        vault.set('gitlab', 'correct horse')
+        vault.close()
+        with open(self.path, 'rb') as file:
+            intact = file.read()
+        # A crash in the middle of appending a third record.
+        with open(self.path, 'ab') as file:
+            file.write(intact.splitlines()[0][:17])
+
+        reopened = self._vault()
+        self.assertEqual(dict(reopened.items()), {'github': 'hunter2', 'gitlab': 'correct horse'})
+        reopened.set('bitbucket', 'swordfish')
+        reopened.close()
+        self.assertEqual(len(self._vault()), 3)
+
+    def test_manual_and_background_compactions_do_not_collide(self):
+        vault = self._vault(compaction_threshold=0.5, min_dead_records=10)
+        stop = threading.Event()
+
+        def compactor():
+            while not stop.is_set():
+                vault.compact()
+
+        compactors = [threading.Thread(target=compactor) for _ in range(2)]
+        for thread in compactors:
+            thread.start()
+        for index in range(300):
+            vault.set(f'source {index % 7}', f'password {index}')
+        stop.set()
+        for thread in compactors:
+            thread.join()
+        if vault._compaction is not None:
+            vault._compaction.join()
+
+        expected = {f'source {index % 7}': f'password {index}' for index in range(300)}
+        self.assertEqual(dict(vault.items()), expected)
+        vault.close()
+        self.assertEqual(dict(self._vault().items()), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import stat
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from src.engine.file_center import deletion_engine
+from src.engine.file_center.deletion_engine import DeletionJob
+
+
+class TestDeletionJob(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.workdir.name, 'police')
+        self.files = {}
+        for relative in ('a.txt', 'sub/b.txt', 'sub/deep/c.txt', 'sub/deep/deeper/d.txt', 'other/e.txt'):
+            path = os.path.join(self.root, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(os.urandom(len(relative) * 10))
+            self.files[path] = len(relative) * 10
+        os.makedirs(os.path.join(self.root, 'empty'))
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_deletes_contents_but_keeps_directory(self):
+        report = DeletionJob(self.root, max_workers=3).run()
+
+        self.assertTrue(report.succeeded)
+        self.assertEqual(os.listdir(self.root), [])
+        self.assertEqual(report.files, len(self.files))
+        self.assertEqual(report.bytes, sum(self.files.values()))
+        self.assertEqual(report.directories, 5)
+
+    def test_kept_entries_are_left_alone(self):
+        report = DeletionJob(self.root, keep=['sub', 'e.txt']).run()
+
+        self.assertTrue(report.succeeded)
+        # Only entries of the directory itself are kept, other/e.txt is deleted with its directory.
+        self.assertEqual(os.listdir(self.root), ['sub'])
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'sub', 'deep', 'deeper', 'd.txt')))
+        self.assertEqual(report.files, 2)
+
+    def test_symlinks_are_removed_not_followed(self):
+        outside = os.path.join(self.workdir.name, 'outside')
+        os.makedirs(outside)
+        with open(os.path.join(outside, 'keep.txt'), 'w') as file:
+            file.write('keep')
+        os.symlink(outside, os.path.join(self.root, 'link'))
+
+        DeletionJob(self.root).run()
+        self.assertEqual(os.listdir(self.root), [])
+        self.assertTrue(os.path.exists(os.path.join(outside, 'keep.txt')))
+
+    def test_nested_directory_links_are_not_followed(self):
+        outside = os.path.join(self.workdir.name, 'outside')
+        os.makedirs(os.path.join(outside, 'inner'))
+        with open(os.path.join(outside, 'inner', 'keep.txt'), 'w') as file:
+            file.write('keep')
+        os.symlink(outside, os.path.join(self.root, 'sub', 'deep', 'link'))
+
+        report = DeletionJob(self.root, max_workers=3).run()
+        self.assertTrue(report.succeeded, report.summary())
+        self.assertEqual(os.listdir(self.root), [])
+        self.assertTrue(os.path.exists(os.path.join(outside, 'inner', 'keep.txt')))
+
+    def test_junctions_count_as_links(self):
+        directory = stat.S_IFDIR | 0o777
+        junction = SimpleNamespace(st_mode=directory, st_file_attributes=stat.FILE_ATTRIBUTE_REPARSE_POINT,
+                                   st_reparse_tag=0xA0000003)
+        placeholder = SimpleNamespace(st_mode=directory, st_file_attributes=stat.FILE_ATTRIBUTE_REPARSE_POINT,
+                                      st_reparse_tag=0)
+        self.assertTrue(deletion_engine._is_link(junction))
+        self.assertFalse(deletion_engine._is_link(placeholder))
+        self.assertFalse(deletion_engine._is_link(os.stat(self.root)))
+        link = os.path.join(self.root, 'link')
+        os.symlink(self.workdir.name, link)
+        self.assertTrue(deletion_engine._is_link(os.lstat(link)))
+
+    def test_background_run_reports_progress(self):
+        job = DeletionJob(self.root, progress_interval=0).start()
+        report = job.join(timeout=10)
+
+        updates = []
+        while not job.progress.empty():
+            updates.append(job.progress.get())
+        self.assertFalse(job.is_running())
+        self.assertTrue(updates[-1].done)
+        self.assertEqual(updates[-1].files, report.files)
+        self.assertEqual([update.files for update in updates], sorted(update.files for update in updates))
+
+    def test_failures_are_collected_into_one_report(self):
+        locked = os.path.join(self.root, 'sub', 'deep', 'c.txt')
+        real_remove = os.remove
+
+        def remove(path):
+            if path == locked:
+                raise PermissionError(13, 'Permission denied', path)
+            real_remove(path)
+
+        with mock.patch('os.remove', side_effect=remove), mock.patch('os.chmod'):
+            report = DeletionJob(self.root).run()
+
+        self.assertFalse(report.succeeded)
+        # Only the file itself is reported, not the directories that still contain it.
+        self.assertEqual(list(report.failures), [locked])
+        self.assertIn(locked, report.summary())
+        self.assertTrue(os.path.exists(locked))
+        self.assertEqual(report.files, len(self.files) - 1)
+
+    def test_cancellation(self):
+        stop_event = threading.Event()
+        stop_event.set()
+        report = DeletionJob(self.root, stop_event=stop_event).run()
+
+        self.assertTrue(report.cancelled)
+        self.assertFalse(report.succeeded)
+        self.assertIn('cancelled', report.summary())
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'sub', 'deep', 'c.txt')))
+
+    def test_missing_directory(self):
+        report = DeletionJob(os.path.join(self.workdir.name, 'missing')).run()
+        self.assertEqual(len(report.failures), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
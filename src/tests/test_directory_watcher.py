@@ -0,0 +1,173 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from src.engine.file_center.directory_watcher import DirectoryWatcher, WatchThreshold
+from src.engine.file_center.file_center_settings import FileCenterSettings
+from src.engine.file_center.graveyard import GRAVEYARD_NAME, bury
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class TestDirectoryWatcher(unittest.TestCase):
+    use_inotify = True
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.workdir.name, 'police')
+        self._write('a.txt', 100)
+        self._write('build/b.o', 1000)
+        self.triggered = []
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def _write(self, relative, size):
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'x' * size)
+
+    def _watcher(self, threshold=None, **kwargs):
+        kwargs.setdefault('poll_interval', 0.05)
+        watcher = DirectoryWatcher(settle=0.1, use_inotify=self.use_inotify, **kwargs)
+        self.addCleanup(watcher.stop, 5)
+        watcher.watch(self.root, threshold or WatchThreshold(), self.triggered.append)
+        self.assertTrue(_wait_for(lambda: watcher.totals(self.root) is not None))
+        if self.use_inotify and watcher.mode != 'inotify':
+            self.skipTest("inotify is not available")
+        return watcher
+
+    def _counts(self, watcher):
+        totals = watcher.totals(self.root)
+        return totals.files, totals.directories, totals.bytes
+
+    def test_totals_follow_changes(self):
+        watcher = self._watcher()
+        self.assertEqual(self._counts(watcher), (2, 1, 1100))
+
+        self._write('build/obj/c.o', 500)
+        self.assertTrue(_wait_for(lambda: self._counts(watcher) == (3, 2, 1600)), self._counts(watcher))
+
+        shutil.rmtree(os.path.join(self.root, 'build'))
+        self.assertTrue(_wait_for(lambda: self._counts(watcher) == (1, 0, 100)), self._counts(watcher))
+
+    def test_directories_moved_between_parents_stay_watched(self):
+        self._write('a/x/1.tmp', 10)
+        self._write('b/y/2.tmp', 10)
+        watcher = self._watcher()
+        self.assertTrue(_wait_for(lambda: watcher.evaluations))
+        evaluations = watcher.evaluations
+
+        # Swapping in both directions: whichever parent is read first, one move finds its target watched already.
+        os.rename(os.path.join(self.root, 'a/x'), os.path.join(self.root, 'b/x'))
+        os.rename(os.path.join(self.root, 'b/y'), os.path.join(self.root, 'a/y'))
+        self.assertTrue(_wait_for(lambda: watcher.evaluations > evaluations))
+        self.assertEqual(self._counts(watcher), (4, 5, 1120))
+
+        self._write('b/x/3.tmp', 10)
+        self._write('a/y/4.tmp', 10)
+        self.assertTrue(_wait_for(lambda: self._counts(watcher) == (6, 5, 1140)), self._counts(watcher))
+
+    def test_buried_files_no_longer_count(self):
+        watcher = self._watcher()
+        self.assertTrue(bury(self.root).succeeded)
+        self.assertTrue(_wait_for(lambda: self._counts(watcher) == (0, 0, 0)), self._counts(watcher))
+
+        self._write(f'{GRAVEYARD_NAME}/late/e.tmp', 10)
+        self._write('f.tmp', 10)
+        self.assertTrue(_wait_for(lambda: self._counts(watcher) == (1, 0, 10)), self._counts(watcher))
+
+    def test_threshold_triggers_cleanup_once(self):
+        watcher = self._watcher(WatchThreshold(max_files=3))
+        for index in range(3):
+            self._write(f'new/{index}.tmp', 10)
+
+        self.assertTrue(_wait_for(lambda: self.triggered))
+        self.assertEqual(self.triggered[0].files, 5)
+        # Still over the threshold, but within the cooldown.
+        self._write('new/more.tmp', 10)
+        self.assertTrue(_wait_for(lambda: self._counts(watcher)[0] == 6))
+        self.assertEqual(len(self.triggered), 1)
+
+
+class TestPollingDirectoryWatcher(TestDirectoryWatcher):
+    use_inotify = False
+
+
+class TestEventCoalescing(unittest.TestCase):
+
+    def test_burst_is_evaluated_once(self):
+        with tempfile.TemporaryDirectory() as root:
+            watcher = DirectoryWatcher(settle=0.5)
+            self.addCleanup(watcher.stop, 5)
+            watcher.watch(root, WatchThreshold(), lambda totals: None)
+            self.assertTrue(_wait_for(lambda: watcher.totals(root) is not None))
+            if watcher.mode != 'inotify':
+                self.skipTest("inotify is not available")
+            evaluations = watcher.evaluations
+
+            for index in range(2000):
+                with open(os.path.join(root, f'{index}.tmp'), 'wb') as file:
+                    file.write(b'x')
+
+            self.assertTrue(_wait_for(lambda: watcher.totals(root).files == 2000))
+            self.assertEqual(watcher.evaluations - evaluations, 1)
+
+
+class TestLocking(unittest.TestCase):
+
+    def test_scan_does_not_block_callers(self):
+        entered, release = threading.Event(), threading.Event()
+        read = DirectoryWatcher._read
+
+        def slow_read(path):
+            entered.set()
+            release.wait(5)
+            return read(path)
+
+        with tempfile.TemporaryDirectory() as root, \
+                mock.patch.object(DirectoryWatcher, '_read', staticmethod(slow_read)):
+            watcher = DirectoryWatcher(settle=0.1, poll_interval=0.05)
+            self.addCleanup(watcher.stop, 5)
+            watcher.watch(root, WatchThreshold(), lambda totals: None)
+            self.assertTrue(entered.wait(5))
+
+            # The watcher thread is in the middle of the initial scan.
+            start = time.monotonic()
+            self.assertIsNone(watcher.totals(root))
+            watcher.watch(os.path.join(root, 'other'), WatchThreshold(), lambda totals: None)
+            watcher.unwatch(os.path.join(root, 'other'))
+            self.assertLess(time.monotonic() - start, 1)
+            release.set()
+            self.assertTrue(_wait_for(lambda: watcher.totals(root) is not None))
+
+
+class TestWatchThresholdSettings(unittest.TestCase):
+
+    def test_thresholds_round_trip_per_uid(self):
+        settings = FileCenterSettings()
+        settings.set_watch_threshold(1, WatchThreshold(max_bytes=1024 ** 3))
+
+        reloaded = FileCenterSettings.from_dict(settings.as_dict())
+        self.assertEqual(reloaded.get_watch_threshold(1), WatchThreshold(max_bytes=1024 ** 3))
+        self.assertIsNone(reloaded.get_watch_threshold(0))
+        self.assertTrue(reloaded.validate())
+
+        reloaded.watch_thresholds['2'] = {'max_files': 'many'}
+        self.assertFalse(reloaded.validate())
+
+
+if __name__ == '__main__':
+    unittest.main()
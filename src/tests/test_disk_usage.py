@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from src.engine.file_center import disk_usage
+from src.engine.file_center.disk_usage import DiskUsageIndex, format_size
+from src.engine.file_center.graveyard import GRAVEYARD_NAME
+
+
+def _age(path: str, seconds: int = 60):
+    """Push mtimes of ``path`` and the directories below it out of the racy window."""
+    for root, directories, _ in os.walk(path):
+        for directory in [root] + [os.path.join(root, name) for name in directories]:
+            stat = os.stat(directory)
+            os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 1_000_000_000))
+
+
+class TestDiskUsageIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.workdir.name, 'police')
+        self._write('top.txt', 10)
+        self._write('build/a.o', 1000)
+        self._write('build/obj/b.o', 2000)
+        self._write('logs/c.log', 300)
+        self._write('cache/d.bin', 50)
+        _age(self.root)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def _write(self, relative, size):
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'x' * size)
+
+    def test_totals_and_largest_subtrees(self):
+        usage = DiskUsageIndex(top_n=2).usage(self.root)
+
+        self.assertEqual(usage.files, 5)
+        self.assertEqual(usage.directories, 4)
+        self.assertEqual(usage.bytes, 3360)
+        self.assertEqual(usage.largest,
+                         [(os.path.join(self.root, 'build'), 3000), (os.path.join(self.root, 'logs'), 300)])
+        self.assertIn('5 files in 4 folders', usage.summary())
+
+    def test_graveyard_is_left_out(self):
+        self._write(f'{GRAVEYARD_NAME}/20240101T000000000000/huge.bin', 5000)
+        usage = DiskUsageIndex(top_n=1).usage(self.root)
+
+        self.assertEqual((usage.files, usage.directories, usage.bytes), (5, 4, 3360))
+        self.assertEqual(usage.largest, [(os.path.join(self.root, 'build'), 3000)])
+
+    def test_unchanged_directories_are_not_rescanned(self):
+        index = DiskUsageIndex()
+        self.assertEqual(index.usage(self.root).scanned, 5)
+
+        with mock.patch.object(disk_usage.os, 'scandir', wraps=os.scandir) as scandir:
+            usage = index.usage(self.root)
+        self.assertEqual(scandir.call_count, 0)
+        self.assertEqual(usage.bytes, 3360)
+
+    def test_changes_are_picked_up_incrementally(self):
+        index = DiskUsageIndex()
+        index.usage(self.root)
+
+        self._write('build/obj/new.o', 500)
+        shutil.rmtree(os.path.join(self.root, 'logs'))
+        usage = index.usage(self.root)
+
+        # The root lost a folder and build/obj gained a file; build itself is unchanged.
+        self.assertEqual(usage.scanned, 2)
+        self.assertEqual((usage.files, usage.directories, usage.bytes), (5, 3, 3560))
+        self.assertNotIn(os.path.join(self.root, 'logs'), index._nodes)
+
+    def test_recently_modified_directories_are_rescanned(self):
+        index = DiskUsageIndex()
+        self._write('cache/e.bin', 5)
+        index.usage(self.root)
+        # cache/ was modified within the racy window, so it is read again even though its mtime is unchanged.
+        self.assertEqual(index.usage(self.root).scanned, 1)
+
+    def test_index_persists(self):
+        cache_path = os.path.join(self.workdir.name, 'index.json')
+        with DiskUsageIndex(cache_path) as index:
+            index.usage(self.root)
+
+        reloaded = DiskUsageIndex(cache_path)
+        usage = reloaded.usage(self.root)
+        self.assertEqual(usage.scanned, 0)
+        self.assertEqual(usage.bytes, 3360)
+
+    def test_missing_directory(self):
+        usage = DiskUsageIndex().usage(os.path.join(self.workdir.name, 'missing'))
+        self.assertEqual((usage.files, usage.bytes, usage.largest), (0, 0, []))
+
+    def test_format_size(self):
+        self.assertEqual(format_size(512), '512 B')
+        self.assertEqual(format_size(1536), '1.5 KB')
+        self.assertEqual(format_size(3 * 1024 ** 3), '3.0 GB')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import string
+import unittest
+from collections import Counter
+
+from src.engine.cryptography_center.cipher import Cipher
+from src.engine.cryptography_center.entropy_pool import EntropyPool, generate_passwords
+
+
+class FixedPool(EntropyPool):
+    """Deterministic pool that cycles through every byte value."""
+
+    def __init__(self):
+        super().__init__(buffer_size=256)
+
+    def read(self, size: int) -> bytes:
+        return bytes(index % 256 for index in range(size))
+
+
+class TestEntropyPool(unittest.TestCase):
+
+    def test_read_returns_requested_sizes(self):
+        pool = EntropyPool(buffer_size=10)
+        chunks = [pool.read(size) for size in (3, 10, 25, 0)]
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 10, 25, 0])
+
+    def test_passwords_use_only_the_alphabet(self):
+        passwords = list(Cipher.generate_passwords(500, 20, 'abc123!'))
+        self.assertEqual(len(passwords), 500)
+        self.assertTrue(all(len(password) == 20 for password in passwords))
+        self.assertTrue(set(''.join(passwords)) <= set('abc123!'))
+        self.assertEqual(len(set(passwords)), 500)
+
+    def test_generator_is_lazy(self):
+        generator = generate_passwords(10 ** 12, 16)
+        self.assertEqual(len(next(generator)), 16)
+
+    def test_rejection_sampling_is_unbiased(self):
+        # 256 % 10 == 6, so folding bytes 250..255 back in would favour digits 0-5.
+        counts = Counter(''.join(generate_passwords(10, 25, string.digits, FixedPool())))
+        self.assertEqual(set(counts.values()), {25})
+
+    def test_non_ascii_alphabet(self):
+        alphabet = 'αβγδε'
+        passwords = list(generate_passwords(50, 12, alphabet))
+        self.assertTrue(set(''.join(passwords)) <= set(alphabet))
+
+    def test_invalid_arguments_raise_at_call(self):
+        # No next(): the call itself has to fail.
+        with self.assertRaises(ValueError):
+            generate_passwords(1, 8, 'aab')
+        with self.assertRaises(ValueError):
+            generate_passwords(1, 8, 'a')
+        with self.assertRaises(ValueError):
+            generate_passwords(1, 0)
+        with self.assertRaises(ValueError):
+            Cipher.generate_passwords(1, 8, 'aab')
+
+
+if __name__ == '__main__':
+    unittest.main()
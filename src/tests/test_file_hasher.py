@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.engine.cryptography_center.cipher import Cipher
+from src.engine.cryptography_center.file_hasher import FileHasher
+
+
+class TestFileHasher(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.workdir.name, 'hashes.json')
+        self.paths = []
+        for index in range(5):
+            path = os.path.join(self.workdir.name, f'file_{index}.txt')
+            with open(path, 'w') as file:
+                file.write(f'content {index}' * (index + 1))
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_digest_matches_create_hash(self):
+        hasher = FileHasher(chunk_size=3)
+        self.assertEqual(hasher.hash_file(self.paths[2]), Cipher.create_hash('content 2' * 3))
+
+    def test_mmap_path_matches_chunked_path(self):
+        chunked = FileHasher(mmap_threshold=1 << 40)
+        mapped = FileHasher(mmap_threshold=0)
+        for path in self.paths:
+            self.assertEqual(chunked.hash_file(path), mapped.hash_file(path))
+
+    def test_cache_is_persisted_and_reused(self):
+        with FileHasher(self.cache_path) as hasher:
+            expected = hasher.hash_many(self.paths, max_workers=2)
+
+        hasher = FileHasher(self.cache_path)
+        with patch.object(FileHasher, '_digest', side_effect=AssertionError('file was re-read')):
+            self.assertEqual(hasher.hash_many(self.paths), expected)
+
+    def test_changed_file_is_rehashed(self):
+        hasher = FileHasher(self.cache_path)
+        before = hasher.hash_file(self.paths[0])
+        with open(self.paths[0], 'a') as file:
+            file.write('more')
+        self.assertNotEqual(hasher.hash_file(self.paths[0]), before)
+
+    def test_hash_many_skips_missing_files(self):
+        hasher = FileHasher()
+        missing = os.path.join(self.workdir.name, 'missing.txt')
+        self.assertEqual(set(hasher.hash_many(self.paths + [missing])), set(self.paths))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.engine.file_center import graveyard
+from src.engine.file_center.graveyard import GRAVEYARD_NAME, GraveyardPurger, bury, find_graves
+
+
+class TestGraveyard(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.workdir.name, 'police')
+        for relative in ('a.txt', 'build/obj/b.o', 'build/obj/c.o', 'logs/d.log'):
+            path = os.path.join(self.root, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as file:
+                file.write(relative)
+        self.graveyard = os.path.join(self.root, GRAVEYARD_NAME)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_bury_empties_directory_with_one_rename_per_entry(self):
+        with mock.patch('os.rename', wraps=os.rename) as rename:
+            report = bury(self.root)
+
+        self.assertTrue(report.succeeded)
+        self.assertEqual(report.entries, 3)
+        self.assertEqual(rename.call_count, 3)
+        self.assertEqual(os.listdir(self.root), [GRAVEYARD_NAME])
+        self.assertEqual(os.path.dirname(report.grave), self.graveyard)
+        self.assertEqual(sorted(os.listdir(report.grave)), ['a.txt', 'build', 'logs'])
+
+    def test_bury_stays_inside_directory(self):
+        first = bury(self.root)
+        with open(os.path.join(self.root, 'e.txt'), 'w') as file:
+            file.write('e')
+        second = bury(self.root)
+
+        # The parent is left alone, and the graveyard is never buried into itself.
+        self.assertEqual(os.listdir(self.workdir.name), ['police'])
+        self.assertEqual(second.entries, 1)
+        self.assertEqual(sorted(os.listdir(self.graveyard)),
+                         sorted(os.path.basename(report.grave) for report in (first, second)))
+
+    def test_bury_without_grave_touches_nothing(self):
+        with mock.patch.object(graveyard.os, 'makedirs', side_effect=PermissionError(13, 'Permission denied')):
+            report = bury(self.root)
+        self.assertIsNone(report.grave)
+        self.assertFalse(os.path.exists(self.graveyard))
+        self.assertEqual(len(os.listdir(self.root)), 3)
+
+    def test_purger_purges_in_background(self):
+        purger = GraveyardPurger()
+        self.addCleanup(purger.stop)
+
+        report = purger.bury(self.root)
+        self.assertTrue(report.succeeded)
+        self.assertTrue(purger.wait(timeout=10))
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_interrupted_purge_is_resumed(self):
+        stopped = GraveyardPurger()
+        stopped.stop()
+        grave = stopped.bury(self.root).grave
+        self.assertEqual(find_graves([self.root]), [grave])
+
+        purger = GraveyardPurger()
+        self.addCleanup(purger.stop)
+        self.assertEqual(purger.resume([self.root, '']), 1)
+        self.assertTrue(purger.wait(timeout=10))
+        self.assertEqual(find_graves([self.root]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from src.engine.cryptography_center import key_derivation
+from src.engine.cryptography_center.key_derivation import (
+    PBKDF2,
+    SCRYPT,
+    DerivedKeyCache,
+    KDFParameters,
+    KeyDerivation,
+)
+
+
+class TestKeyDerivation(unittest.TestCase):
+
+    def setUp(self):
+        self.salt = KeyDerivation.generate_salt()
+        self.parameters = KDFParameters(PBKDF2, iterations=1000)
+
+    def test_derivation_is_deterministic_per_salt(self):
+        kdf = KeyDerivation(self.parameters)
+        key = kdf.derive('hunter2', self.salt)
+        self.assertEqual(len(key), 32)
+        self.assertEqual(kdf.derive(b'hunter2', self.salt), key)
+        self.assertNotEqual(kdf.derive('hunter2', KeyDerivation.generate_salt()), key)
+
+    def test_scrypt(self):
+        kdf = KeyDerivation(KDFParameters(SCRYPT, n=2 ** 10, key_size=16))
+        self.assertEqual(len(kdf.derive('hunter2', self.salt)), 16)
+
+    def test_cache_skips_repeated_derivation(self):
+        kdf = KeyDerivation(self.parameters, DerivedKeyCache())
+        key = kdf.derive('hunter2', self.salt)
+        with patch.object(key_derivation, 'derive_key', side_effect=AssertionError('derived twice')):
+            self.assertEqual(kdf.derive('hunter2', self.salt), key)
+
+    def test_aes_strategy_roundtrip(self):
+        kdf = KeyDerivation(self.parameters)
+        encrypted = kdf.aes_strategy('hunter2', self.salt).encrypt(b'payload')
+        self.assertEqual(kdf.aes_strategy('hunter2', self.salt).decrypt(encrypted), b'payload')
+
+    def test_calibrate_returns_usable_parameters(self):
+        parameters = KeyDerivation.calibrate(0.01, PBKDF2)
+        self.assertEqual(parameters.algorithm, PBKDF2)
+        self.assertGreaterEqual(parameters.iterations, 10_000)
+        self.assertGreaterEqual(KeyDerivation.calibrate(0.01, SCRYPT).n, 2 ** 12)
+
+    def test_calibrate_respects_memory_budget(self):
+        # A machine that derives instantly would otherwise double n all the way to 2 ** 22 (4 GiB with r=8).
+        with patch.object(key_derivation, '_time_derivation', return_value=0.0):
+            parameters = KeyDerivation.calibrate(1.0, SCRYPT, max_memory=16 * 1024 * 1024)
+        self.assertEqual(parameters.n, 2 ** 13)
+        self.assertLessEqual(parameters.scrypt_memory, 16 * 1024 * 1024)
+        self.assertGreater(parameters.scrypt_maxmem, parameters.scrypt_memory)
+        self.assertEqual(len(key_derivation.derive_key(b'password', self.salt, parameters)), 32)
+
+    def test_parameters_roundtrip_through_dict(self):
+        self.assertEqual(KDFParameters.from_dict(self.parameters.as_dict()), self.parameters)
+        with self.assertRaises(ValueError):
+            KDFParameters('md5')
+
+
+class TestDerivedKeyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.cache = DerivedKeyCache(max_entries=2, ttl=10, clock=lambda: self.now)
+        self.addCleanup(self.cache.clear)
+
+    def test_lru_eviction_wipes_key(self):
+        self.cache.put(b'a', b'key-a')
+        buffer = self.cache._entries[b'a'][0]
+        self.cache.put(b'b', b'key-b')
+        self.cache.get(b'a')
+        self.cache.put(b'c', b'key-c')
+
+        self.assertEqual(self.cache.get(b'a'), b'key-a')
+        self.assertIsNone(self.cache.get(b'b'))
+
+        self.cache.clear()
+        self.assertEqual(buffer, bytearray(5))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_ttl_expiry(self):
+        self.cache.put(b'a', b'key-a')
+        self.now = 9.9
+        self.assertEqual(self.cache.get(b'a'), b'key-a')
+        self.now = 10.0
+        self.assertIsNone(self.cache.get(b'a'))
+
+
+    def test_expired_keys_are_swept_on_any_access(self):
+        self.cache.put(b'a', b'key-a')
+        buffer = self.cache._entries[b'a'][0]
+        self.now = 10.0
+        self.cache.put(b'b', b'key-b')
+
+        self.assertNotIn(b'a', self.cache._entries)
+        self.assertEqual(buffer, bytearray(5))
+        self.now = 20.0
+        self.assertEqual(len(self.cache), 0)
+
+    def test_expired_keys_are_swept_without_access(self):
+        cache = DerivedKeyCache(ttl=0.05)
+        self.addCleanup(cache.clear)
+        cache.put(b'a', b'key-a')
+        buffer = cache._entries[b'a'][0]
+
+        deadline = time.monotonic() + 5
+        while cache._entries and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(buffer, bytearray(5))
+
+
+if __name__ == '__main__':
+    unittest.main()
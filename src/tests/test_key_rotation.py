@@ -0,0 +1,144 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from src.engine.cryptography_center.cipher import Cipher
+from src.engine.cryptography_center.encryption_strategy import AESEncryptionStrategy
+from src.engine.cryptography_center.key_rotation import (
+    STAGED,
+    TEMPORARY_SUFFIX,
+    KeyCheck,
+    RateLimiter,
+    ReencryptionJob,
+)
+from src.engine.cryptography_center.segmented_encryption import SegmentedAESEncryptionStrategy
+
+
+class TestReencryptionJob(unittest.TestCase):
+
+    def setUp(self):
+        self.old_cipher = Cipher(AESEncryptionStrategy(Cipher.generate_key(32)))
+        self.new_cipher = Cipher(AESEncryptionStrategy(Cipher.generate_key(32)))
+        self.workdir = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.workdir.name, 'rotation.journal')
+        self.payloads = {}
+        for index in range(3):
+            path = os.path.join(self.workdir.name, f'file_{index}.enc')
+            payload = os.urandom(5000 + index)
+            Cipher.save_to_file(path, self.old_cipher.strategy.encrypt(payload))
+            self.payloads[path] = payload
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def _job(self, **kwargs):
+        kwargs.setdefault('old_key_check', KeyCheck.create(self.old_cipher))
+        return ReencryptionJob(self.old_cipher, self.new_cipher, self.journal_path, chunk_size=1024, **kwargs)
+
+    def _contents(self):
+        return {path: Cipher.read_from_file(path) for path in self.payloads}
+
+    def _assert_rotated(self, path):
+        self.assertEqual(self.new_cipher.strategy.decrypt(Cipher.read_from_file(path)), self.payloads[path])
+
+    def test_rotates_all_files(self):
+        report = self._job().run(self.payloads)
+        self.assertEqual(len(report.rotated), 3)
+        for path in self.payloads:
+            self._assert_rotated(path)
+            self.assertFalse(os.path.exists(path + TEMPORARY_SUFFIX))
+
+    def test_rerun_skips_finished_files(self):
+        self._job().run(self.payloads)
+        report = self._job().run(self.payloads)
+        self.assertEqual(len(report.skipped), 3)
+        for path in self.payloads:
+            self._assert_rotated(path)
+
+    def test_resume_after_crash_between_stage_and_swap(self):
+        paths = list(self.payloads)
+        job = self._job()
+        with patch.object(ReencryptionJob, '_finish_swap', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                job.run(paths[:1])
+        self.assertEqual(job.journal()[os.path.abspath(paths[0])], STAGED)
+
+        report = self._job().run(paths)
+        self.assertEqual(len(report.rotated), 3)
+        for path in paths:
+            self._assert_rotated(path)
+
+    def test_resume_after_crash_between_swap_and_journal(self):
+        paths = list(self.payloads)
+        original_record = ReencryptionJob._record
+
+        def crash_on_done(job, path, status):
+            if status == 'done':
+                raise KeyboardInterrupt
+            original_record(job, path, status)
+
+        with patch.object(ReencryptionJob, '_record', crash_on_done):
+            with self.assertRaises(KeyboardInterrupt):
+                self._job().run(paths[:1])
+        self._assert_rotated(paths[0])
+
+        self._job().run(paths)
+        for path in paths:
+            self._assert_rotated(path)
+
+    def test_stop_event_pauses_job(self):
+        stop_event = threading.Event()
+        stop_event.set()
+        report = self._job(stop_event=stop_event).run(self.payloads)
+        self.assertTrue(report.stopped)
+        self.assertEqual(report.rotated, [])
+
+    def test_failures_are_reported(self):
+        missing = os.path.join(self.workdir.name, 'missing.enc')
+        report = self._job().run([missing, *self.payloads])
+        self.assertEqual(list(report.failures), [missing])
+        self.assertEqual(len(report.rotated), 3)
+
+    def test_wrong_old_key_leaves_files_untouched(self):
+        before = self._contents()
+        wrong_cipher = Cipher(AESEncryptionStrategy(Cipher.generate_key(32)))
+        job = ReencryptionJob(wrong_cipher, self.new_cipher, self.journal_path,
+                              old_key_check=KeyCheck.create(self.old_cipher))
+        report = job.run(self.payloads)
+
+        self.assertEqual(report.rotated, [])
+        self.assertEqual(set(report.failures), set(self.payloads))
+        self.assertEqual(self._contents(), before)
+
+    def test_unauthenticated_old_strategy_needs_key_check(self):
+        with self.assertRaises(ValueError):
+            ReencryptionJob(self.old_cipher, self.new_cipher, self.journal_path)
+
+    def test_wrong_authenticated_old_key_fails_the_file(self):
+        old_cipher = Cipher(SegmentedAESEncryptionStrategy(Cipher.generate_key(32)))
+        wrong_cipher = Cipher(SegmentedAESEncryptionStrategy(Cipher.generate_key(32)))
+        path = os.path.join(self.workdir.name, 'segmented.enc')
+        Cipher.save_to_file(path, old_cipher.strategy.encrypt(b'only good copy'))
+        before = Cipher.read_from_file(path)
+
+        report = ReencryptionJob(wrong_cipher, self.new_cipher, self.journal_path).run([path])
+        self.assertEqual(list(report.failures), [path])
+        self.assertEqual(Cipher.read_from_file(path), before)
+        self.assertFalse(os.path.exists(path + TEMPORARY_SUFFIX))
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_sleeps_to_hold_rate(self):
+        now, sleeps = [0.0], []
+        limiter = RateLimiter(1000, clock=lambda: now[0], sleep=sleeps.append)
+        limiter.acquire(1000)
+        self.assertEqual(sleeps, [])
+        limiter.acquire(500)
+        self.assertEqual(sleeps, [0.5])
+
+
+if __name__ == '__main__':
+    unittest.main()
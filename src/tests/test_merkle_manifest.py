@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+from src.engine.cryptography_center.cipher import Cipher
+from src.engine.cryptography_center.encryption_strategy import AESEncryptionStrategy
+from src.engine.cryptography_center.merkle_manifest import (
+    MANIFEST_SUFFIX,
+    MerkleManifest,
+    verify_file,
+    write_manifest,
+)
+
+
+class TestMerkleManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        plain_path = os.path.join(self.workdir.name, 'plain.bin')
+        self.path = os.path.join(self.workdir.name, 'cipher.bin')
+        with open(plain_path, 'wb') as file:
+            file.write(os.urandom(10_000))
+        Cipher(AESEncryptionStrategy(Cipher.generate_key(32))).encrypt_file(plain_path, self.path)
+        self.manifest = write_manifest(self.path, block_size=1000)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def _flip_byte(self, offset):
+        with open(self.path, 'r+b') as file:
+            file.seek(offset)
+            byte = file.read(1)
+            file.seek(offset)
+            file.write(bytes([byte[0] ^ 0xff]))
+
+    def test_intact_file_verifies(self):
+        self.assertEqual(len(self.manifest.leaves), 11)
+        self.assertEqual(verify_file(self.path, max_workers=4), [])
+        self.assertTrue(self.manifest.verify_range(self.path, 0, self.manifest.file_size))
+
+    def test_corruption_is_located(self):
+        self._flip_byte(4321)
+        self.assertEqual(verify_file(self.path), [4])
+        self.assertFalse(self.manifest.verify_range(self.path, 4000, 10))
+        self.assertTrue(self.manifest.verify_range(self.path, 0, 4000))
+
+    def test_truncation_is_detected(self):
+        with open(self.path, 'r+b') as file:
+            file.truncate(9_000)
+        self.assertIn(10, verify_file(self.path))
+
+    def test_audit_path_is_logarithmic(self):
+        manifest = MerkleManifest(1, 1000, [bytes([index % 256]) * 32 for index in range(1000)])
+        self.assertLessEqual(len(manifest.audit_path(999)), 10)
+
+    def test_manifest_roundtrip_and_tamper_check(self):
+        loaded = MerkleManifest.load(self.path + MANIFEST_SUFFIX)
+        self.assertEqual(loaded.root, self.manifest.root)
+
+        data = self.manifest.as_dict()
+        data['leaves'][0] = '00' * 32
+        with self.assertRaises(ValueError):
+            MerkleManifest.from_dict(data)
+
+    def test_empty_file(self):
+        empty = os.path.join(self.workdir.name, 'empty.bin')
+        open(empty, 'wb').close()
+        write_manifest(empty)
+        self.assertEqual(verify_file(empty), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import time
+import unittest
+
+from src.engine.file_center.directory_watcher import DirectoryWatcher, WatchThreshold, WatchTotals
+from src.engine.file_center.file_center_settings import FileCenterSettings
+from src.engine.file_center.retention_enforcer import RetentionEnforcer
+from src.engine.file_center.retention_policy import RetentionPolicy
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class TestRetentionEnforcer(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.old = os.path.join(self.workdir.name, 'old')
+        self.new = os.path.join(self.workdir.name, 'new')
+        os.makedirs(self.old)
+        os.makedirs(self.new)
+        self.settings = FileCenterSettings(directories_to_police={'0': self.old})
+        self.settings.set_watch_threshold(0, WatchThreshold(max_files=2))
+        self.settings.set_retention_policy(0, RetentionPolicy(patterns=['*.tmp']))
+
+        watcher = DirectoryWatcher(settle=0.1, poll_interval=0.05, cooldown=0)
+        self.enforcer = RetentionEnforcer(self.settings, watcher)
+        self.addCleanup(self.enforcer.stop, 5)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def _fill(self, directory):
+        for index in range(3):
+            with open(os.path.join(directory, f'{index}.tmp'), 'w') as file:
+                file.write('x')
+
+    def test_watch_follows_directory_change(self):
+        self.enforcer.sync()
+        self.assertTrue(_wait_for(lambda: self.enforcer.watcher.totals(self.old) is not None))
+
+        self.settings.set_directory_to_police(0, self.new)
+        self.enforcer.sync(0)
+        self.assertTrue(_wait_for(lambda: self.enforcer.watcher.totals(self.new) is not None))
+        self.assertIsNone(self.enforcer.watcher.totals(self.old))
+
+        self._fill(self.old)
+        self._fill(self.new)
+        self.assertTrue(_wait_for(lambda: not os.listdir(self.new)))
+        self.assertEqual(len(os.listdir(self.old)), 3)
+
+    def test_stale_watch_leaves_old_directory_alone(self):
+        self.enforcer.sync()
+        self._fill(self.old)
+        # The directory changed without a sync, so the watch still points at the old one.
+        self.settings.set_directory_to_police(0, self.new)
+        self.enforcer._on_threshold_exceeded(self.old, WatchTotals(self.old, files=3))
+        self.assertEqual(len(os.listdir(self.old)), 3)
+
+    def test_shared_directory_stays_enforced_when_one_uid_leaves(self):
+        self.settings.set_directory_to_police(1, self.old)
+        self.settings.set_watch_threshold(1, WatchThreshold(max_files=2))
+        self.settings.set_retention_policy(1, RetentionPolicy(patterns=['*.tmp']))
+        self.enforcer.sync()
+        self.assertTrue(_wait_for(lambda: self.enforcer.watcher.totals(self.old) is not None))
+
+        # Whichever uid registered the shared watch last, the one that stays keeps its policy enforced.
+        for leaving in (1, 0):
+            self.settings.set_directory_to_police(leaving, self.new)
+            self.enforcer.sync(leaving)
+            self._fill(self.old)
+            self.assertTrue(_wait_for(lambda: not os.listdir(self.old)), leaving)
+            self.settings.set_directory_to_police(leaving, self.old)
+            self.enforcer.sync(leaving)
+
+    def test_threshold_change_is_picked_up(self):
+        self.enforcer.sync()
+        self.assertTrue(_wait_for(lambda: self.enforcer.watcher.totals(self.old) is not None))
+        self.settings.set_watch_threshold(0, None)
+        self.enforcer.sync()
+        self.assertIsNone(self.enforcer.watcher.totals(self.old))
+
+        self._fill(self.old)
+        self.settings.set_watch_threshold(0, WatchThreshold(max_files=2))
+        self.enforcer.sync(0)
+        self.assertTrue(_wait_for(lambda: not os.listdir(self.old)))
+
+
+if __name__ == '__main__':
+    unittest.main()
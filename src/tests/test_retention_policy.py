@@ -0,0 +1,119 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from src.engine.file_center.file_center_settings import FileCenterSettings
+from src.engine.file_center.graveyard import GRAVEYARD_NAME
+from src.engine.file_center.retention_policy import DAY, RetentionPolicy, apply_policy
+
+NOW = 1_700_000_000.0
+
+
+class TestRetentionPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.root = self.workdir.name
+        # relative path -> (size, age in days)
+        self._write('a.tmp', 10, 10)
+        self._write('b.tmp', 10, 1)
+        self._write('big.iso', 5000, 30)
+        self._write('notes.txt', 10, 30)
+        self._write('build/c.tmp', 10, 20)
+        self._write('build/deep/d.tmp', 10, 20)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def _write(self, relative, size, age_days):
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'x' * size)
+        mtime = NOW - age_days * DAY
+        os.utime(path, (mtime, mtime))
+
+    def _remaining(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.root).replace(os.sep, '/')
+            for root, _, files in os.walk(self.root) for name in files
+        )
+
+    def test_rules_are_combined(self):
+        policy = RetentionPolicy(patterns=['*.tmp'], older_than_days=7)
+        report = apply_policy(self.root, policy, now=NOW)
+
+        self.assertEqual((report.scanned, report.matched, report.deleted, report.bytes), (6, 3, 3, 30))
+        self.assertEqual(self._remaining(), ['b.tmp', 'big.iso', 'notes.txt'])
+
+    def test_size_rule(self):
+        report = apply_policy(self.root, RetentionPolicy(larger_than_bytes=1024), now=NOW)
+        self.assertEqual(report.deleted, 1)
+        self.assertNotIn('big.iso', self._remaining())
+
+    def test_name_and_path_globs(self):
+        # Name globs match in every folder, path globs only where the path says.
+        policy = RetentionPolicy(patterns=['*.iso', 'build/*.tmp'])
+        apply_policy(self.root, policy, now=NOW)
+        self.assertEqual(self._remaining(), ['a.tmp', 'b.tmp', 'build/deep/d.tmp', 'notes.txt'])
+
+    def test_keep_newest(self):
+        report = apply_policy(self.root, RetentionPolicy(patterns=['*.tmp'], keep_newest=2), now=NOW)
+
+        self.assertEqual((report.matched, report.kept, report.deleted), (4, 2, 2))
+        self.assertEqual(self._remaining(), ['a.tmp', 'b.tmp', 'big.iso', 'notes.txt'])
+
+    def test_max_depth(self):
+        apply_policy(self.root, RetentionPolicy(patterns=['*.tmp'], max_depth=1), now=NOW)
+        self.assertEqual(self._remaining(), ['big.iso', 'build/deep/d.tmp', 'notes.txt'])
+
+    def test_dry_run_deletes_nothing(self):
+        before = self._remaining()
+        report = apply_policy(self.root, RetentionPolicy(patterns=['*.tmp']), dry_run=True, now=NOW)
+
+        self.assertTrue(report.dry_run)
+        self.assertEqual(report.deleted, 4)
+        self.assertEqual(len(report.sample), 4)
+        self.assertEqual(self._remaining(), before)
+
+    def test_graveyard_is_skipped(self):
+        self._write(f'{GRAVEYARD_NAME}/20240101T000000000000/old.tmp', 10, 30)
+        report = apply_policy(self.root, RetentionPolicy(patterns=['*.tmp']), now=NOW)
+
+        self.assertEqual(report.scanned, 6)
+        self.assertIn(f'{GRAVEYARD_NAME}/20240101T000000000000/old.tmp', self._remaining())
+
+    def test_cancelled_before_start(self):
+        stop_event = threading.Event()
+        stop_event.set()
+        report = apply_policy(self.root, RetentionPolicy(), now=NOW, stop_event=stop_event)
+
+        self.assertTrue(report.cancelled)
+        self.assertEqual(report.deleted, 0)
+        self.assertEqual(len(self._remaining()), 6)
+
+
+class TestRetentionSettings(unittest.TestCase):
+
+    def test_policies_round_trip_per_uid(self):
+        settings = FileCenterSettings()
+        policy = RetentionPolicy(patterns=['*.log'], older_than_days=7, keep_newest=5)
+        settings.set_retention_policy(3, policy)
+
+        reloaded = FileCenterSettings.from_dict(settings.as_dict())
+        self.assertEqual(reloaded.get_retention_policy(3), policy)
+        self.assertIsNone(reloaded.get_retention_policy(1))
+        self.assertTrue(reloaded.validate())
+
+        reloaded.set_retention_policy(3, None)
+        self.assertIsNone(reloaded.get_retention_policy(3))
+
+    def test_invalid_policy_fails_validation(self):
+        settings = FileCenterSettings()
+        settings.retention_policies['1'] = {'keep_newest': -1}
+        self.assertFalse(settings.validate())
+
+
+if __name__ == '__main__':
+    unittest.main()
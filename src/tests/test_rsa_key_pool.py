@@ -0,0 +1,49 @@
+import unittest
+
+from Crypto.PublicKey import RSA
+
+from src.engine.cryptography_center.rsa_key_pool import RSAKeyPool
+
+
+class TestRSAKeyPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = RSAKeyPool(key_sizes=(1024,), target=2, max_workers=2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_get_returns_matching_keypair(self):
+        private_pem, public_pem = self.pool.get(1024)
+        private_key = RSA.import_key(private_pem)
+        self.assertEqual(private_key.size_in_bits(), 1024)
+        self.assertEqual(private_key.publickey().export_key(), public_pem)
+
+    def test_hits_and_misses_are_counted(self):
+        for _ in range(3):
+            self.pool.get(1024)
+        stats = self.pool.stats(1024)
+        self.assertEqual(stats.hits + stats.misses, 3)
+        self.assertLessEqual(stats.ready + stats.in_flight, 2)
+
+    def test_pool_refills_to_target(self):
+        self.pool.get(1024)
+        self.pool.get(1024, timeout=30)
+        with self.pool._condition:
+            self.pool._condition.wait_for(lambda: len(self.pool._ready[1024]) == 2, timeout=30)
+        self.assertEqual(self.pool.stats(1024).ready, 2)
+
+    def test_unknown_key_size(self):
+        with self.assertRaises(ValueError):
+            self.pool.get(4096)
+
+    def test_closed_pool_falls_back_to_inline_generation(self):
+        self.pool.close()
+        with self.pool._condition:
+            self.pool._ready[1024].clear()
+        private_pem, _ = self.pool.get(1024)
+        self.assertEqual(RSA.import_key(private_pem).size_in_bits(), 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
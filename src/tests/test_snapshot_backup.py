@@ -0,0 +1,152 @@
+import hashlib
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from src.engine.cryptography_center.cipher import Cipher
+from src.engine.cryptography_center.encryption_strategy import AESEncryptionStrategy
+from src.engine.file_center.file_center_settings import FileCenterSettings
+from src.engine.file_center.snapshot_backup import _GEAR, ContentDefinedChunker, SnapshotBackup
+
+
+class TestContentDefinedChunker(unittest.TestCase):
+
+    def setUp(self):
+        self.chunker = ContentDefinedChunker(min_size=256, avg_size=1024, max_size=4096)
+        self.data = random.Random(7).randbytes(200_000)
+
+    def test_chunks_reassemble_and_respect_bounds(self):
+        chunks = list(self.chunker.chunks(io.BytesIO(self.data)))
+        self.assertEqual(b''.join(chunks), self.data)
+        self.assertTrue(all(len(chunk) <= 4096 for chunk in chunks))
+        self.assertTrue(all(len(chunk) >= 256 for chunk in chunks[:-1]))
+
+    def test_insertion_only_changes_nearby_chunks(self):
+        before = set(self.chunker.chunks(io.BytesIO(self.data)))
+        edited = self.data[:100_000] + b'inserted bytes' + self.data[100_000:]
+        after = list(self.chunker.chunks(io.BytesIO(edited)))
+        self.assertLessEqual(len([chunk for chunk in after if chunk not in before]), 3)
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            ContentDefinedChunker(min_size=10, avg_size=1000, max_size=4096)
+
+    def test_cut_points_match_per_byte_hash(self):
+        def reference(data, start, min_size, avg_size, max_size):
+            bits = avg_size.bit_length() - 1
+            mask, hash_value = ((1 << bits) - 1) << (32 - bits), 0
+            end = min(len(data), start + max_size)
+            for position in range(start + min_size, end):
+                hash_value = ((hash_value << 1) + _GEAR[data[position]]) & 0xFFFFFFFF
+                if not hash_value & mask:
+                    return position + 1
+            return end
+
+        rng = random.Random(11)
+        samples = [self.data[:50_000], bytes(20_000), b'ab' * 10_000, bytes(rng.randrange(4) for _ in range(30_000))]
+        for sizes in ((256, 1024, 4096), (1, 1, 16), (64, 64, 10_000), (64, 8192, 20_000), (0x100, 1 << 20, 1 << 21)):
+            chunker = ContentDefinedChunker(*sizes)
+            for data in samples:
+                for start in (0, 1, 4321, len(data) - 100):
+                    self.assertEqual(chunker.cut_point(data, start), reference(data, start, *sizes), sizes)
+
+
+class TestSnapshotBackup(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.workdir.name, 'source')
+        self.store = os.path.join(self.workdir.name, 'store')
+        os.makedirs(os.path.join(self.source, 'nested'))
+        rng = random.Random(3)
+        self.files = {
+            'big.bin': rng.randbytes(300_000),
+            os.path.join('nested', 'log.txt'): b'line\n' * 10_000,
+            'empty': b'',
+        }
+        for relative, data in self.files.items():
+            with open(os.path.join(self.source, relative), 'wb') as file:
+                file.write(data)
+
+        self.cipher = Cipher(AESEncryptionStrategy(Cipher.generate_key(32)))
+        self.backup = SnapshotBackup(self.store, self.cipher, ContentDefinedChunker(1024, 4096, 16384))
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def _restore_and_compare(self, snapshot_id, expected):
+        target = os.path.join(self.workdir.name, 'restored-' + snapshot_id)
+        self.backup.restore(self.source, snapshot_id, target)
+        for relative, data in expected.items():
+            with open(os.path.join(target, relative), 'rb') as file:
+                self.assertEqual(file.read(), data)
+
+    def test_snapshot_and_restore(self):
+        report = self.backup.snapshot(self.source)
+        self.assertEqual(report.files, 3)
+        self.assertGreater(report.new_chunks, 0)
+        self._restore_and_compare(report.snapshot_id, self.files)
+
+    def test_unchanged_tree_costs_nothing(self):
+        self.backup.snapshot(self.source)
+        report = self.backup.snapshot(self.source)
+        self.assertEqual(report.reused_files, 3)
+        self.assertEqual(report.new_chunks, 0)
+        self.assertEqual(len(self.backup.list_snapshots(self.source)), 2)
+
+    def test_small_edit_stores_few_chunks(self):
+        first = self.backup.snapshot(self.source)
+        edited = dict(self.files)
+        edited['big.bin'] = self.files['big.bin'][:150_000] + b'edit' + self.files['big.bin'][150_000:]
+        with open(os.path.join(self.source, 'big.bin'), 'wb') as file:
+            file.write(edited['big.bin'])
+
+        second = self.backup.snapshot(self.source)
+        self.assertEqual(second.reused_files, 2)
+        self.assertLess(second.new_bytes, first.new_bytes // 5)
+        self._restore_and_compare(first.snapshot_id, self.files)
+        self._restore_and_compare(second.snapshot_id, edited)
+
+    def test_chunks_are_encrypted(self):
+        self.backup.snapshot(self.source)
+        for root, _, names in os.walk(os.path.join(self.store, 'chunks')):
+            for name in names:
+                with open(os.path.join(root, name), 'rb') as file:
+                    self.assertNotIn(b'line\nline\n', file.read())
+
+    def test_chunk_names_do_not_reveal_content(self):
+        self.backup.snapshot(self.source)
+        names = {name for _, _, files in os.walk(os.path.join(self.store, 'chunks')) for name in files}
+        plain_hashes = {
+            hashlib.sha256(chunk).hexdigest()
+            for data in self.files.values() for chunk in self.backup.chunker.chunks(io.BytesIO(data))
+        }
+        self.assertTrue(names)
+        self.assertFalse(names & plain_hashes)
+
+        # Another key names the same content differently.
+        other = SnapshotBackup(os.path.join(self.workdir.name, 'other'),
+                               Cipher(AESEncryptionStrategy(Cipher.generate_key(32))), self.backup.chunker)
+        other.snapshot(self.source)
+        other_names = {name for _, _, files in os.walk(os.path.join(other.store_dir, 'chunks')) for name in files}
+        self.assertFalse(names & other_names)
+
+    def test_corrupt_chunk_is_detected(self):
+        report = self.backup.snapshot(self.source)
+        root, _, names = next((root, dirs, names) for root, dirs, names in os.walk(os.path.join(self.store, 'chunks'))
+                              if names)
+        wrong = self.backup._seal(b'not what was stored')
+        Cipher.save_to_file(os.path.join(root, names[0]), wrong)
+        with self.assertRaises(ValueError):
+            self.backup.restore(self.source, report.snapshot_id, os.path.join(self.workdir.name, 'restored'))
+
+    def test_snapshot_policed_skips_missing_directories(self):
+        settings = FileCenterSettings(directories_to_police={'0': self.source, '1': '', '2': '/does/not/exist'})
+        reports = self.backup.snapshot_policed(settings)
+        self.assertEqual([report.directory for report in reports], [self.source])
+
+
+if __name__ == '__main__':
+    unittest.main()
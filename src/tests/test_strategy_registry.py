@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from src.engine.cryptography_center import strategy_registry
+from src.engine.cryptography_center.cipher import Cipher
+from src.engine.cryptography_center.encryption_strategy import AESEncryptionStrategy, EncryptionStrategy
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Cold import of every engine module the application loads at start-up, in microseconds. Generous, so only a
+# regression (such as pulling pycryptodome or asyncio back into module scope) trips it rather than a slow machine.
+IMPORT_BUDGET_US = 400_000
+
+COLD_IMPORT = '''
+import sys
+import src.application_config.user_settings
+import src.engine.cryptography_center.cipher
+import src.engine.cryptography_center.strategy_registry
+import src.engine.file_center.deletion_engine
+import src.engine.file_center.disk_usage
+import src.engine.file_center.file_center_settings
+import src.engine.file_center.graveyard
+import src.engine.file_center.retention_enforcer
+import src.engine.network_center
+import src.engine.network_center.enums
+import src.engine.network_center.http_server.local_file_server
+import src.engine.network_center.ipv4
+import src.engine.network_center.network_center_settings
+print(','.join(name for name in ('Crypto', 'asyncio') if name in sys.modules))
+'''
+
+
+class _ReverseStrategy(EncryptionStrategy):
+    def encrypt(self, data: bytes) -> bytes:
+        return data[::-1]
+
+    def decrypt(self, data: bytes) -> bytes:
+        return data[::-1]
+
+
+class TestStrategyRegistry(unittest.TestCase):
+
+    def setUp(self):
+        registry = mock.patch.dict(strategy_registry._registry)
+        registry.start()
+        self.addCleanup(registry.stop)
+
+    def test_resolve_builtin_strategies(self):
+        self.assertIs(strategy_registry.resolve_strategy('aes'), AESEncryptionStrategy)
+        for name in strategy_registry.available_strategies():
+            self.assertTrue(issubclass(strategy_registry.resolve_strategy(name), EncryptionStrategy))
+
+    def test_cipher_from_name(self):
+        cipher = Cipher.from_name('aes', Cipher.generate_key(32))
+        self.assertIsInstance(cipher.strategy, AESEncryptionStrategy)
+        self.assertEqual(cipher.decrypt(cipher.encrypt('Hello, World!')), 'Hello, World!')
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            strategy_registry.create_strategy('rot13')
+
+    def test_register_lazy_path(self):
+        strategy_registry.register_strategy('reverse', f'{__name__}:_ReverseStrategy')
+        self.assertIn('reverse', strategy_registry.available_strategies())
+        self.assertEqual(Cipher.from_name('reverse').strategy.encrypt(b'abc'), b'cba')
+
+    def test_register_rejects_non_strategies(self):
+        with self.assertRaises(ValueError):
+            strategy_registry.register_strategy('broken', 'no_class_here')
+        strategy_registry.register_strategy('not-a-strategy', f'{__name__}:REPO_ROOT')
+        with self.assertRaises(TypeError):
+            strategy_registry.resolve_strategy('not-a-strategy')
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_cold_import_is_lazy_and_within_budget(self):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', COLD_IMPORT],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        )
+        loaded = result.stdout.strip().split(',')
+        self.assertNotIn('Crypto', loaded, 'pycryptodome was loaded at start-up')
+        self.assertNotIn('asyncio', loaded, 'asyncio was loaded at start-up')
+
+        # Lines look like "import time:  self [us] | cumulative | name"; top-level entries are not indented.
+        total = 0
+        for line in result.stderr.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].startswith(' src'):
+                total += int(fields[1])
+        self.assertGreater(total, 0)
+        self.assertLess(total, IMPORT_BUDGET_US, f'Cold import took {total / 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    unittest.main()